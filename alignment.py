@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from itertools import permutations
+
+# All 6 axis orders, in the same order itertools.permutations yields them.
+# calculate_min_difference keeps the first rotation with the lowest total, so the order matters for ties.
+ROTATIONS = np.array(list(permutations(range(3))), dtype=np.intp)
+
+def align_dimensions(measured, actual):
+    """Align every measured (N,3) row with its best rotation of the actual (N,3) dimensions.
+
+    Returns the (N,3) float deltas (measured - rotated actual) and the (N,) index into ROTATIONS that was chosen.
+    """
+    measured = np.asarray(measured, dtype=np.float64).reshape(-1, 3)
+    actual = np.asarray(actual, dtype=np.float64).reshape(-1, 3)
+
+    best_total = np.full(len(measured), np.inf)
+    best = np.zeros(len(measured), dtype=np.intp)
+
+    # Evaluate one rotation at a time over the whole batch to keep memory at a few (N,) arrays
+    for i, rotation in enumerate(ROTATIONS):
+        # Total absolute difference, summed left to right like the row-wise version
+        total = np.abs(measured[:, 0] - actual[:, rotation[0]]) \
+              + np.abs(measured[:, 1] - actual[:, rotation[1]]) \
+              + np.abs(measured[:, 2] - actual[:, rotation[2]])
+
+        # Strict "<" keeps the first rotation on ties, same as calculate_min_difference
+        better = total < best_total
+        best_total[better] = total[better]
+        best[better] = i
+
+    # Subtract the chosen rotation of the actual dimensions
+    rows = np.arange(len(measured))[:, None]
+    deltas = measured - actual[rows, ROTATIONS[best]]
+
+    return deltas, best
+
+# Row-wise reference implementation used by parse_log before align_dimensions; kept for the tests and benchmarks
+def calculate_min_difference(row):
+    # Specify Actual vs Result dimensions
+    actual_dims = (row['Length Actual'], row['Width Actual'], row['Height Actual'])
+    result_dims = (row['Length'], row['Width'], row['Height'])
+    
+    # Generate all permutations (rotations) of the expected dimensions
+    rotations = list(permutations(actual_dims))
+    
+    # Initialize parameters for finding the best rotation
+    min_difference = None
+    best_rotation = None
+    
+    for rotation in rotations:
+        # Calculate the difference for this rotation
+        difference = [result_dims[i] - rotation[i] for i in range(3)]
+        
+        # Compute the total absolute difference
+        total_difference = sum(abs(diff) for diff in difference)
+        
+        # Update minimum difference and best rotation
+        if min_difference is None or total_difference < min_difference:
+            min_difference = total_difference
+            best_rotation = rotation
+    
+    # Format differences to .2f
+    formatted_difference = [f"{diff:.2f}" for diff in [result_dims[i] - best_rotation[i] for i in range(3)]]
+    
+    return pd.Series(formatted_difference, index=['Difference Length', 'Difference Width', 'Difference Height'])
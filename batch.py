@@ -0,0 +1,194 @@
+import os
+import hashlib
+import logging
+import pandas as pd
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cache import ResultCache
+from drift import write_drift, DRIFT_FILE
+from export import write_results
+from logstore import LogStore
+from metrics import RunMetrics, METRICS_FILE
+from sweep import write_sweep, SWEEP_FILE, CURVE_FILE
+from pipeline import load_classifier, load_reference, analyze_log, output_folder, write_summary, SummaryAccumulator, DEFAULT_CHUNKSIZE
+
+# Per-process state, filled once by _init_worker so the model is never sent along with each task
+_worker = {}
+
+def _init_worker(model_file, reference_file, settings):
+    """Load the model and reference table once in each worker process."""
+    _worker['box_df'] = load_reference(reference_file)
+    _worker['knn'] = load_classifier(settings['classifier'], model_file, _worker['box_df'], settings['model_version'])
+    _worker['settings'] = settings
+    _worker['cache'] = ResultCache(settings['cache_dir']) if settings['cache_dir'] else None
+    _worker['store'] = LogStore(settings['store_dir']) if settings['store_dir'] else None
+
+def process_log(log_file, output_path, file_name, settings, knn, box_df, metrics, cache=None, store=None):
+    """Analyse one log and write its output folder: summary.txt, drift.csv, the sweep files and the results export.
+
+    settings holds the run options of analyze_logs (tolerances, selected_boxes, chunked, chunksize, format, sweep_grids).
+    Returns the AnalysisResult and the results file (the chunked CSV, the export, or None).
+    """
+    results_file = os.path.join(output_path, file_name + '.csv') if settings['chunked'] else None
+
+    result = analyze_log(log_file, settings['tolerances'], settings['selected_boxes'], knn, box_df,
+                         chunked=settings['chunked'], chunksize=settings['chunksize'], results_file=results_file,
+                         cache=cache, metrics=metrics, store=store, sweep_grids=settings['sweep_grids'])
+    with metrics.stage('write_summary'):
+        write_summary(result, os.path.join(output_path, "summary.txt"))
+        write_drift(result.summary.drift, os.path.join(output_path, DRIFT_FILE))
+        if result.summary.sweep is not None:
+            write_sweep(result.summary.sweep, os.path.join(output_path, SWEEP_FILE), os.path.join(output_path, CURVE_FILE))
+
+    if not settings['chunked'] and settings['format']:
+        with metrics.stage('export', rows_in=len(result.results)):
+            results_file = write_results(result.results, output_path, file_name, settings['tolerances'], settings['format'],
+                                         drift_df=result.summary.drift.table())
+    return result, results_file
+
+def output_names(log_files):
+    """Return the output folder name of every log: its file name, plus a hash of its folder when another log has the same name.
+
+    Recursive globs often match logs of the same name in different folders (e.g. every station's dims.log),
+    which would otherwise write, and in parallel overwrite, the same output folder.
+    """
+    stems = {log_file: os.path.splitext(os.path.basename(log_file))[0] for log_file in log_files}
+    repeated = Counter(stems.values())
+    names = {}
+    for log_file, stem in stems.items():
+        if repeated[stem] > 1:
+            folder = os.path.dirname(os.path.abspath(log_file))
+            stem = f"{stem}-{hashlib.sha1(folder.encode('utf-8')).hexdigest()[:8]}"
+        names[log_file] = stem
+    return names
+
+def _process_log(log_file, folder_name=None):
+    """Run the full pipeline on one log in a worker and return its summary counters (without the failure rows) and stage metrics."""
+    settings = _worker['settings']
+    metrics = RunMetrics(log_file, track_memory=settings['track_memory'])
+    output_path = None
+    try:
+        output_path, file_name = output_folder(log_file, settings['output'], folder_name)
+        result, _ = process_log(log_file, output_path, file_name, settings, _worker['knn'], _worker['box_df'], metrics,
+                                _worker['cache'], _worker['store'])
+
+        # Only the counters go back to the parent; the failure rows are already in summary.txt
+        result.summary.failures = []
+        return log_file, result.summary, None, metrics
+    except Exception as e:
+        logging.error(f"{log_file}: {e}", exc_info=True)
+        return log_file, None, f"{type(e).__name__}: {e}", metrics
+    finally:
+        metrics.stop()
+        if output_path:
+            metrics.write(os.path.join(output_path, METRICS_FILE))
+
+def analyze_logs(log_files, tolerances, selected_boxes, model_file, reference_file, output, workers=None,
+                 chunked=False, chunksize=DEFAULT_CHUNKSIZE, fmt='xlsx', classifier='knn', model_version=None, cache_dir=None, store_dir=None, track_memory=True, progress=None,
+                 sweep_grids=None):
+    """Analyse many logs over a pool of worker processes, writing one output folder per log.
+
+    fmt is the export format for the per-measurement results (see export.FORMATS), or None for summary.txt only.
+    cache_dir, if given, is the folder of a ResultCache shared by the workers, and store_dir that of a LogStore.
+    sweep_grids (see sweep.tolerance_grids) adds tolerance_sweep.csv and tolerance_curve.csv to every output folder.
+    progress, if given, is called as progress(log_file, summary, error, metrics) as each log finishes;
+    every log also gets a run_metrics.json (see metrics.RunMetrics) next to its summary.txt.
+
+    Each log is written to output/<name> (see output_names). A log whose worker process crashed is reported
+    with an error like any other log that could not be processed.
+
+    Returns {log_file: SummaryAccumulator or error message} in the order of log_files.
+    """
+    settings = {
+        'tolerances': tolerances,
+        'selected_boxes': selected_boxes,
+        'output': output,
+        'chunked': chunked,
+        'chunksize': chunksize,
+        'format': fmt,
+        'classifier': classifier,
+        'model_version': model_version,
+        'cache_dir': cache_dir,
+        'store_dir': store_dir,
+        'track_memory': track_memory,
+        'sweep_grids': sweep_grids
+    }
+    workers = min(workers or os.cpu_count() or 1, len(log_files))
+    names = output_names(log_files)
+    outcomes = {}
+    executor = None
+
+    if workers <= 1:
+        # No pool needed; run in this process
+        _init_worker(model_file, reference_file, settings)
+        completed = (_process_log(log_file, names[log_file]) for log_file in log_files)
+    else:
+        # Each worker loads the model once in its initializer; tasks only carry the log path
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(model_file, reference_file, settings))
+        futures = {executor.submit(_process_log, log_file, names[log_file]): log_file for log_file in log_files}
+        completed = (_future_outcome(future, futures[future]) for future in as_completed(futures))
+
+    try:
+        for log_file, summary, error, metrics in completed:
+            outcomes[log_file] = summary if error is None else error
+            if progress:
+                progress(log_file, summary, error, metrics)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return {log_file: outcomes[log_file] for log_file in log_files}
+
+def _future_outcome(future, log_file):
+    """Return the outcome of one log's task, or an error outcome if its worker died (BrokenProcessPool) or the task failed."""
+    try:
+        return future.result()
+    except Exception as e:
+        logging.error(f"{log_file}: {e}", exc_info=True)
+        metrics = RunMetrics(log_file, track_memory=False)
+        metrics.stop()
+        return log_file, None, f"{type(e).__name__}: {e}", metrics
+
+def write_fleet_summary(outcomes, selected_boxes, tolerances, output):
+    """Write fleet_summary.txt (merged counters), fleet_summary.csv (one row per log) and fleet_drift.csv into <output>/output,
+    plus fleet_sweep.csv and fleet_curve.csv when the logs were swept."""
+    output_path = os.path.join(output, "output")
+    os.makedirs(output_path, exist_ok=True)
+
+    rows = []
+    fleet = SummaryAccumulator(selected_boxes, tolerances, keep_failures=False)
+    names = output_names(list(outcomes))
+    for log_file, summary in outcomes.items():
+        name = names[log_file]
+        if isinstance(summary, str):
+            rows.append({'Log': name, 'Rows': None, 'Failed': None, 'Success Rate': None, 'Error': summary})
+            continue
+
+        success_rate = summary.success_rate if summary.total_rows else None
+        rows.append({'Log': name, 'Rows': summary.total_rows, 'Failed': summary.total_bad, 'Success Rate': success_rate, 'Error': None})
+
+        fleet.merge(summary)
+
+    fleet_df = pd.DataFrame(rows, columns=['Log', 'Rows', 'Failed', 'Success Rate', 'Error'])
+    fleet_df.to_csv(os.path.join(output_path, "fleet_summary.csv"), index=False)
+
+    with open(os.path.join(output_path, "fleet_summary.txt"), 'w') as file:
+        print(f"Fleet summary for {len(outcomes)} log(s)\n", file=file)
+        for row in rows:
+            if row['Error']:
+                print(f"{row['Log']}: could not be processed ({row['Error']})", file=file)
+            elif row['Rows']:
+                print(f"{row['Log']}: {row['Failed']} out of {row['Rows']} boxes failed: {row['Success Rate']:.2f}% success rate", file=file)
+            else:
+                print(f"{row['Log']}: no populated measurements", file=file)
+        print(file=file)
+
+        if fleet.total_rows:
+            fleet.write(file, list_failures=False)
+
+    write_drift(fleet.drift, os.path.join(output_path, "fleet_drift.csv"))
+    if fleet.sweep is not None:
+        write_sweep(fleet.sweep, os.path.join(output_path, "fleet_sweep.csv"), os.path.join(output_path, "fleet_curve.csv"))
+
+    return fleet
@@ -0,0 +1,35 @@
+import time
+import argparse
+import numpy as np
+from synthlog import make_rows
+from alignment import align_dimensions, calculate_min_difference
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the row-wise and vectorized rotation alignment.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--skip-apply-above', type=int, default=None, help="Skip the slow apply path above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'Rows':>10} {'apply (s)':>12} {'vectorized (s)':>16} {'speedup':>10} {'match':>6}")
+    for n in args.sizes:
+        df = make_rows(n)
+
+        start = time.perf_counter()
+        deltas, _ = align_dimensions(df[['Length', 'Width', 'Height']].to_numpy(),
+                                     df[['Length Actual', 'Width Actual', 'Height Actual']].to_numpy())
+        deltas = deltas.round(2)
+        vector_time = time.perf_counter() - start
+
+        if args.skip_apply_above is not None and n > args.skip_apply_above:
+            print(f"{n:>10} {'-':>12} {vector_time:>16.4f} {'-':>10} {'-':>6}")
+            continue
+
+        start = time.perf_counter()
+        expected = df.apply(calculate_min_difference, axis=1).astype(float).to_numpy()
+        apply_time = time.perf_counter() - start
+
+        match = np.array_equal(expected, deltas)
+        print(f"{n:>10} {apply_time:>12.3f} {vector_time:>16.4f} {apply_time / vector_time:>9.0f}x {str(match):>6}")
+
+if __name__ == "__main__":
+    main()
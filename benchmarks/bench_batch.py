@@ -0,0 +1,43 @@
+import os
+import time
+import argparse
+import tempfile
+from common import repo_dir
+from synthlog import generate_log
+from batch import analyze_logs
+from pipeline import load_reference
+from settings import load_tolerances
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how batch throughput scales with the number of worker processes.")
+    parser.add_argument('--logs', type=int, default=8, help="Number of synthetic logs")
+    parser.add_argument('--rows', type=int, default=100_000, help="Rows per log")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--excel', action='store_true', help="Include the Excel export in the timing")
+    args = parser.parse_args()
+
+    model_file = os.path.join(repo_dir, 'model.joblib')
+    reference_file = os.path.join(repo_dir, 'Xactual.csv')
+    selected_boxes = list(load_reference(reference_file)['Box'].unique())
+    tolerances = load_tolerances()
+
+    with tempfile.TemporaryDirectory() as folder:
+        log_files = [os.path.join(folder, f"line{i}.log") for i in range(args.logs)]
+        for i, log_file in enumerate(log_files):
+            generate_log(log_file, args.rows, seed=i)
+
+        total_rows = args.logs * args.rows
+        print(f"{args.logs} logs x {args.rows} rows\n")
+        print(f"{'Workers':>8} {'Time (s)':>10} {'Rows/s':>12} {'Speedup':>8}")
+
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            analyze_logs(log_files, tolerances, selected_boxes, model_file, reference_file, folder, workers=workers, fmt='xlsx' if args.excel else None)
+            elapsed = time.perf_counter() - start
+
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>10.2f} {total_rows / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
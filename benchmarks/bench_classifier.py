@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+import pandas as pd
+from common import repo_dir
+from synthlog import make_rows
+from pipeline import load_model, load_reference
+from classifier import ReferenceClassifier
+
+def agreement(knn, reference):
+    """Compare both classifiers on data/Xtrain.csv."""
+    training = pd.read_csv(os.path.join(repo_dir, 'data', 'Xtrain.csv'))
+    X = training[['Length', 'Width', 'Height']]
+
+    knn_labels = knn.predict(X)
+    reference_labels = reference.predict(X)
+    known = training['Box'].isin(reference.classes_)
+
+    print(f"Agreement with KNN on Xtrain.csv:       {(knn_labels == reference_labels).mean() * 100:6.2f}% of {len(X)} rows")
+    print(f"  rows labelled with a box in Xactual: {(knn_labels == reference_labels)[known].mean() * 100:6.2f}% of {known.sum()} rows")
+    print(f"Accuracy against the Xtrain.csv labels: KNN {(knn_labels == training['Box']).mean() * 100:.2f}%, "
+          f"reference {(reference_labels == training['Box']).mean() * 100:.2f}% "
+          f"({(reference_labels == training['Box'])[known].mean() * 100:.2f}% on boxes in Xactual)")
+
+    # Show where the two disagree
+    disagreements = training.assign(KNN=knn_labels, Reference=reference_labels)[knn_labels != reference_labels]
+    if len(disagreements):
+        print("\nDisagreements (label, KNN, reference):")
+        print(disagreements.groupby(['Box', 'KNN', 'Reference']).size().rename('Rows').to_string())
+
+def sklearn_free():
+    """Check in a fresh interpreter that classifying with the reference index never imports scikit-learn."""
+    code = ("import sys; sys.path.insert(0, {!r}); import numpy as np; import pipeline; "
+            "pipeline.load_classifier('reference').predict(np.zeros((1, 3))); "
+            "print('sklearn' in sys.modules)").format(repo_dir)
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True).stdout.strip() == 'False'
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the KNN model with the nearest-reference classifier.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    knn = load_model()
+    reference = ReferenceClassifier(load_reference())
+    agreement(knn, reference)
+    print(f"\nReference classifier runs without importing scikit-learn: {sklearn_free()}\n")
+
+    # Synthetic rows are random rotations of the Xactual boxes, so the true box is known
+    print(f"{'Rows':>10} {'KNN (s)':>10} {'reference (s)':>14} {'speedup':>8} {'agree':>7} {'KNN correct':>12} {'ref correct':>12}")
+    for n in args.sizes:
+        rows = make_rows(n)
+        X = rows[['Length', 'Width', 'Height']]
+
+        start = time.perf_counter()
+        knn_labels = knn.predict(X)
+        knn_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference_labels = reference.predict(X)
+        reference_time = time.perf_counter() - start
+
+        agree = (knn_labels == reference_labels).mean() * 100
+        knn_correct = (knn_labels == rows['Box']).mean() * 100
+        reference_correct = (reference_labels == rows['Box']).mean() * 100
+        print(f"{n:>10} {knn_time:>10.3f} {reference_time:>14.4f} {knn_time / reference_time:>7.0f}x {agree:>6.2f}% "
+              f"{knn_correct:>11.2f}% {reference_correct:>11.2f}%")
+
+if __name__ == "__main__":
+    main()
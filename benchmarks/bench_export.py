@@ -0,0 +1,92 @@
+import os
+import importlib.util
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.styles import PatternFill, Font
+from synthlog import make_rows
+from alignment import align_dimensions
+from export import write_results, FORMATS, EXCEL_MAX_ROWS
+
+def legacy_write_excel(output_df, excel_file, tolerances):
+    """save_excel_file before the streaming export: write, reload, style every Δ cell, save again."""
+    with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+        output_df.to_excel(writer, index=False, sheet_name='Results')
+
+    wb = load_workbook(excel_file)
+    ws = wb.active
+
+    red_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+    red_font = Font(color="9C0006", bold=False)
+    green_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+    green_font = Font(color="006100", bold=False)
+
+    col_indices = {col: idx + 1 for idx, col in enumerate(output_df.columns) if col in ['ΔLength', 'ΔWidth', 'ΔHeight']}
+    for row_idx, row in enumerate(output_df.itertuples(), start=2):
+        for col, col_idx in col_indices.items():
+            value = getattr(row, col)
+            tolerance = tolerances[col.replace('Δ', '').lower()]
+            if abs(value) > tolerance:
+                ws.cell(row=row_idx, column=col_idx).fill = red_fill
+                ws.cell(row=row_idx, column=col_idx).font = red_font
+            else:
+                ws.cell(row=row_idx, column=col_idx).fill = green_fill
+                ws.cell(row=row_idx, column=col_idx).font = green_font
+
+    wb.save(excel_file)
+
+def make_output(n):
+    """Build an output DataFrame shaped like the one parse_log exports."""
+    rows = make_rows(n)
+    deltas, _ = align_dimensions(rows[['Length', 'Width', 'Height']].to_numpy(),
+                                 rows[['Length Actual', 'Width Actual', 'Height Actual']].to_numpy())
+    output_df = pd.DataFrame({'Index': np.arange(1, n + 1)})
+    output_df[['Length', 'Width', 'Height']] = rows[['Length', 'Width', 'Height']]
+    output_df['Box'] = rows['Box']
+    output_df[['ΔLength', 'ΔWidth', 'ΔHeight']] = deltas.round(2)
+    for col in ['State 1', 'State 2', 'State 3']:
+        output_df[col] = 1
+    return output_df
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the cell-by-cell Excel export with the streaming and columnar exports.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--skip-legacy-above', type=int, default=None, help="Skip the slow legacy export above this many rows")
+    args = parser.parse_args()
+
+    tolerances = {"length": 0.2, "width": 0.2, "height": 0.2}
+    formats = [fmt for fmt in FORMATS if fmt != 'parquet']
+    if importlib.util.find_spec('pyarrow'):
+        formats.append('parquet')
+    else:
+        print("pyarrow is not installed; skipping parquet\n")
+
+    print(f"{'Rows':>10} {'legacy xlsx (s)':>16} " + " ".join(f"{fmt + ' (s)':>12}" for fmt in formats))
+    with tempfile.TemporaryDirectory() as folder:
+        for n in args.sizes:
+            output_df = make_output(n)
+            fits = n + 1 <= EXCEL_MAX_ROWS
+
+            legacy = '-'
+            if fits and (args.skip_legacy_above is None or n <= args.skip_legacy_above):
+                legacy = f"{timed(legacy_write_excel, output_df, os.path.join(folder, 'legacy.xlsx'), tolerances):.2f}"
+
+            times = []
+            for fmt in formats:
+                if fmt == 'xlsx' and not fits:
+                    times.append('too big')
+                    continue
+                times.append(f"{timed(write_results, output_df, folder, 'results', tolerances, fmt):.2f}")
+
+            print(f"{n:>10} {legacy:>16} " + " ".join(f"{t:>12}" for t in times))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from common import repo_dir
+from synthlog import generate_log, log_name, add_generator_arguments, generator_settings
+from metrics import RunMetrics
+from pipeline import CLASSIFIERS, load_classifier, load_reference, analyze_log, output_folder, write_summary
+from export import write_results, FORMATS, EXCEL_MAX_ROWS
+from drift import DRIFT_FILE, write_drift
+from settings import load_tolerances
+
+# Kept with the cache and the log store rather than in the source tree, so runs never show up as changes
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".dim-testing", "benchmarks", "history.json")
+
+def git_revision():
+    """Return the current commit and whether tracked files have uncommitted changes."""
+    def git(*args):
+        return subprocess.run(['git', '-C', repo_dir, *args], capture_output=True, text=True).stdout.strip()
+    try:
+        return git('rev-parse', '--short', 'HEAD') or None, bool(git('status', '--porcelain', '--untracked-files=no'))
+    except OSError:
+        return None, False
+
+def run_once(log_file, folder, tolerances, selected_boxes, knn, box_df, args):
+    """Run parse_log's steps once over a log, timing every stage, and return the metrics."""
+    metrics = RunMetrics(log_file, track_memory=not args.no_memory)
+    output_path, file_name = output_folder(log_file, folder)
+    results_file = os.path.join(output_path, f"{file_name}.csv") if args.chunked else None
+
+    result = analyze_log(log_file, tolerances, selected_boxes, knn, box_df, chunked=args.chunked, results_file=results_file,
+                         metrics=metrics, store=args.store)
+
+    with metrics.stage('write_summary', rows_in=result.total_rows):
+        write_summary(result, os.path.join(output_path, 'summary.txt'))
+        write_drift(result.summary.drift, os.path.join(output_path, DRIFT_FILE))
+
+    # Like the GUI, the in-memory results go to the export; chunked results are already in their CSV
+    fmt = args.format
+    if fmt == 'xlsx' and result.results is not None and len(result.results) > EXCEL_MAX_ROWS - 1:
+        fmt = 'parquet'
+    if fmt != 'none' and result.results is not None:
+        with metrics.stage(f'export_{fmt}', rows_in=len(result.results)):
+            write_results(result.results, output_path, file_name, tolerances, fmt, result.summary.drift.table())
+
+    metrics.stop()
+    return metrics
+
+def measure(rows, folder, tolerances, selected_boxes, knn, box_df, args):
+    """Generate (or reuse) a log of the given size and return its best run over args.repeat runs."""
+    settings = generator_settings(args)
+    log_file = os.path.join(args.data_dir or folder, log_name(rows, **settings))
+    if not os.path.exists(log_file):
+        generate_log(log_file, rows, **settings)
+    if args.store is not None:
+        args.store.import_log(log_file)
+
+    runs = [run_once(log_file, folder, tolerances, selected_boxes, knn, box_df, args) for _ in range(args.repeat)]
+    best = min(runs, key=lambda metrics: metrics.total_seconds)
+    peaks = [stage.peak_bytes for stage in best.stages.values() if stage.peak_bytes is not None]
+    return {
+        'rows': rows,
+        'log_mb': round(os.path.getsize(log_file) / 1024 ** 2, 3),
+        'total_seconds': round(best.total_seconds, 6),
+        'rows_per_second': round(rows / best.total_seconds, 1),
+        'runs_seconds': [round(metrics.total_seconds, 6) for metrics in runs],
+        'peak_rss_mb': round(max(peaks) / 1024 ** 2, 3) if peaks else None,
+        'stages': {name: round(stage.seconds, 6) for name, stage in best.stages.items()}
+    }
+
+def load_history(history_file):
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file, 'r') as f:
+        return json.load(f)
+
+def save_history(history, history_file):
+    os.makedirs(os.path.dirname(os.path.abspath(history_file)), exist_ok=True)
+    temp_file = history_file + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(history, f, indent=4)
+    os.replace(temp_file, history_file)
+
+def previous_record(history, record):
+    """Return the latest earlier record with the same settings on the same host, or None."""
+    for earlier in reversed(history):
+        if earlier['config'] == record['config'] and earlier['host'] == record['host']:
+            return earlier
+    return None
+
+def print_results(record):
+    for result in record['results']:
+        print(f"\n{result['rows']:,} rows ({result['log_mb']:.1f} MB): {result['total_seconds']:.3f} s, "
+              f"{result['rows_per_second']:,.0f} rows/s" + (f", peak RSS {result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] else ""))
+        for name, seconds in result['stages'].items():
+            print(f"  {name:<16} {seconds:>10.4f} s {seconds / result['total_seconds'] * 100:>6.1f}%")
+
+def compare(previous, record, threshold):
+    """Print the change of every stage against an earlier record and return the stages that got slower than threshold."""
+    print(f"\nCompared with {previous['commit'] or 'unknown commit'}{' (dirty)' if previous['dirty'] else ''} from {previous['started']}:")
+    print(f"{'Rows':>10} {'Stage':<16} {'Before (s)':>11} {'Now (s)':>10} {'Change':>8}")
+
+    regressions = []
+    before_results = {result['rows']: result for result in previous['results']}
+    for result in record['results']:
+        before = before_results.get(result['rows'])
+        if before is None:
+            continue
+        stages = [(name, before['stages'].get(name), seconds) for name, seconds in result['stages'].items()]
+        stages.append(('total', before['total_seconds'], result['total_seconds']))
+        for name, old, new in stages:
+            if not old:
+                continue
+            change = new / old - 1
+            # Ignore stages too short to time reliably
+            slower = change > threshold and new - old > 0.005
+            if slower:
+                regressions.append((result['rows'], name, change))
+            print(f"{result['rows']:>10} {name:<16} {old:>11.4f} {new:>10.4f} {change * 100:>+7.1f}%{'  slower' if slower else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of parse_log end to end on synthetic logs of several sizes "
+                                                 "and keep the results in a JSON history to compare commits.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help="Log sizes in rows")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the fastest is kept (default: %(default)s)")
+    parser.add_argument('--classifier', choices=CLASSIFIERS, default='knn')
+    parser.add_argument('--chunked', action='store_true', help="Use the chunked mode (results streamed to CSV)")
+    parser.add_argument('--format', choices=FORMATS + ['none'], default='xlsx', help="Results export to time (default: %(default)s)")
+    parser.add_argument('--log-store', action='store_true', help="Read the logs from a columnar log store (imported before timing)")
+    parser.add_argument('--no-memory', action='store_true', help="Do not sample the peak memory")
+    parser.add_argument('--data-dir', help="Folder to keep the generated logs in, so later runs reuse them")
+    parser.add_argument('--history', default=HISTORY_FILE, help="JSON history file (default: %(default)s)")
+    parser.add_argument('--no-history', action='store_true', help="Do not add this run to the history")
+    parser.add_argument('--label', help="Note stored with the run")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Slowdown reported as a regression (default: %(default)s)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 if a stage got slower than the threshold")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    tolerances = load_tolerances()
+    box_df = load_reference()
+    selected_boxes = list(box_df['Box'].unique())
+    start = time.perf_counter()
+    knn = load_classifier(args.classifier, box_df=box_df)
+    load_seconds = time.perf_counter() - start
+
+    commit, dirty = git_revision()
+    record = {
+        'commit': commit,
+        'dirty': dirty,
+        'label': args.label,
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'python': sys.version.split()[0],
+        'config': {'classifier': args.classifier, 'chunked': args.chunked, 'format': args.format, 'log_store': args.log_store,
+                   'repeat': args.repeat, **generator_settings(args)},
+        'load_classifier_seconds': round(load_seconds, 6),
+        'results': []
+    }
+
+    with tempfile.TemporaryDirectory() as folder:
+        args.store = None
+        if args.log_store:
+            from logstore import LogStore
+            args.store = LogStore(os.path.join(folder, 'store'))
+        if args.data_dir:
+            os.makedirs(args.data_dir, exist_ok=True)
+
+        for rows in args.sizes:
+            record['results'].append(measure(rows, folder, tolerances, selected_boxes, knn, box_df, args))
+
+    print(f"Commit {commit or 'unknown'}{' (dirty)' if dirty else ''}, {args.classifier} classifier loaded in {load_seconds:.3f} s")
+    print_results(record)
+
+    history = load_history(args.history)
+    previous = previous_record(history, record)
+    regressions = compare(previous, record, args.threshold) if previous else []
+
+    if not args.no_history:
+        history.append(record)
+        save_history(history, args.history)
+        print(f"\nAdded to {args.history}")
+
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
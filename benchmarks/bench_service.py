@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.request
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from common import repo_dir
+from synthlog import generate_log
+
+def request(url, data=None, content_type=None, timeout=600):
+    """Send one request and return (status, body)."""
+    req = urllib.request.Request(url, data=data, method='POST' if data is not None else 'GET')
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_service(port, output, data_root, args):
+    """Start service.py in a subprocess and wait until it answers /health."""
+    command = [sys.executable, os.path.join(repo_dir, 'service.py'), '--port', str(port), '--output', output, '--data-root', data_root,
+               '--workers', str(args.workers), '--classifier', args.classifier, '--format', args.format,
+               '--max-queue', str(max(max(args.concurrency) * 2, 64)), '--keep-jobs', '20']
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if request(url + '/health', timeout=2)[0] == 200:
+                return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("The service did not start")
+
+def one_job(url, log_file, mode):
+    """Submit one job and wait for it to finish; return (latency, whether it succeeded, server-side run seconds)."""
+    start = time.perf_counter()
+    if mode == 'upload':
+        with open(log_file, 'rb') as f:
+            data = f.read()
+        status, body = request(f"{url}/jobs?wait=1&name={os.path.basename(log_file)}", data, 'text/plain')
+    else:
+        status, body = request(f"{url}/jobs?wait=1", json.dumps({'path': log_file}).encode(), 'application/json')
+    latency = time.perf_counter() - start
+    job = json.loads(body) if status == 200 else {}
+    ok = status == 200 and job.get('state') == 'done'
+    return latency, ok, job.get('run_seconds')
+
+def one_health(url, log_file, mode):
+    start = time.perf_counter()
+    status, _ = request(url + '/health')
+    return time.perf_counter() - start, status == 200, None
+
+def load_test(url, target, log_file, mode, requests, concurrency):
+    """Send requests from concurrency clients at once; return the latencies, failures and wall time."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        outcomes = list(clients.map(lambda _: target(url, log_file, mode), range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([latency for latency, _, _ in outcomes])
+    failures = sum(not ok for _, ok, _ in outcomes)
+    run_seconds = [seconds for _, ok, seconds in outcomes if ok and seconds is not None]
+    return latencies, failures, elapsed, run_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the HTTP analysis service on localhost: requests per second and latency percentiles.")
+    parser.add_argument('--url', help="Service to test (default: start service.py on a free local port)")
+    parser.add_argument('--rows', type=int, default=20_000, help="Rows in the synthetic log (default: %(default)s)")
+    parser.add_argument('--requests', type=int, default=40, help="Jobs per concurrency level (default: %(default)s)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8], help="Simultaneous clients")
+    parser.add_argument('--mode', choices=['path', 'upload'], default='path', help="Send the log path, or upload the log with each job")
+    parser.add_argument('--workers', type=int, default=2, help="Service workers when the service is started here")
+    parser.add_argument('--classifier', choices=['knn', 'reference'], default='knn')
+    parser.add_argument('--format', default='none', help="Export format of each job (default: %(default)s)")
+    parser.add_argument('--health-requests', type=int, default=500, help="/health requests to measure the HTTP overhead (0 to skip)")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        log_file = os.path.join(folder, 'station.log')
+        generate_log(log_file, args.rows)
+
+        process = None
+        url = args.url
+        if url is None:
+            process, url = start_service(free_port(), os.path.join(folder, 'service'), folder, args)
+        try:
+            results = []
+            print(f"{args.rows:,}-row log sent by {args.mode}, service at {url}\n")
+            print(f"{'Test':<8} {'Clients':>8} {'Requests':>9} {'Failed':>7} {'Req/s':>9} {'p50 (s)':>9} {'p90 (s)':>9} "
+                  f"{'p99 (s)':>9} {'Max (s)':>9} {'Run (s)':>8}")
+
+            tests = ([('health', one_health, args.health_requests, concurrency) for concurrency in args.concurrency]
+                     if args.health_requests else [])
+            tests += [('job', one_job, args.requests, concurrency) for concurrency in args.concurrency]
+            for name, target, requests, concurrency in tests:
+                latencies, failures, elapsed, run_seconds = load_test(url, target, log_file, args.mode, requests, concurrency)
+                p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+                run = np.mean(run_seconds) if run_seconds else float('nan')
+                print(f"{name:<8} {concurrency:>8} {requests:>9} {failures:>7} {requests / elapsed:>9.2f} {p50:>9.4f} {p90:>9.4f} "
+                      f"{p99:>9.4f} {latencies.max():>9.4f} {run:>8.3f}")
+                results.append({'test': name, 'clients': concurrency, 'requests': requests, 'failed': failures,
+                                'requests_per_second': requests / elapsed, 'p50': p50, 'p90': p90, 'p99': p99,
+                                'max': float(latencies.max()), 'mean_run_seconds': run if run_seconds else None})
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'url': args.url, 'rows': args.rows, 'mode': args.mode, 'workers': args.workers, 'results': results}, f, indent=4, default=float)
+
+if __name__ == "__main__":
+    main()
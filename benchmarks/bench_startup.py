@@ -0,0 +1,57 @@
+import sys
+import argparse
+import statistics
+import subprocess
+from common import repo_dir
+
+# Each case runs in a fresh interpreter, so nothing is already imported or cached in memory
+SETUP = "import sys, time; sys.path.insert(0, {repo!r}); start = time.perf_counter()\n"
+
+CASES = {
+    # What the GUI did before showing its window: import everything, then read the reference table with pandas
+    'legacy startup': (
+        "import joblib, pandas as pd, tkinter\n"
+        "from openpyxl import load_workbook\n"
+        "pd.read_csv({repo!r} + '/Xactual.csv')['Box'].unique()\n"
+    ),
+    # What the GUI does now before showing its window
+    'window ready': (
+        "import importlib.util\n"
+        "spec = importlib.util.spec_from_file_location('dim_testing', {repo!r} + '/dim-testing.py')\n"
+        "gui = importlib.util.module_from_spec(spec); spec.loader.exec_module(gui)\n"
+        "gui.load_values(); gui.load_box_labels(); gui.load_selected_boxes()\n"
+    ),
+    # The background warm-up: analysis modules, reference table and model
+    'warm-up (background)': (
+        "import importlib.util\n"
+        "spec = importlib.util.spec_from_file_location('dim_testing', {repo!r} + '/dim-testing.py')\n"
+        "gui = importlib.util.module_from_spec(spec); spec.loader.exec_module(gui)\n"
+        "start = time.perf_counter(); gui.load_analysis()\n"
+    ),
+    # A later run reuses the model that is already loaded
+    'model on next run': (
+        "import importlib.util\n"
+        "spec = importlib.util.spec_from_file_location('dim_testing', {repo!r} + '/dim-testing.py')\n"
+        "gui = importlib.util.module_from_spec(spec); spec.loader.exec_module(gui)\n"
+        "gui.load_analysis(); start = time.perf_counter(); gui.load_analysis()\n"
+    ),
+}
+
+def time_case(code):
+    """Run one case in a new interpreter and return the seconds it reported."""
+    script = SETUP.format(repo=repo_dir) + code.format(repo=repo_dir) + "print(time.perf_counter() - start)\n"
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the GUI startup path in fresh interpreters.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per case (the median and best are reported)")
+    args = parser.parse_args()
+
+    print(f"{'Case':<22} {'Median (s)':>11} {'Best (s)':>10}")
+    for name, code in CASES.items():
+        times = [time_case(code) for _ in range(args.repeat)]
+        print(f"{name:<22} {statistics.median(times):>11.3f} {min(times):>10.3f}")
+
+if __name__ == "__main__":
+    main()
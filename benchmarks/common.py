@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Make the top-level modules importable when run from the benchmarks folder
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repo_dir not in sys.path:
+    sys.path.insert(0, repo_dir)
@@ -0,0 +1,136 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from common import repo_dir
+
+DIMENSIONS = ['Length', 'Width', 'Height']
+
+# Column layouts seen in dimensioner logs; None marks where the measurement columns go
+SCHEMAS = {
+    # DIM State 3 marks a populated row
+    'dim-state': ['Index', None, 'DIM State 1', 'DIM State 2', 'DIM State 3'],
+    # Newer firmware adds Status 3, which takes precedence over DIM State 3
+    'status': ['Index', None, 'DIM State 1', 'DIM State 2', 'Status 3', 'DIM State 3'],
+    # No state columns at all, every row is analysed
+    'no-status': ['Index', None],
+    # Columns the analysis never reads, around the ones it does
+    'extra': ['Index', 'Timestamp', None, 'Weight', 'DIM State 1', 'DIM State 2', 'DIM State 3', 'Barcode'],
+}
+
+# Rows generated and written at a time, so logs of any size fit in memory
+GENERATE_CHUNKSIZE = 250_000
+
+def load_boxes(reference_file=os.path.join(repo_dir, 'Xactual.csv')):
+    """Return the box labels and actual dimensions of the reference table."""
+    box_df = pd.read_csv(reference_file)
+    return box_df['Box'].to_numpy(), box_df[DIMENSIONS].to_numpy(dtype=float)
+
+def measure_boxes(rng, n, actual, noise, rotate):
+    """Pick n random reference boxes and measure them with normal noise, a share rotate in a random orientation.
+
+    Returns the picked box of every row and the measured dimensions.
+    """
+    boxes = rng.integers(len(actual), size=n)
+    rotated = rng.random(n) < rotate
+    order = np.tile([0, 1, 2], (n, 1))
+    order[rotated] = rng.permuted(order[rotated], axis=1)
+    measured = np.take_along_axis(actual[boxes], order, axis=1)
+    return boxes, measured + rng.normal(0, noise, size=(n, 3))
+
+def make_rows(n, noise=0.15, rotate=1.0, seed=0, reference_file=os.path.join(repo_dir, 'Xactual.csv')):
+    """Build n measured rows of reference boxes (in a random orientation by default) next to their actual
+    dimensions and box label, for benchmarking the steps after the log is read."""
+    rng = np.random.default_rng(seed)
+    labels, actual = load_boxes(reference_file)
+    boxes, measured = measure_boxes(rng, n, actual, noise, rotate)
+    measured = measured.round(1)
+    return pd.DataFrame({
+        'Length': measured[:, 0], 'Width': measured[:, 1], 'Height': measured[:, 2],
+        'Length Actual': actual[boxes, 0], 'Width Actual': actual[boxes, 1], 'Height Actual': actual[boxes, 2],
+        'Box': labels[boxes],
+    })
+
+def generate_rows(rng, start, n, labels, actual, noise=0.07, rotate=0.1, zero_rate=0.1, outlier_rate=0.01, drift=0.0):
+    """Generate n log rows starting at Index start.
+
+    Every row measures a random reference box with normal noise (sigma noise); rotate is the share of rows whose
+    dimensions come out in a random order (the rest keep the Xactual.csv order), zero_rate the share of unpopulated rows (state 0, dimensions 0),
+    outlier_rate the share with a gross error on one axis, and drift a bias added per 1000 rows.
+    """
+    index = np.arange(start, start + n)
+    _, measured = measure_boxes(rng, n, actual, noise, rotate)
+    measured = measured + (drift * index / 1000)[:, None]
+
+    outliers = np.flatnonzero(rng.random(n) < outlier_rate)
+    measured[outliers, rng.integers(3, size=len(outliers))] += rng.choice([-1, 1], len(outliers)) * rng.uniform(0.5, 2.0, len(outliers))
+
+    states = (rng.random(n) >= zero_rate).astype(int)
+    measured[states == 0] = 0
+    return index, np.maximum(measured, 0), states
+
+def frame(schema, index, measured, states, rng):
+    """Lay generated rows out in the columns of a schema."""
+    data = {}
+    for col in SCHEMAS[schema]:
+        if col is None:
+            for i, dimension in enumerate(DIMENSIONS):
+                data[dimension] = measured[:, i]
+        elif col == 'Index':
+            data[col] = index
+        elif col == 'Timestamp':
+            data[col] = pd.Timestamp('2024-01-01') + pd.to_timedelta(index * 2, unit='s')
+        elif col == 'Weight':
+            data[col] = rng.uniform(0.1, 20, len(index)).round(2)
+        elif col == 'Barcode':
+            data[col] = np.char.add('PKG', index.astype(str))
+        else:
+            data[col] = states
+    return pd.DataFrame(data)
+
+def generate_log(log_file, rows, noise=0.07, rotate=0.1, zero_rate=0.1, outlier_rate=0.01, drift=0.0, schema='dim-state', seed=0,
+                 reference_file=os.path.join(repo_dir, 'Xactual.csv')):
+    """Write a ';'-separated synthetic dimensioner log with the given number of rows and return its size in bytes."""
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema '{schema}', expected one of {list(SCHEMAS)}")
+    rng = np.random.default_rng(seed)
+    labels, actual = load_boxes(reference_file)
+
+    with open(log_file, 'w', newline='') as f:
+        for start in range(0, max(rows, 1), GENERATE_CHUNKSIZE):
+            n = min(GENERATE_CHUNKSIZE, rows - start)
+            index, measured, states = generate_rows(rng, start + 1, n, labels, actual, noise, rotate, zero_rate, outlier_rate, drift)
+            frame(schema, index, measured, states, rng).to_csv(f, sep=';', index=False, header=start == 0)
+    return os.path.getsize(log_file)
+
+def log_name(rows, noise=0.07, rotate=0.1, zero_rate=0.1, outlier_rate=0.01, drift=0.0, schema='dim-state', seed=0):
+    """File name describing every generator setting, so a generated log can be reused."""
+    return f"synth-{rows}-{schema}-n{noise:g}-r{rotate:g}-z{zero_rate:g}-o{outlier_rate:g}-d{drift:g}-s{seed}.log"
+
+def add_generator_arguments(parser):
+    """Add the generator settings to an argument parser."""
+    parser.add_argument('--noise', type=float, default=0.07, help="Standard deviation of the measurement noise (default: %(default)s)")
+    parser.add_argument('--rotate', type=float, default=0.1, help="Share of rows measured in a random orientation (default: %(default)s)")
+    parser.add_argument('--zero-rate', type=float, default=0.1, help="Share of unpopulated rows (default: %(default)s)")
+    parser.add_argument('--outlier-rate', type=float, default=0.01, help="Share of rows with a gross error on one axis (default: %(default)s)")
+    parser.add_argument('--drift', type=float, default=0.0, help="Bias added per 1000 rows (default: %(default)s)")
+    parser.add_argument('--schema', choices=list(SCHEMAS), default='dim-state', help="Column layout (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+
+def generator_settings(args):
+    """Return the generator settings of parsed arguments as keyword arguments."""
+    return {'noise': args.noise, 'rotate': args.rotate, 'zero_rate': args.zero_rate, 'outlier_rate': args.outlier_rate,
+            'drift': args.drift, 'schema': args.schema, 'seed': args.seed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic ';'-separated dimensioner log from the boxes in Xactual.csv.")
+    parser.add_argument('log_file')
+    parser.add_argument('--rows', type=int, default=100_000, help="Number of rows (default: %(default)s)")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    size = generate_log(args.log_file, args.rows, **generator_settings(args))
+    print(f"Wrote {args.rows:,} rows ({size / 1024 ** 2:.1f} MB) to {args.log_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['Length', 'Width', 'Height']
+
+class BoxReference:
+    """The box reference table (Xactual.csv) in the form the pipeline looks boxes up in.
+
+    Each box gets an integer code (its row), and the actual dimensions are kept as one contiguous (boxes, 3) array,
+    plus a copy sorted largest first for rotation-invariant matching. A measurement carries the code of its box,
+    so its actual dimensions are an array lookup instead of a DataFrame merge on the label.
+    """
+
+    def __init__(self, box_df):
+        box_df = box_df.drop_duplicates('Box')  # a label maps to one box, the first in the table
+        self.labels = box_df['Box'].to_numpy(dtype=object)
+        self.dims = np.ascontiguousarray(box_df[DIMENSIONS].to_numpy(dtype=np.float64))
+        self.sorted_dims = np.ascontiguousarray(-np.sort(-self.dims, axis=1))
+        self._index = pd.Index(self.labels)
+
+        # One extra row for code -1 (a box not in the table), whose dimensions are unknown
+        self._actual = np.vstack([self.dims, np.full((1, 3), np.nan)])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def codes(self, labels):
+        """Return the code of every label, or -1 for a label not in the table."""
+        return self._index.get_indexer(labels)
+
+    def selection(self, selected_boxes):
+        """Return a mask indexed by code that is True for the selected boxes (and False for code -1)."""
+        return np.append(np.isin(self.labels, list(selected_boxes)), False)
+
+    def actual(self, codes):
+        """Return the (N,3) actual dimensions of the boxes with the given codes (NaN for code -1)."""
+        return self._actual[np.asarray(codes, dtype=np.intp)]
@@ -0,0 +1,180 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import pipeline
+from metrics import NO_METRICS
+from settings import DATA_DIR
+
+# Bump when the cached stage changes shape or meaning, so old entries are never reused
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(DATA_DIR, "cache")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+def file_digest(file_path, block_size=1024 * 1024):
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fingerprint(obj):
+    """Return a SHA-256 fingerprint of a model or reference table."""
+    if isinstance(obj, pd.DataFrame):
+        data = obj.to_csv(index=False).encode('utf-8')
+    else:
+        data = pickle.dumps(obj, protocol=4)
+    return hashlib.sha256(data).hexdigest()
+
+def _to_arrays(df):
+    """Split a DataFrame into plain NumPy arrays: strings become codes + labels, nullable ints values + mask."""
+    arrays = {}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if series.dtype == object:
+            codes, labels = pd.factorize(series)
+            arrays[f'{i}.codes'] = codes.astype(np.int16 if len(labels) < 2 ** 15 else np.int32)
+            arrays[f'{i}.labels'] = np.array(labels, dtype=str)
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            arrays[f'{i}.values'] = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            arrays[f'{i}.mask'] = series.isna().to_numpy()
+        else:
+            arrays[f'{i}.values'] = series.to_numpy()
+    return arrays
+
+def _from_arrays(columns, arrays):
+    """Rebuild the DataFrame saved by _to_arrays."""
+    data = {}
+    for i, col in enumerate(columns):
+        if f'{i}.codes' in arrays:
+            data[col] = arrays[f'{i}.labels'].astype(object)[arrays[f'{i}.codes']]
+        elif f'{i}.mask' in arrays:
+            data[col] = pd.arrays.IntegerArray(arrays[f'{i}.values'], arrays[f'{i}.mask'])
+        else:
+            data[col] = arrays[f'{i}.values']
+    return pd.DataFrame(data, columns=columns)
+
+class ResultCache:
+    """On-disk cache of the parsed, status-filtered, classified and aligned rows of each log.
+
+    Entries are keyed on the log's content hash plus fingerprints of the model and the reference table,
+    so changing the tolerances or the box selection reuses them. Each entry is one uncompressed .npz of
+    columnar arrays; the least recently used entries are removed once the folder grows past max_bytes.
+    """
+
+    def __init__(self, folder=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hashes_file = os.path.join(folder, 'hashes.json')
+        self.fingerprints = {}
+        os.makedirs(folder, exist_ok=True)
+
+    def log_digest(self, log_file):
+        """Return the content hash of a log, reusing the stored one while its size and mtime are unchanged."""
+        stat = os.stat(log_file)
+        path = os.path.abspath(log_file)
+        hashes = {}
+        if os.path.exists(self.hashes_file):
+            try:
+                with open(self.hashes_file, 'r') as f:
+                    hashes = json.load(f)
+            except (OSError, ValueError):
+                hashes = {}
+
+        known = hashes.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+
+        digest = file_digest(log_file)
+        hashes[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        self._write_json(self.hashes_file, hashes)
+        return digest
+
+    def key(self, log_file, knn, box_df):
+        """Return the cache key for a log analysed with this model and reference table."""
+        # Fingerprinting the model pickles it, so remember it per object for the life of the cache
+        if id(knn) not in self.fingerprints:
+            self.fingerprints[id(knn)] = (knn, fingerprint(knn))
+        parts = [str(CACHE_VERSION), self.log_digest(log_file), self.fingerprints[id(knn)][1], fingerprint(box_df)]
+        return hashlib.sha256(':'.join(parts).encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.folder, f'{key}.npz')
+
+    def get(self, key):
+        """Return (aligned rows, has_status) for a key, or None if it is not cached."""
+        entry = self.entry_path(key)
+        try:
+            with np.load(entry, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Mark the entry as recently used
+        os.utime(entry)
+
+        meta = json.loads(str(arrays.pop('__meta__')))
+        return _from_arrays(meta['columns'], arrays), meta['has_status']
+
+    def put(self, key, merged_df, has_status):
+        """Store the aligned rows for a key, then evict old entries if the cache is over its size limit."""
+        arrays = _to_arrays(merged_df)
+        arrays['__meta__'] = np.array(json.dumps({'columns': list(merged_df.columns), 'has_status': has_status}))
+
+        # Write to a temporary file first so a crash never leaves a half-written entry behind;
+        # the name is private to this process and thread, so concurrent runs never write the same file
+        entry = self.entry_path(key)
+        temp_file = os.path.join(self.folder, f'{key}.tmp-{os.getpid()}-{threading.get_ident()}.npz')
+        np.savez(temp_file, **arrays)
+        os.replace(temp_file, entry)
+
+        self.evict()
+
+    def prepare_log(self, log_file, knn, box_df, metrics=NO_METRICS, store=None):
+        """pipeline.prepare_log, served from the cache when the same log was prepared with the same model before."""
+        with metrics.stage('cache_lookup') as stage:
+            key = self.key(log_file, knn, box_df)
+            cached = self.get(key)
+            stage.rows_out = None if cached is None else len(cached[0])
+        if cached is not None:
+            return cached
+
+        merged_df, has_status = pipeline.prepare_log(log_file, knn, box_df, metrics, store)
+        with metrics.stage('cache_store', rows_in=len(merged_df)):
+            self.put(key, merged_df, has_status)
+        return merged_df, has_status
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.folder):
+            if name.endswith('.npz') and '.tmp' not in name:
+                stat = os.stat(os.path.join(self.folder, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.folder, name))
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every cached entry."""
+        for name in os.listdir(self.folder):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(self.folder, name))
+
+    def _write_json(self, file_path, data):
+        temp_file = f'{file_path}.tmp-{os.getpid()}-{threading.get_ident()}'
+        with open(temp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_file, file_path)
@@ -0,0 +1,69 @@
+import numpy as np
+from boxes import BoxReference
+
+# Rows classified per block, to keep the (rows x boxes) distance matrix small
+BLOCK_SIZE = 65_536
+
+# Label of a measurement too far from every box; not in the reference table, so the pipeline drops it
+UNKNOWN_LABEL = 'unknown'
+
+class ReferenceClassifier:
+    """Nearest-box classifier built straight from the actual box dimensions (Xactual.csv).
+
+    Each box is stored once with its dimensions sorted largest first, so a measurement matches its box
+    in any orientation. predict() works on whole arrays like KNeighborsClassifier.predict, without scikit-learn.
+
+    A measurement only takes its nearest box if every axis is within max(absolute_cutoff, relative_cutoff * the
+    box's dimension) of it; otherwise it is unknown (code -1), the way the KNN labels boxes that are not in the
+    table (e.g. 10x10x8 next to 10x10x10). Pass relative_cutoff=None to always take the nearest box.
+    """
+
+    def __init__(self, box_df, empty_label='0x0x0', relative_cutoff=0.15, absolute_cutoff=0.5):
+        reference = box_df if isinstance(box_df, BoxReference) else BoxReference(box_df)
+        labels = list(reference.labels)
+        dims = reference.sorted_dims
+
+        # Unpopulated measurements (0x0x0) get their own class, as they do in the KNN training data
+        if empty_label is not None and empty_label not in labels:
+            labels.append(empty_label)
+            dims = np.vstack([dims, np.zeros((1, 3))])
+
+        self.classes_ = np.array(labels, dtype=object)
+        self.index = dims  # rotation-invariant: sorted largest first
+
+        # Largest deviation allowed on each axis of each box
+        if relative_cutoff is None:
+            self.cutoff = None
+        else:
+            self.cutoff = np.maximum(dims * relative_cutoff, absolute_cutoff)
+
+        # Label of every code, with code -1 (the last entry) unknown
+        self._labels = np.append(self.classes_, UNKNOWN_LABEL)
+
+    def predict_codes(self, X):
+        """Return the row in classes_ of the nearest box for every (N,3) measurement, or -1 if it matches none."""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, 3)
+        codes = np.empty(len(X), dtype=np.intp)
+
+        for start in range(0, len(X), BLOCK_SIZE):
+            block = -np.sort(-X[start:start + BLOCK_SIZE], axis=1)
+
+            # Squared distance to every box in sorted-dimension space: shape (rows, boxes)
+            distances = ((block[:, None, :] - self.index[None, :, :]) ** 2).sum(axis=2)
+            nearest = np.argmin(distances, axis=1)
+
+            # Too far from its nearest box on any axis: not a box in the table
+            if self.cutoff is not None:
+                outside = (np.abs(block - self.index[nearest]) > self.cutoff[nearest]).any(axis=1)
+                nearest[outside] = -1
+            codes[start:start + BLOCK_SIZE] = nearest
+
+        return codes
+
+    def labels(self, codes):
+        """Return the label of every code from predict_codes (UNKNOWN_LABEL for -1)."""
+        return self._labels[codes]
+
+    def predict(self, X):
+        """Return the nearest box label for every (N,3) measurement, or UNKNOWN_LABEL if it matches none."""
+        return self.labels(self.predict_codes(X))
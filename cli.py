@@ -0,0 +1,109 @@
+import os
+import sys
+import glob
+import argparse
+import multiprocessing
+from batch import analyze_logs, write_fleet_summary, output_names
+from cache import DEFAULT_CACHE_DIR
+from export import FORMATS
+from logstore import DEFAULT_STORE_DIR
+from pipeline import load_reference, CLASSIFIERS, DEFAULT_CHUNKSIZE
+from settings import load_tolerances, load_selected_boxes, resource_path
+from sweep import DEFAULT_GRID, tolerance_grids
+
+def find_logs(patterns):
+    """Expand the file names and glob patterns into a sorted list of unique log files."""
+    log_files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches and os.path.isfile(pattern):
+            matches = [pattern]
+        log_files.update(os.path.abspath(match) for match in matches if os.path.isfile(match))
+    return sorted(log_files)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Check dimensioner logs against the actual box sizes without the GUI.")
+    parser.add_argument('logs', nargs='+', help="Log files or glob patterns (e.g. \"D:/logs/**/*.log\")")
+    parser.add_argument('--length', type=float, help="Length tolerance (default: last used value in tolerances.json)")
+    parser.add_argument('--width', type=float, help="Width tolerance (default: last used value in tolerances.json)")
+    parser.add_argument('--height', type=float, help="Height tolerance (default: last used value in tolerances.json)")
+    parser.add_argument('--boxes', nargs='+', help="Boxes that were ran (default: last selection in the GUI, or every box)")
+    parser.add_argument('--classifier', choices=CLASSIFIERS, default='knn', help="Trained KNN model, or the nearest box in the reference table (no scikit-learn)")
+    parser.add_argument('--model', help="KNN model file to use with --classifier knn (default: the active model in the registry, or model.joblib)")
+    parser.add_argument('--model-version', help="Registered model version to use instead of the active one (see train.py --list)")
+    parser.add_argument('--reference', default=resource_path('Xactual.csv'), help="CSV of the actual box dimensions")
+    parser.add_argument('--output', default=os.path.join(os.path.expanduser("~"), "Downloads"), help="Folder to write output/<log name>/ into")
+    parser.add_argument('--chunked', action='store_true', help="Process the logs in chunks (bounded memory, CSV results instead of Excel)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk in chunked mode")
+    parser.add_argument('--format', choices=FORMATS, default='xlsx', help="Export format for the results (csv/parquet come with a JSON sidecar, for runs too big for Excel)")
+    parser.add_argument('--no-excel', action='store_true', help="Only write summary.txt")
+    parser.add_argument('--cache', action='store_true', help="Reuse parsed and aligned logs from the result cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Folder of the result cache (default: %(default)s)")
+    parser.add_argument('--log-store', action='store_true', help="Read the logs from their columnar copies, importing them on first use")
+    parser.add_argument('--log-store-dir', default=DEFAULT_STORE_DIR, help="Folder of the log store (default: %(default)s)")
+    parser.add_argument('--metrics', action='store_true', help="Print the time, rows and peak memory of each stage (always saved to run_metrics.json)")
+    parser.add_argument('--no-memory', action='store_true', help="Do not sample the peak memory of each stage")
+    parser.add_argument('--sweep', nargs='?', const=DEFAULT_GRID, metavar='GRID',
+                        help=f"Also count pass/fail at every tolerance of a grid, \"start:stop:step\" or \"0.1,0.2,0.5\" (default: {DEFAULT_GRID})")
+    parser.add_argument('--sweep-length', metavar='GRID', help="Length grid of the sweep (default: the --sweep grid)")
+    parser.add_argument('--sweep-width', metavar='GRID', help="Width grid of the sweep (default: the --sweep grid)")
+    parser.add_argument('--sweep-height', metavar='GRID', help="Height grid of the sweep (default: the --sweep grid)")
+    parser.add_argument('--workers', type=int, default=1, help="Number of logs processed in parallel (0 = one per CPU core)")
+    return parser
+
+def run(args):
+    """Analyse every log matched by args and return the number of logs that could not be processed."""
+    log_files = find_logs(args.logs)
+    if not log_files:
+        print("No log files matched.")
+        return 1
+
+    # Fill in any tolerance not given on the command line with the last used value
+    tolerances = load_tolerances()
+    for axis in ['length', 'width', 'height']:
+        if getattr(args, axis) is not None:
+            tolerances[axis] = getattr(args, axis)
+
+    box_df = load_reference(args.reference)
+    selected_boxes = args.boxes or load_selected_boxes() or list(box_df['Box'].unique())
+
+    sweep_grids = None
+    if args.sweep or args.sweep_length or args.sweep_width or args.sweep_height:
+        try:
+            sweep_grids = tolerance_grids(args.sweep or DEFAULT_GRID, args.sweep_length, args.sweep_width, args.sweep_height)
+        except ValueError as e:
+            print(e)
+            return 1
+
+    names = output_names(log_files)
+
+    def report(log_file, summary, error, metrics):
+        file_name = names[log_file]
+        if error:
+            print(f"{file_name}: could not be processed ({error})")
+        else:
+            print(f"{file_name}: {summary.total_bad} out of {summary.total_rows} boxes failed: {summary.success_rate:.2f}% success rate")
+            if summary.sweep is not None:
+                summary.sweep.write(sys.stdout)
+        if args.metrics:
+            print(metrics.table() + "\n")
+
+    outcomes = analyze_logs(log_files, tolerances, selected_boxes, args.model, args.reference, args.output,
+                            workers=args.workers or None, chunked=args.chunked, chunksize=args.chunksize,
+                            fmt=None if args.no_excel else args.format, classifier=args.classifier, model_version=args.model_version, cache_dir=args.cache_dir if args.cache else None,
+                            store_dir=args.log_store_dir if args.log_store else None,
+                            track_memory=not args.no_memory, progress=report, sweep_grids=sweep_grids)
+
+    # Merge the counters of every log into one fleet-wide summary
+    if len(log_files) > 1:
+        write_fleet_summary(outcomes, selected_boxes, tolerances, args.output)
+
+    return sum(isinstance(outcome, str) for outcome in outcomes.values())
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return 1 if run(args) else 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,34 +1,189 @@
-from tkinter import filedialog
-import pandas as pd
 import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from pipeline import LOG_DTYPES, DEFAULT_CHUNKSIZE, read_log_chunks, status_column
+
+# Optional columns recording where each combined row came from
+SOURCE_COLUMNS = ['Source File', 'Source Row']
+
+# Columns logged as whole numbers
+INTEGER_COLUMNS = [col for col, dtype in LOG_DTYPES.items() if dtype != 'float64']
+
+def log_header(log_file):
+    return list(pd.read_csv(log_file, sep=';', nrows=0).columns)
+
+def canonical_columns(log_files):
+    """Return the columns of the combined log: every column of every log, in the order they are first seen."""
+    columns = {}
+    for log_file in log_files:
+        columns.update(dict.fromkeys(log_header(log_file)))
+    return list(columns)
+
+def read_chunks(log_file, chunksize=DEFAULT_CHUNKSIZE, store=None):
+    """Read every column of a log in chunks, from the LogStore if one is given.
+
+    The analysis columns are parsed as pipeline.read_log parses them and every other column (Timestamp,
+    Barcode...) is kept as the text it was logged as, whether the rows come from the log or the store, so
+    every row of the combined log is written the same way.
+    """
+    for chunk in read_log_chunks(log_file, chunksize, store, all_columns=True):
+        # A blank Index or state reads as float; write whole numbers without the ".0"
+        for col in chunk.columns.intersection(INTEGER_COLUMNS):
+            values = chunk[col]
+            if values.dtype == np.float64 and (values.dropna() % 1 == 0).all():
+                chunk[col] = values.astype('Int64')
+        yield chunk
+
+def conform(chunk, columns):
+    """Map one chunk onto the canonical columns.
+
+    Logs without "Status 3" mark populated rows with "DIM State 3" instead, so that column fills in for it;
+    any other column a log lacks is left blank.
+    """
+    status = status_column(chunk.columns)
+    data = {}
+    for col in columns:
+        if col in chunk.columns:
+            data[col] = chunk[col]
+        elif col == 'Status 3' and status is not None:
+            data[col] = chunk[status]
+        else:
+            data[col] = pd.Series(pd.NA, index=chunk.index, dtype=object)
+    return pd.DataFrame(data, index=chunk.index)
+
+class IndexRanges:
+    """The Index values written so far, kept as merged [start, end] runs.
+
+    Memory grows with the number of gaps between runs, not with the number of rows.
+    """
+
+    def __init__(self):
+        self.starts = np.empty(0, dtype=np.int64)
+        self.ends = np.empty(0, dtype=np.int64)
+
+    def contains(self, index):
+        """Return a boolean mask of the Index values already seen."""
+        index = np.asarray(index, dtype=np.int64)
+        if not len(self.starts):
+            return np.zeros(len(index), dtype=bool)
+        pos = np.searchsorted(self.starts, index, side='right') - 1
+        return (pos >= 0) & (index <= self.ends[np.maximum(pos, 0)])
+
+    def add(self, index):
+        """Record Index values as seen."""
+        index = np.unique(np.asarray(index, dtype=np.int64))
+        if not len(index):
+            return
+
+        # Consecutive values become one run
+        breaks = np.flatnonzero(np.diff(index) != 1) + 1
+        starts = np.concatenate([self.starts, index[np.r_[0, breaks]]])
+        ends = np.concatenate([self.ends, index[np.r_[breaks - 1, len(index) - 1]]])
 
-# Open file dialog to select log files
-file_paths = filedialog.askopenfilenames(title="Select Log Files", filetypes=[("Log Files", "*.log")])
-
-if file_paths:
-    # Initialize an empty list to store DataFrames
-    df_list = []
-    
-    # Read each file and extract data
-    for file_path in file_paths:
-        df = pd.read_csv(file_path, sep=';')
-        df_list.append(df)
-    
-    # Concatenate all DataFrames into a single DataFrame
-    combined_df = pd.concat(df_list, ignore_index=True)
-    
-    # Determine the output directory
-    directories = [os.path.dirname(file_path) for file_path in file_paths]
+        # Merge overlapping or touching runs
+        order = np.argsort(starts, kind='stable')
+        starts, ends = starts[order], np.maximum.accumulate(ends[order])
+        first = np.r_[True, starts[1:] > ends[:-1] + 1]
+        last = np.r_[first[1:], True]
+        self.starts, self.ends = starts[first], ends[last]
+
+def combine_logs(log_files, output_file, chunksize=DEFAULT_CHUNKSIZE, source=False, dedupe=False, store=None):
+    """Stream the logs into one ';'-separated log, a chunk at a time, and return per-file row counts.
+
+    Every chunk is mapped onto the same canonical columns (every column of every log), so logs using
+    "Status 3" and logs using only "DIM State 3" combine cleanly. With dedupe, rows whose Index was already
+    written are skipped; that is only right for overlapping exports of the same log, as every dimensioner log
+    restarts its Index at 1. With source, the file name and row number of each row are added. store, a
+    logstore.LogStore, reads the logs from their columnar copies instead of parsing the text.
+    """
+    columns = canonical_columns(log_files)
+    seen = IndexRanges()
+    counts = []
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as out:
+        header = True
+        for log_file in log_files:
+            rows = written = 0
+            for chunk in read_chunks(log_file, chunksize, store):
+                chunk_df = conform(chunk, columns)
+                if source:
+                    chunk_df[SOURCE_COLUMNS[0]] = os.path.basename(log_file)
+                    chunk_df[SOURCE_COLUMNS[1]] = np.arange(rows, rows + len(chunk))
+
+                if dedupe and 'Index' in chunk_df.columns:
+                    # Rows without a numeric Index are always kept
+                    index = pd.to_numeric(chunk_df['Index'], errors='coerce')
+                    numeric = index.notna().to_numpy()
+                    values = index[numeric].to_numpy(dtype=np.int64)
+                    keep = np.ones(len(chunk_df), dtype=bool)
+                    keep[numeric] = ~seen.contains(values) & ~pd.Index(values).duplicated()
+                    chunk_df = chunk_df[keep]
+                    seen.add(values[keep[numeric]])
+
+                chunk_df.to_csv(out, sep=';', index=False, header=header)
+                header = False
+                rows += len(chunk)
+                written += len(chunk_df)
+
+            counts.append({'Log': log_file, 'Rows': rows, 'Written': written, 'Duplicates': rows - written})
+
+        # Logs without any rows still leave a header behind
+        if header:
+            pd.DataFrame(columns=columns + (SOURCE_COLUMNS if source else [])).to_csv(out, sep=';', index=False)
+
+    return counts
+
+def default_output_dir(log_files):
+    """Next to the logs if they share a folder, otherwise in ./output beside this script."""
+    directories = [os.path.dirname(os.path.abspath(log_file)) for log_file in log_files]
     if len(set(directories)) == 1:
-        output_dir = directories[0]
-    else:
-        output_dir = os.path.join(os.path.dirname(__file__), 'output')
-        os.makedirs(output_dir, exist_ok=True)
-    
-    # Write to a combined log file
-    output_path = os.path.join(output_dir, 'dims.log')
-    combined_df.to_csv(output_path, index=False, sep=';')
+        return directories[0]
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Combine dimensioner logs into one log (dims.log), streaming them in chunks.")
+    parser.add_argument('logs', nargs='*', help="Logs to combine, in order (none: pick them in a file dialog)")
+    parser.add_argument('--output', help="Combined log to write (default: dims.log next to the logs)")
+    parser.add_argument('--source', action='store_true', help="Add the source file and row of every row")
+    parser.add_argument('--dedupe', action='store_true', help="Skip rows whose Index was already written by an earlier log (for overlapping exports of the same log)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows read at a time")
+    parser.add_argument('--log-store', action='store_true', help="Read the logs from the columnar log store (see logstore.py)")
+    args = parser.parse_args(argv)
+
+    log_files = args.logs
+    interactive = not log_files
+    if interactive:
+        # Open file dialog to select log files
+        from tkinter import filedialog
+        log_files = filedialog.askopenfilenames(title="Select Log Files", filetypes=[("Log Files", "*.log")])
+        if not log_files:
+            print("No files selected")
+            return 1
+
+    store = None
+    if args.log_store or interactive:
+        from logstore import LogStore
+        from settings import load_storage
+        settings = load_storage()['log_store']
+        # Picked in the dialog: use the log store as the GUI does, unless storage.json turns it off
+        if args.log_store or settings['enabled']:
+            store = LogStore(settings['folder'], settings['max_mb'] * 1024 ** 2)
+
+    output_path = args.output or os.path.join(default_output_dir(log_files), 'dims.log')
+    counts = combine_logs(log_files, output_path, args.chunksize, source=args.source, dedupe=args.dedupe, store=store)
+
+    for count in counts:
+        duplicates = f" ({count['Duplicates']} duplicate Index rows skipped)" if count['Duplicates'] else ""
+        print(f"{os.path.basename(count['Log'])}: {count['Written']} of {count['Rows']} rows{duplicates}")
     print(f"Combined log file saved to: {output_path}")
-    os.startfile(output_dir)
-else:
-    print("No files selected")
+
+    if interactive and hasattr(os, 'startfile'):
+        os.startfile(os.path.dirname(output_path))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,18 +2,17 @@ import os
 import sys
 import json
 import time
-import joblib
+import queue
 import logging
-import pandas as pd
+import importlib
+import threading
 import tkinter as tk 
-from itertools import permutations
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font
-from tkinter import filedialog, ttk, font
+from metrics import ProgressMetrics, RunCancelled, METRICS_FILE
+from settings import resource_path, load_tolerances, save_selected_boxes, load_selected_boxes, load_box_labels, load_storage
+from tkinter import filedialog, messagebox, ttk, font
 
-def resource_path(relative_path):
-        base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
-        return os.path.join(base_path, relative_path)
+# pandas, scikit-learn and openpyxl take seconds to import, so they are only imported inside the functions
+# that need them; warm_up() loads them (and the model) in the background once the window is showing
 
 # Get the user's Downloads folder path
 downloads_folder = os.path.join(os.path.expanduser("~"), "Downloads")
@@ -21,12 +20,49 @@ downloads_folder = os.path.join(os.path.expanduser("~"), "Downloads")
 # File to store the tolerances
 tol_file = resource_path('tolerances.json')
 
+# The model and reference table, loaded once and kept for every run
+knn = None
+box_df = None
+analysis_lock = threading.Lock()
+
+# Runs happen on a background thread; it talks to the window through these queues, as (kind, value) messages
+run_events = queue.Queue()
+run_answers = queue.Queue()
+cancel_run = threading.Event()
+run_thread = None
+
+# Failed rows listed in summary.txt; the failure explorer shows all of them
+SUMMARY_FAILURE_LIMIT = 1000
+
+# (FailureTable, log name) of the last finished run, for the "Show Failures" button
+last_failures = None
+
+def load_analysis():
+    """Import the analysis modules and load the model and reference table, the first time only."""
+    global knn, box_df
+    with analysis_lock:
+        if knn is None:
+            # Imported now so the first run does not wait for them
+            for module in ['cache', 'export', 'logstore']:
+                importlib.import_module(module)
+            from pipeline import load_model, load_reference
+            box_df = load_reference()
+            knn = load_model()
+    return knn, box_df
+
+def warm_up():
+    """Start loading the analysis modules and the model in the background."""
+    def load():
+        try:
+            load_analysis()
+        except Exception:
+            pass  # raised again, and logged, when parse_log calls load_analysis itself
+
+    threading.Thread(target=load, daemon=True).start()
+
 def load_values():
     """Load the last used values from a JSON file."""
-    if os.path.exists(tol_file):
-        with open(tol_file, 'r') as f:
-            return json.load(f)
-    return {"length": 0.2, "width": 0.2, "height": 0.2}  # Default values
+    return load_tolerances(tol_file)
 
 def store_values():
     """Store the current entry values to a JSON file."""
@@ -49,65 +85,29 @@ def validate_numeric_input(action, value_if_allowed):
     except ValueError:
         return False
 
-def save_excel_file(output_df, excel_file, stdout):
-    # Reset stdout back to original
-    sys.stdout = stdout  
+def ask_window(kind, value):
+    """Ask the window a yes/no question from the analysis thread and wait for the answer."""
+    run_events.put((kind, value))
+    return run_answers.get()
+
+def save_excel_file(output_df, excel_file, tolerances, drift_df=None):
+    from export import write_excel
 
     # Extract the file name without the folder name
     excel_filename = os.path.basename(excel_file)
 
     while True:
         try:
-            # Try to save the DataFrame to Excel
-            with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-                output_df.to_excel(writer, index=False, sheet_name='Results')
-
-            # Load the workbook to apply formatting
-            wb = load_workbook(excel_file)
-            ws = wb.active  # Get active sheet
-
-            # Define colors for highlighting
-            red_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")  # Light red
-            red_font = Font(color="9C0006", bold=False)  # Dark red (unbolded)
-
-            green_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")  # Light green
-            green_font = Font(color="006100", bold=False)  # Dark green (unbolded)
-
-            # Get tolerance values
-            tolerances = load_values()
-
-            # Find column indices for ΔLength, ΔWidth, and ΔHeight
-            col_indices = {col: idx + 1 for idx, col in enumerate(output_df.columns) if col in ['ΔLength', 'ΔWidth', 'ΔHeight']}
-
-            # Apply conditional formatting
-            for row_idx, row in enumerate(output_df.itertuples(), start=2):  # Start from row 2 (skip header)
-                for col, col_idx in col_indices.items():
-                    value = getattr(row, col)
-                    tolerance = tolerances[col.replace('Δ', '').lower()]  # Get tolerance for Length, Width, or Height
-
-                    # Apply red if outside tolerance, green if within tolerance
-                    if abs(value) > tolerance:
-                        ws.cell(row=row_idx, column=col_idx).fill = red_fill
-                        ws.cell(row=row_idx, column=col_idx).font = red_font
-                    else:
-                        ws.cell(row=row_idx, column=col_idx).fill = green_fill
-                        ws.cell(row=row_idx, column=col_idx).font = green_font
-
-            # Save the formatted Excel file
-            wb.save(excel_file)
-
-            break  # Exit the loop once the file is saved
+            # Try to save the DataFrame to Excel, highlighting the Δ cells against the tolerances
+            write_excel(output_df, excel_file, tolerances, drift_df)
+            return True
         except PermissionError:
             print(f"\nUnable to save results to an Excel file because \"{excel_filename}\" is currently open. Please close the file to proceed.")
-            user_input = input("Are you ready to retry? (Y/n): ").strip().lower()
-            if user_input == 'n':
+            if not ask_window('retry_save', excel_filename):
                 print("Exiting without saving.")
-                break
-            elif user_input == 'y':
-                print("Retrying to save the file...")
-                time.sleep(1)  # Wait for a second before retrying
-            else:
-                print("Invalid input. Please type 'Y' or 'n'.")
+                return False
+            print("Retrying to save the file...")
+            time.sleep(1)  # Wait for a second before retrying
 
 def load_file():
     file_path = filedialog.askopenfilename(filetypes=[("Log Files", "*.log"), ("All Files", "*.*")])
@@ -121,57 +121,13 @@ def load_file():
         log_file_entry.config(text="No file selected.")
         return None
     
-def calculate_min_difference(row):
-    # Specify Actual vs Result dimensions
-    actual_dims = (row['Length Actual'], row['Width Actual'], row['Height Actual'])
-    result_dims = (row['Length'], row['Width'], row['Height'])
-    
-    # Generate all permutations (rotations) of the expected dimensions
-    rotations = list(permutations(actual_dims))
-    
-    # Initialize parameters for finding the best rotation
-    min_difference = None
-    best_rotation = None
-    
-    for rotation in rotations:
-        # Calculate the difference for this rotation
-        difference = [result_dims[i] - rotation[i] for i in range(3)]
-        
-        # Compute the total absolute difference
-        total_difference = sum(abs(diff) for diff in difference)
-        
-        # Update minimum difference and best rotation
-        if min_difference is None or total_difference < min_difference:
-            min_difference = total_difference
-            best_rotation = rotation
-    
-    # Format differences to .2f
-    formatted_difference = [f"{diff:.2f}" for diff in [result_dims[i] - best_rotation[i] for i in range(3)]]
-    
-    return pd.Series(formatted_difference, index=['Difference Length', 'Difference Width', 'Difference Height'])
-
-def save_selected_boxes(selected_boxes, file_path=resource_path("selected_boxes.json")):
-    """Save selected boxes to a file."""
-    with open(file_path, 'w') as f:
-        json.dump(selected_boxes, f)
-
-def load_selected_boxes(file_path=resource_path("selected_boxes.json")):
-    """Load selected boxes from a file."""
-    if os.path.exists(file_path):
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    return None
-
-def filter_boxes(df, checkboxes):
-    global selected_boxes, filtered_boxes  # Declare filtered_df as a global variable
+def filter_boxes(checkboxes):
+    global selected_boxes  # Declare selected_boxes as a global variable
     # Get the selected box sizes
     selected_boxes = [box for box, var in checkboxes.items() if var.get() == '1']
 
-        # Save the selected boxes to a file
+    # Save the selected boxes to a file
     save_selected_boxes(selected_boxes)
-    
-    # Filter the DataFrame to include only the selected box sizes
-    filtered_boxes = df[df['Box'].isin(selected_boxes)]
 
 def setup_logging(folder):
     # Only set up logging if an error is detected
@@ -180,173 +136,204 @@ def setup_logging(folder):
 
     return logging, log_file
 
-def save_selected_boxes(selected_boxes, file_path=resource_path("selected_boxes.json")):
-    """Save selected boxes to a file."""
-    with open(file_path, 'w') as f:
-        json.dump(selected_boxes, f)
+def parse_log(log_file, tolerances, selected_boxes, chunked=False, report=None, sweep=False):
+    """Analyse one log and write its summary, results and run_metrics.json; returns the output folder and a
+    FailureTable of the failed rows for the failure explorer.
 
-def parse_log():
-    try:
-        filter_boxes(box_df, checkboxes)
+    summary.txt lists at most SUMMARY_FAILURE_LIMIT failed rows; the explorer pages through all of them.
+
+    With sweep, the pass/fail counts at every tolerance from 0.0 to 1.0 are collected in the same pass and
+    written to tolerance_sweep.csv and tolerance_curve.csv, so other tolerances can be checked without another run.
 
-        original_stdout = sys.stdout  # Save the original stdout
-        print("Running script...")
-        # Define the output directory and filename
-        if not log_file_entry.get():
-            print("No valid file entered....")
-            return
+    The folders, sizes and on/off switches of the result cache and the log store come from storage.json
+    (see settings.load_storage).
 
-        # Get the base name (filename with extension)
-        base_name = os.path.basename(log_file_entry.get())
-
-        # Split the base name into filename and extension
-        file_name, _ = os.path.splitext(base_name)
+    Runs on the analysis thread: report(stage, rows_read, total_rows, eta) feeds the progress bar and
+    cancel_run (the Cancel button) stops the run at the next stage.
+    """
+    # Load the analysis modules (usually already done in the background)
+    from cache import ResultCache
+    from drift import write_drift, DRIFT_FILE
+    from failures import FailureTable
+    from logstore import LogStore
+    from pipeline import analyze_log, output_folder, write_summary, estimate_rows
+    from sweep import tolerance_grids, write_sweep, SWEEP_FILE, CURVE_FILE
 
-        # Create a directory with filename
-        output_path = os.path.join(downloads_folder, f"output/{file_name}")
-        os.makedirs(output_path, exist_ok=True)
-
-        summary_file = os.path.join(output_path, "summary.txt")
-
-        
-
-        # Redirect stdout to the summary file
-        with open(summary_file, 'w') as file:
-            sys.stdout = file  # Redirect stdout to the file
-
-            # To load the model
-            knn = joblib.load(resource_path('model.joblib'))
-
-            # Create a dataframe of all the measurements from the log file
-            meas_df = pd.read_csv(log_file_entry.get(), sep=';')  # new box dimensions
-  
-            # If "Status 3" exists
-            if "Status 3" in meas_df.columns:
-                meas_df = meas_df[meas_df["Status 3"] != 0]
-
-            # If "DIM State 3" exists
-            elif "DIM State 3" in meas_df.columns:
-                meas_df = meas_df[meas_df["DIM State 3"] != 0]
-                
-            else:
-                # Neither column exists
-                print("Neither 'Status 3' nor 'DIM State 3' columns are present in the DataFrame.")
-
-            meas_df[['Length', 'Width', 'Height']] = (meas_df[['Length', 'Width', 'Height']]).round(1) # rounds all L, W, H to nearest tenth (5.799999 -> 5.8)
-
-            # Predicts the actual dimensions based on measured data
-            meas_df.loc[:,'Box'] = knn.predict((meas_df[['Length', 'Width', 'Height']]))
-            meas_df = meas_df[meas_df['Box'].isin(selected_boxes)] # drops unselected boxes
-
-            # Merge the DataFrames based on the label column, preserving the order of meas_df
-            merged_df = meas_df.merge(filtered_boxes, on='Box', suffixes=(' Measured', ' Actual'), how='left')
-
-            # Rename the columns for cleaner look in Excel
-            merged_df = merged_df.rename(columns={
-                'Length Measured': 'Length',
-                'Width Measured' : 'Width',
-                'Height Measured': 'Height'
-            })
-
-            # Subtract the corresponding features
-            for col in ['Length', 'Width', 'Height']:
-                merged_df[f'Δ{col}'] = merged_df[f'{col}'] - merged_df[f'{col} Actual']
-
-            # Align Actual vs Result dimensions (i.e. "5.2x6.2x2.0" would be "6x5x2" box but calculated difference would be "5x6x2")
-            merged_df[[f'Δ{col}' for col in ['Length', 'Width', 'Height']]] = merged_df.apply(calculate_min_difference, axis=1).astype(float)
-
-            # Select only the columns containing the differences
-            difference_df = merged_df[[f'Δ{col}' for col in ['Length', 'Width', 'Height']]]
-
-            # Calculate the frequency each column is out of spec (greater than ± 0.2)
-            count_ole = sum((round(difference_df['ΔLength'].abs(), 1) > tolerances["length"]))
-            count_owi = sum((round(difference_df['ΔWidth'].abs(), 1) >  tolerances["width"]) )
-            count_ohi = sum((round(difference_df['ΔHeight'].abs(), 1) > tolerances["height"]))
-                
-            # Calculate the number of rows with populated dimensions
-            total_rows = difference_df.shape[0] 
-
-            # Check whether any dimensions are out of spec
-            if count_ole > 0 or count_owi > 0 or count_ohi > 0:
-
-                # Print the occurrences each time length, width, and height is off 
-                print(f"Length is off:  {count_ole} out of {total_rows} time(s)")
-                print(f"Width  is off:  {count_owi} ouf of {total_rows} time(s)")
-                print(f"Height is off:  {count_ohi} out of {total_rows} time(s)\n")
-
-            else:
-                print(f"All populated dimensions are within spec!") 
-
-            # Filter the dimensions that failed
-            mask =  (round(merged_df['ΔLength'].abs(), 1) > tolerances["length"]) | \
-                    (round(merged_df['ΔWidth'].abs(),  1) > tolerances["width"] ) | \
-                    (round(merged_df['ΔHeight'].abs(), 1) > tolerances["height"])
-
-            # Filter out the bad dimensions and count number of occurrences
-            filtered_df = merged_df[mask]
-            total_bad = filtered_df.shape[0]
-
-            # Count occurrences of each unique set of box failures
-            failure_counts = filtered_df.groupby(['Box']).size()
-
-            # Sort the filtered DataFrame by the 'Index' column
-            sorted_failed_boxes = filtered_df[['Index', 'Length', 'Width', 'Height', 'Box']].sort_values(by=['Box', 'Index'])
-
-            # Convert the sorted DataFrame to a string without the default index
-            failed_boxes = sorted_failed_boxes.to_string(index=False)
-
-            # Print boxes that fail
-            for label, count in failure_counts.items():
-                print(f"Box {label} is out of spec {count} time(s)")
-                
-            # Set the display option to expand the column width
-            pd.set_option('display.max_colwidth', None)
-
-            # Calculate and print the success rate; print failed boxes if applicable
-            success_rate = (total_rows - total_bad) / total_rows * 100
-            print(f"\n{total_bad} out of {total_rows} boxes failed: {success_rate:.2f}% success rate\n", f"\nFailed boxes:\n{failed_boxes}" if total_bad else "")
-            
-            # Track missing boxes
-            merged_boxes = merged_df['Box'].unique()  # Boxes in merged_df
-            missing_boxes = set(selected_boxes) - set(merged_boxes)  # Boxes that didn't make it
-            
-            # Print missing boxes information
-            if missing_boxes:
-                print("\nThe following selected boxes were missing in the results:")
-                for box in missing_boxes:
-                    print(f"- {box}")
-            else:
-                print("\nAll selected boxes were included in the results.")
-
-            # Create an output DataFrame to export to an Excel file with only valid dimensions
-            output_df = merged_df[['Index', 'Length', 'Width', 'Height', 'Box', 'ΔLength', 'ΔWidth', 'ΔHeight', 'DIM State 1', 'DIM State 2', 'DIM State 3']]
-
-            output_df = output_df.rename(columns={ 
-                'DIM State 1': 'State 1',
-                'DIM State 2': 'State 2',
-                'DIM State 3': 'State 3'
-            })
+    print("Running script...")
+    # Create a directory named after the log file
+    output_path, file_name = output_folder(log_file, downloads_folder)
 
+    # Time each stage of the run; written to run_metrics.json next to the summary, even if the run fails
+    metrics = ProgressMetrics(log_file, report=report, cancel=cancel_run, total_rows=estimate_rows(log_file))
+    try:
+        # The model is loaded once (usually already in the background) and reused by later runs
+        with metrics.stage('load_model'):
+            knn, box_df = load_analysis()
+
+        # Large logs are processed in chunks so memory stays bounded; results go to a CSV instead of Excel
+        results_file = os.path.join(output_path, file_name + '.csv') if chunked else None
+
+        # Run the analysis and write the summary; the cache skips parsing/classifying a log seen before,
+        # and the log store keeps a columnar copy of each log so it is only parsed as text once
+        storage = load_storage()
+        cache, store = storage['cache'], storage['log_store']
+        result = analyze_log(log_file, tolerances, selected_boxes, knn, box_df, chunked=chunked, results_file=results_file,
+                             cache=ResultCache(cache['folder'], cache['max_mb'] * 1024 ** 2) if cache['enabled'] else None,
+                             metrics=metrics,
+                             store=LogStore(store['folder'], store['max_mb'] * 1024 ** 2) if store['enabled'] else None,
+                             sweep_grids=tolerance_grids() if sweep else None)
+        with metrics.stage('write_summary'):
+            write_summary(result, os.path.join(output_path, "summary.txt"), max_listed=SUMMARY_FAILURE_LIMIT)
+            write_drift(result.summary.drift, os.path.join(output_path, DRIFT_FILE))
+            if sweep:
+                write_sweep(result.summary.sweep, os.path.join(output_path, SWEEP_FILE), os.path.join(output_path, CURVE_FILE))
+                result.summary.sweep.write(sys.stdout)
+
+        if not chunked:
             # Set the full path for the Excel file
             excel_file = os.path.join(output_path, file_name + '.xlsx')
 
             # Call the save function with the DataFrame and file path
-            time.sleep(1)
-            save_excel_file(output_df, excel_file, original_stdout)
-
-            # Optionally, open the saved file
-            os.startfile(output_path)
-
-        # sys.stdout = original_stdout  # Reset stdout back to original
-
+            with metrics.stage('export', rows_in=len(result.results)):
+                save_excel_file(result.results, excel_file, tolerances, result.summary.drift.table())
+    finally:
+        metrics.stop()
+        metrics.write(os.path.join(output_path, METRICS_FILE))
+        print(metrics.table())
+
+    # Built here so the window only has to show it
+    return output_path, FailureTable.from_summary(result.summary)
+
+def analysis_thread(log_file, tolerances, selected_boxes, chunked, sweep):
+    """Run parse_log off the Tk thread and post how it ended to the window."""
+    try:
+        output_path, failures = parse_log(log_file, tolerances, selected_boxes, chunked,
+                                          report=lambda *progress: run_events.put(('progress', progress)), sweep=sweep)
+        run_events.put(('done', (output_path, failures)))
+    except RunCancelled:
+        print("Run cancelled.")
+        run_events.put(('cancelled', None))
     except Exception as e:
         # Initialize logging only when an error is caught
         logging, error_file = setup_logging(downloads_folder)
         logging.error(f"An error occurred: {e}", exc_info=True)
-        os.startfile(error_file)
+        run_events.put(('error', error_file))
+
+def start_run():
+    """Start analysing the selected log in the background, so the window stays responsive."""
+    global run_thread, tolerances
+    if run_thread is not None and run_thread.is_alive():
+        return
+
+    if not log_file_entry.get():
+        print("No valid file entered....")
+        status_var.set("No valid file entered.")
+        return
+
+    # Save the boxes and tolerances now so this run (and the next session) use what is on screen
+    try:
+        store_values()
+    except ValueError:
+        status_var.set("Enter a number for each tolerance.")
+        return
+    tolerances = load_values()
+    filter_boxes(checkboxes)
+
+    cancel_run.clear()
+    run_button.config(state='disabled')
+    cancel_button.config(state='normal')
+    progress_bar['value'] = 0
+    status_var.set("Starting...")
+
+    run_thread = threading.Thread(target=analysis_thread, daemon=True,
+                                  args=(log_file_entry.get(), tolerances, selected_boxes, chunked_var.get() == '1', sweep_var.get() == '1'))
+    run_thread.start()
+
+def stop_run():
+    """Cancel the current run at its next stage."""
+    cancel_run.set()
+    cancel_button.config(state='disabled')
+    status_var.set("Cancelling...")
+
+def show_progress(stage, rows_read, total_rows, eta):
+    text = f"{stage.replace('_', ' ').capitalize()}: {rows_read:,} rows read"
+    if total_rows:
+        progress_bar['value'] = min(rows_read / total_rows * 100, 100)
+        text += f" of about {total_rows:,}"
+    if eta is not None:
+        text += f" ({int(eta // 60)}:{int(eta % 60):02d} left)"
+    status_var.set(text)
+
+def set_failures(failures, name):
+    """Keep the failed rows of the last run and open them in the failure explorer, if there are any."""
+    global last_failures
+    last_failures = (failures, name)
+    failures_button.config(state='normal' if len(failures) else 'disabled')
+    if len(failures):
+        show_failures()
+
+def show_failures():
+    """Open the failure explorer on the failed rows of the last run."""
+    from explorer import FailureExplorer
+
+    if last_failures is not None:
+        failures, name = last_failures
+        FailureExplorer(root, failures, title=f"Failed rows - {name}")
+
+def finish_run(message):
+    run_button.config(state='normal')
+    cancel_button.config(state='disabled')
+    status_var.set(message)
+
+def handle_run_event(kind, value):
+    """Apply one message from the analysis thread to the window."""
+    if kind == 'progress':
+        show_progress(*value)
+    elif kind == 'retry_save':
+        run_answers.put(messagebox.askretrycancel("File is open", f"Unable to save results to an Excel file because \"{value}\" "
+                                                  "is currently open. Please close the file and retry.", parent=root))
+    elif kind == 'done':
+        output_path, failures = value
+        progress_bar['value'] = 100
+        finish_run("Done. Results saved to " + output_path)
+        set_failures(failures, os.path.basename(output_path))
+        # Optionally, open the saved file
+        os.startfile(output_path)
+    elif kind == 'cancelled':
+        finish_run("Cancelled.")
+    elif kind == 'error':
+        finish_run("An error occurred, see error.log.")
+        os.startfile(value)
+
+def check_run_events():
+    """Apply the messages from the analysis thread to the window; runs every 100 ms on the Tk thread.
+
+    A message that cannot be applied is logged and shown, and polling always goes on, so the window never
+    stays stuck in the running state.
+    """
+    try:
+        while True:
+            try:
+                kind, value = run_events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                handle_run_event(kind, value)
+            except Exception as e:
+                logging, error_file = setup_logging(downloads_folder)
+                logging.error(f"Could not apply the '{kind}' message of the run: {e}", exc_info=True)
+                if kind == 'retry_save':
+                    # The analysis thread waits for an answer; give up on the save rather than leave it waiting
+                    run_answers.put(False)
+                if kind in ('done', 'cancelled', 'error'):
+                    finish_run(f"The run ended, but: {e}")
+                messagebox.showerror("Error", f"{e}\n\nDetails are in {error_file}.", parent=root)
+    finally:
+        root.after(100, check_run_events)
 
 def main():
-    global log_file_entry, length_tol_entry, width_tol_entry, height_tol_entry, box_df, checkboxes, selected_boxes, tolerances
+    global root, log_file_entry, length_tol_entry, width_tol_entry, height_tol_entry, checkboxes, tolerances, chunked_var, sweep_var
+    global run_button, cancel_button, failures_button, progress_bar, status_var
 
     # Create the main window
     root = tk.Tk()
@@ -356,7 +343,7 @@ def main():
     root.attributes('-topmost', True)
 
     # Set a fixed window size
-    root.geometry("500x500")  # You can adjust the size as needed
+    root.geometry("500x670")  # You can adjust the size as needed
 
     # Create the label with underlined text and center it across all 3 columns
     label_font = font.Font(underline=True)  # Create a font object with underlined tex
@@ -404,11 +391,8 @@ def main():
     height_tol_entry.insert(0, tolerances["height"])
     height_tol_entry.grid(row=3, column=1, pady=5)
 
-    # Load the CSV with actual dimensions
-    box_df = pd.read_csv(resource_path('Xactual.csv'))
-
-    # Get unique box sizes from the "Box" column
-    unique_boxes = box_df['Box'].unique()
+    # Get unique box sizes from the "Box" column of the CSV with actual dimensions
+    unique_boxes = load_box_labels()
 
     # Load previously saved selected boxes (if available)
     previous_selected_boxes = load_selected_boxes()
@@ -436,8 +420,37 @@ def main():
         checkbox.grid(row=box_row, column=box_column, sticky='w', padx=5, pady=5)  # Place each checkbox in the correct row and column
         checkboxes[box] = var
 
-    run_button = tk.Button(frame_boxes, text="Filter Boxes", command=lambda: [parse_log(), store_values(), root.quit()])
-    run_button.grid(row=box_row+2, column=1, columnspan=3, sticky="ew")
+    # Option to process large logs in chunks (bounded memory, CSV results instead of Excel)
+    chunked_var = tk.StringVar(value='0')
+    chunked_checkbox = ttk.Checkbutton(frame_boxes, text="Large log (process in chunks)", variable=chunked_var)
+    chunked_checkbox.grid(row=box_row+1, column=0, columnspan=3, sticky='w', padx=5, pady=5)
+
+    # Option to also count pass/fail at every tolerance from 0.0 to 1.0 (tolerance_sweep.csv, tolerance_curve.csv)
+    sweep_var = tk.StringVar(value='0')
+    sweep_checkbox = ttk.Checkbutton(frame_boxes, text="Tolerance sweep (0.0 to 1.0)", variable=sweep_var)
+    sweep_checkbox.grid(row=box_row+2, column=0, columnspan=3, sticky='w', padx=5, pady=5)
+
+    # The run happens in the background; the window stays open for further runs
+    run_button = tk.Button(frame_boxes, text="Filter Boxes", command=start_run)
+    run_button.grid(row=box_row+3, column=1, columnspan=3, sticky="ew")
+
+    cancel_button = tk.Button(frame_boxes, text="Cancel", command=stop_run, state='disabled')
+    cancel_button.grid(row=box_row+4, column=1, columnspan=3, sticky="ew", pady=5)
+
+    # Browse the failed rows of the last run (opened automatically when a run has failures)
+    failures_button = tk.Button(frame_boxes, text="Show Failures", command=show_failures, state='disabled')
+    failures_button.grid(row=box_row+5, column=1, columnspan=3, sticky="ew")
+
+    # Progress of the current run: rows read, current stage and time left
+    progress_bar = ttk.Progressbar(frame_boxes, mode='determinate', maximum=100)
+    progress_bar.grid(row=box_row+6, column=0, columnspan=3, sticky="ew", padx=5, pady=5)
+
+    status_var = tk.StringVar(value="Ready.")
+    tk.Label(frame_boxes, textvariable=status_var, anchor='w', wraplength=460, justify='left').grid(row=box_row+7, column=0, columnspan=3, sticky="ew", padx=5)
+
+    # Load pandas, scikit-learn and the model in the background while the user fills in the form
+    root.after(0, warm_up)
+    root.after(100, check_run_events)
 
     # Run the Tkinter event loop
     root.mainloop()
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+AXES = ['Length', 'Width', 'Height']
+
+DRIFT_FILE = "drift.csv"
+
+# Δ values are rounded to 2 decimals, so a histogram in hundredths gives exact percentiles
+HISTOGRAM_SCALE = 100
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Running moments kept for each (Box, Axis): d is the Δ value, x the log Index, a the actual (aligned) dimension
+MOMENT_COLUMNS = ['n', 'mean_d', 'm2_d', 'mean_x', 'm2_x', 'c_xd', 'sum_a', 'min_d', 'max_d']
+
+DRIFT_COLUMNS = ['Box', 'Axis', 'Count', 'Actual', 'Mean Bias', 'Std', 'Min', 'P5', 'P25', 'Median', 'P75', 'P95', 'Max', 'Trend per 1k']
+
+def _merge_moments(a, b):
+    """Combine two moment tables (indexed by Box, Axis) with the parallel mean/variance/covariance update."""
+    a, b = a.align(b, join='outer', fill_value=0)
+    n = a['n'] + b['n']
+    weight = (b['n'] / n.where(n > 0)).fillna(0)
+    delta_d = b['mean_d'] - a['mean_d']
+    delta_x = b['mean_x'] - a['mean_x']
+    cross = (a['n'] * b['n'] / n.where(n > 0)).fillna(0)
+
+    merged = pd.DataFrame({
+        'n': n,
+        'mean_d': a['mean_d'] + delta_d * weight,
+        'm2_d': a['m2_d'] + b['m2_d'] + delta_d ** 2 * cross,
+        'mean_x': a['mean_x'] + delta_x * weight,
+        'm2_x': a['m2_x'] + b['m2_x'] + delta_x ** 2 * cross,
+        'c_xd': a['c_xd'] + b['c_xd'] + delta_x * delta_d * cross,
+        'sum_a': a['sum_a'] + b['sum_a'],
+        # A side missing from one table was filled with 0, which must not win the min/max
+        'min_d': np.fmin(a['min_d'].where(a['n'] > 0), b['min_d'].where(b['n'] > 0)),
+        'max_d': np.fmax(a['max_d'].where(a['n'] > 0), b['max_d'].where(b['n'] > 0)),
+    })
+    return merged[MOMENT_COLUMNS]
+
+def _format(value, spec='.3f'):
+    """Format a statistic, without the sign of a value that rounds to zero (-0.000)."""
+    return format(round(value, 3) + 0.0, spec)
+
+class DriftAccumulator:
+    """Per-box, per-axis distribution of the aligned Δ values, for calibrating a dimensioner.
+
+    Collects count, mean bias, spread, exact percentiles and the trend of Δ over the log Index, one batch of
+    aligned rows at a time. Accumulators merge exactly, so chunked runs, workers and whole fleets combine
+    into the same statistics as a single in-memory pass: the count, mean, spread, extremes and percentiles of Δ
+    come from the histogram of Δ in hundredths, whose integer counts do not depend on the order of the merges.
+    """
+
+    def __init__(self):
+        self.moments = pd.DataFrame(columns=MOMENT_COLUMNS, dtype=float,
+                                    index=pd.MultiIndex.from_arrays([[], []], names=['Box', 'Axis']))
+        self.histogram = pd.Series(dtype=np.int64, index=pd.MultiIndex.from_arrays([[], [], []], names=['Box', 'Axis', 'Key']))
+
+    def add(self, merged_df):
+        """Add one batch of aligned rows (with the Box, Index and Δ columns)."""
+        if not len(merged_df):
+            return
+
+        # One long table of (Box, Axis, Δ) so every statistic comes out of a single grouped pass
+        rows = len(merged_df)
+        deltas = merged_df[[f'Δ{axis}' for axis in AXES]].to_numpy(dtype=np.float64)
+        measured = merged_df[AXES].to_numpy(dtype=np.float64)
+        index = merged_df['Index'].to_numpy(dtype=np.float64)
+        shift = index.min()  # Index values are summed relative to the batch start to keep the sums small
+        x = np.tile(index - shift, len(AXES))
+        d = deltas.T.ravel()
+        long_df = pd.DataFrame({
+            'Box': np.tile(merged_df['Box'].to_numpy(), len(AXES)),
+            'Axis': np.repeat(AXES, rows),
+            'd': d, 'dd': d * d, 'x': x, 'xx': x * x, 'xd': x * d,
+            'a': (measured - deltas).T.ravel(),
+            'Key': np.rint(d * HISTOGRAM_SCALE).astype(np.int64)
+        })
+
+        sums = long_df.groupby(['Box', 'Axis']).agg(
+            n=('d', 'size'), sum_d=('d', 'sum'), sum_dd=('dd', 'sum'), sum_x=('x', 'sum'), sum_xx=('xx', 'sum'),
+            sum_xd=('xd', 'sum'), sum_a=('a', 'sum'), min_d=('d', 'min'), max_d=('d', 'max'))
+
+        n = sums['n'].astype(np.float64)
+        mean_d = sums['sum_d'] / n
+        mean_x = sums['sum_x'] / n
+        batch = pd.DataFrame({
+            'n': n,
+            'mean_d': mean_d,
+            'm2_d': (sums['sum_dd'] - n * mean_d ** 2).clip(lower=0),
+            'mean_x': mean_x + shift,
+            'm2_x': (sums['sum_xx'] - n * mean_x ** 2).clip(lower=0),
+            'c_xd': sums['sum_xd'] - n * mean_x * mean_d,
+            'sum_a': sums['sum_a'],
+            'min_d': sums['min_d'],
+            'max_d': sums['max_d'],
+        })
+
+        self.moments = batch if self.moments.empty else _merge_moments(self.moments, batch)
+        counts = long_df.groupby(['Box', 'Axis', 'Key']).size()
+        self.histogram = counts if self.histogram.empty else self.histogram.add(counts, fill_value=0).astype(np.int64)
+
+    def merge(self, other):
+        """Add the statistics of another accumulator (e.g. from another chunk, log or worker)."""
+        if other.moments.empty:
+            return
+        self.moments = other.moments.copy() if self.moments.empty else _merge_moments(self.moments, other.moments)
+        self.histogram = other.histogram.copy() if self.histogram.empty else self.histogram.add(other.histogram, fill_value=0).astype(np.int64)
+
+    def __len__(self):
+        return int(self.moments['n'].sum()) if not self.moments.empty else 0
+
+    def distribution(self):
+        """Return (count, mean, std, min, max, percentiles) of Δ for every (Box, Axis) from the histogram.
+
+        The sums are exact integers (Python ints) of the keys in hundredths, so every run gives the same values
+        to the last bit; the nearest-rank percentiles are read off the cumulative counts.
+        """
+        result = {}
+        for (box, axis), counts in self.histogram.groupby(level=['Box', 'Axis']):
+            keys = counts.index.get_level_values('Key').to_numpy()
+            order = np.argsort(keys)
+            keys, counts = keys[order], counts.to_numpy()[order]
+            cumulative = np.cumsum(counts)
+            n = int(cumulative[-1])
+            sum_k, sum_kk = int(np.dot(keys, counts)), int(np.dot(keys * keys, counts))
+            ranks = np.ceil(np.array(PERCENTILES) / 100 * n)
+            result[(box, axis)] = {
+                'n': n,
+                'mean': sum_k / (n * HISTOGRAM_SCALE),
+                'std': np.sqrt((n * sum_kk - sum_k * sum_k) / (n * (n - 1))) / HISTOGRAM_SCALE if n > 1 else np.nan,
+                'min': keys[0] / HISTOGRAM_SCALE,
+                'max': keys[-1] / HISTOGRAM_SCALE,
+                'percentiles': keys[np.searchsorted(cumulative, ranks)] / HISTOGRAM_SCALE,
+            }
+        return result
+
+    def table(self):
+        """Return one row of statistics per box and axis (Δ = measured - actual, in the log's units)."""
+        if self.moments.empty:
+            return pd.DataFrame(columns=DRIFT_COLUMNS)
+
+        distribution = self.distribution()
+        rows = []
+        for (box, axis), m in self.moments.iterrows():
+            d = distribution[(box, axis)]
+            p5, p25, median, p75, p95 = d['percentiles']
+            rows.append({
+                'Box': box, 'Axis': axis, 'Count': d['n'],
+                'Actual': m['sum_a'] / m['n'],
+                'Mean Bias': d['mean'],
+                'Std': d['std'],
+                'Min': d['min'], 'P5': p5, 'P25': p25, 'Median': median, 'P75': p75, 'P95': p95, 'Max': d['max'],
+                # Least-squares slope of Δ against Index, per 1000 measurements
+                'Trend per 1k': m['c_xd'] / m['m2_x'] * 1000 if m['m2_x'] > 0 else np.nan,
+            })
+
+        # Boxes in the order of the summary, axes in Length, Width, Height order
+        drift_df = pd.DataFrame(rows, columns=DRIFT_COLUMNS)
+        drift_df['Axis'] = pd.Categorical(drift_df['Axis'], categories=AXES, ordered=True)
+        drift_df = drift_df.sort_values(['Box', 'Axis'], ignore_index=True)
+        drift_df['Axis'] = drift_df['Axis'].astype(str)
+        return drift_df
+
+    def scale_table(self):
+        """Fit the mean bias of each axis against the actual size across boxes.
+
+        A constant offset points at a zero/tare error; a bias that grows with box size (the scale error)
+        points at a calibration drift rather than noise. Needs at least two box sizes per axis.
+        """
+        rows = []
+        drift_df = self.table()
+        for axis in AXES:
+            axis_df = drift_df[drift_df['Axis'] == axis]
+            if axis_df['Actual'].nunique() < 2:
+                continue
+            scale, offset = np.polyfit(axis_df['Actual'], axis_df['Mean Bias'], 1, w=np.sqrt(axis_df['Count']))
+            rows.append({'Axis': axis, 'Offset': offset, 'Scale Error %': scale * 100})
+        return pd.DataFrame(rows, columns=['Axis', 'Offset', 'Scale Error %'])
+
+    def write(self, file):
+        """Print the calibration statistics under the summary."""
+        drift_df = self.table()
+        if drift_df.empty:
+            return
+
+        print("\nCalibration (Δ = measured - actual, trend per 1000 measurements):", file=file)
+        print(drift_df.to_string(index=False, float_format=_format), file=file)
+
+        scale_df = self.scale_table()
+        if len(scale_df):
+            print("\nBias against box size (offset, and scale error across boxes):", file=file)
+            print(scale_df.to_string(index=False, float_format=lambda value: _format(value, '+.3f')), file=file)
+
+def write_drift(drift, drift_file):
+    """Write the calibration statistics as CSV."""
+    drift.table().to_csv(drift_file, index=False, encoding='utf-8')
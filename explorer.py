@@ -0,0 +1,169 @@
+import tkinter as tk
+from tkinter import filedialog, ttk
+from failures import AXES, COLUMNS
+
+ALL_BOXES = "All boxes"
+ANY_AXIS = "Any axis"
+
+# Column widths in pixels
+COLUMN_WIDTHS = {'Index': 80, 'Box': 90, 'Failed': 60}
+
+class FailureExplorer:
+    """A window listing the failed rows of a run in a Treeview that only ever holds the rows on screen.
+
+    The Treeview has one item per visible line, created once; scrolling, sorting and filtering ask the
+    FailureTable for the page now in view and overwrite those items' values. The scrollbar is driven by the
+    position in the view rather than by the Treeview, so 100k+ failed rows browse as fast as a hundred.
+    """
+
+    def __init__(self, parent, table, title="Failed rows"):
+        self.table = table
+        self.sort = 'Box'
+        self.descending = False
+        self.first = 0  # position in the view of the top line
+        self.lines = 0  # lines the Treeview has room for
+        self.view = table.query()
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.transient(parent)  # kept above the main window, which stays on top
+        self.window.geometry("800x520")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+
+        # Filters: box, axis that failed, and smallest max |Δ|
+        frame_filters = tk.Frame(self.window, padx=10, pady=5)
+        frame_filters.grid(row=0, column=0, columnspan=2, sticky="ew")
+
+        counts = table.box_counts()
+        self.box_var = tk.StringVar(value=ALL_BOXES)
+        box_names = [ALL_BOXES] + [f"{box} ({count})" for box, count in counts.items()]
+        self.box_values = dict(zip(box_names, [None] + list(counts)))
+        tk.Label(frame_filters, text="Box:").grid(row=0, column=0, sticky=tk.W)
+        box_combo = ttk.Combobox(frame_filters, textvariable=self.box_var, values=box_names, state='readonly', width=18)
+        box_combo.grid(row=0, column=1, padx=5)
+        box_combo.bind('<<ComboboxSelected>>', lambda event: self.refresh())
+
+        self.axis_var = tk.StringVar(value=ANY_AXIS)
+        tk.Label(frame_filters, text="Failed on:").grid(row=0, column=2, sticky=tk.W)
+        axis_combo = ttk.Combobox(frame_filters, textvariable=self.axis_var, values=[ANY_AXIS] + AXES, state='readonly', width=10)
+        axis_combo.grid(row=0, column=3, padx=5)
+        axis_combo.bind('<<ComboboxSelected>>', lambda event: self.refresh())
+
+        self.min_delta_var = tk.StringVar(value="")
+        tk.Label(frame_filters, text="Max |Δ| ≥").grid(row=0, column=4, sticky=tk.W)
+        min_delta_entry = tk.Entry(frame_filters, textvariable=self.min_delta_var, width=6)
+        min_delta_entry.grid(row=0, column=5, padx=5)
+        min_delta_entry.bind('<Return>', lambda event: self.refresh())
+        tk.Button(frame_filters, text="Apply", command=self.refresh).grid(row=0, column=6, padx=5)
+        tk.Button(frame_filters, text="Save View...", command=self.save_view).grid(row=0, column=7, padx=5)
+
+        # The table, with a scrollbar over the whole view rather than the Treeview's few items; items are reused
+        # for other rows as the view scrolls, so selecting one would not follow its row
+        self.tree = ttk.Treeview(self.window, columns=COLUMNS, show='headings', selectmode='none')
+        for col in COLUMNS:
+            self.tree.heading(col, text=col, command=lambda col=col: self.sort_by(col))
+            self.tree.column(col, width=COLUMN_WIDTHS.get(col, 70), anchor='e' if col not in ('Box', 'Failed') else 'w')
+        self.tree.grid(row=1, column=0, sticky="nsew", padx=(10, 0))
+
+        self.scrollbar = ttk.Scrollbar(self.window, orient='vertical', command=self.on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 10))
+
+        self.status_var = tk.StringVar()
+        tk.Label(self.window, textvariable=self.status_var, anchor='w').grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_to(self.first + (-3 if event.delta > 0 else 3)))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_to(self.first - 3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_to(self.first + 3))
+        self.tree.bind('<Prior>', lambda event: self.scroll_to(self.first - self.lines))
+        self.tree.bind('<Next>', lambda event: self.scroll_to(self.first + self.lines))
+        self.tree.bind('<Home>', lambda event: self.scroll_to(0))
+        self.tree.bind('<End>', lambda event: self.scroll_to(len(self.view)))
+
+        self.show_headings()
+        self.show_status()
+
+    def on_resize(self, event):
+        """Keep one Treeview item per line that fits, then refill them."""
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        heading_height = row_height + 5
+        lines = max(1, (event.height - heading_height) // row_height)
+        if lines != self.lines:
+            self.lines = lines
+            self.tree.configure(height=lines)
+            self.fill()
+
+    def fill(self):
+        """Show the page of the view starting at self.first in the Treeview's items."""
+        self.first = max(0, min(self.first, len(self.view) - self.lines))
+        rows = self.view.rows(self.first, self.lines)
+        items = self.tree.get_children()
+
+        # Reuse the existing items, adding or removing only the difference
+        for item, values in zip(items, rows):
+            self.tree.item(item, values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        for values in rows[len(items):]:
+            self.tree.insert('', 'end', values=values)
+
+        total = len(self.view)
+        if total:
+            self.scrollbar.set(self.first / total, min(self.first + self.lines, total) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, first):
+        self.first = int(first)
+        self.fill()
+        return 'break'
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar callback: 'moveto fraction' when dragged, 'scroll n units|pages' for the arrows and trough."""
+        if action == 'moveto':
+            self.scroll_to(float(amount) * len(self.view))
+        elif action == 'scroll':
+            step = self.lines if unit == 'pages' else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def sort_by(self, col):
+        """Sort by a column; clicking the same column again reverses the order."""
+        if col == self.sort:
+            self.descending = not self.descending
+        else:
+            # Measurements and Δ values are most useful largest first
+            self.descending = col not in ('Index', 'Box')
+        self.sort = col
+        self.show_headings()
+        self.refresh()
+
+    def show_headings(self):
+        for col in COLUMNS:
+            arrow = (" ▼" if self.descending else " ▲") if col == self.sort else ""
+            self.tree.heading(col, text=col + arrow)
+
+    def refresh(self):
+        """Query the table with the current filters and order, and show the top of the result."""
+        try:
+            min_delta = float(self.min_delta_var.get()) if self.min_delta_var.get().strip() else None
+        except ValueError:
+            self.status_var.set("Enter a number for the smallest max |Δ|.")
+            return
+        axis = self.axis_var.get()
+        box = self.box_values.get(self.box_var.get())
+        self.view = self.table.query(self.sort, self.descending, boxes=None if box is None else [box],
+                                     axis=None if axis == ANY_AXIS else axis, min_delta=min_delta)
+        self.first = 0
+        self.fill()
+        self.show_status()
+
+    def show_status(self):
+        self.status_var.set(f"{len(self.view):,} of {len(self.table):,} failed rows")
+
+    def save_view(self):
+        """Save the rows of the current view (all of them, not just the page on screen) as CSV."""
+        file_path = filedialog.asksaveasfilename(parent=self.window, defaultextension='.csv', filetypes=[("CSV Files", "*.csv")])
+        if file_path:
+            self.view.frame().to_csv(file_path, index=False, encoding='utf-8')
+            self.status_var.set(f"Saved {len(self.view):,} rows to {file_path}")
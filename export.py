@@ -0,0 +1,121 @@
+import os
+import json
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+from openpyxl.utils import get_column_letter
+
+# Output formats: the styled Excel workbook, or columnar files for runs too big for Excel
+FORMATS = ['xlsx', 'csv', 'parquet']
+
+# Excel's hard limit, header row included
+EXCEL_MAX_ROWS = 1_048_576
+
+DELTA_COLUMNS = ['ΔLength', 'ΔWidth', 'ΔHeight']
+
+def _column_values(series):
+    """Return a column as plain Python values, with None for missing values so they are written as empty cells."""
+    if series.isna().any():
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
+
+def write_excel(output_df, excel_file, tolerances, drift_df=None):
+    """Write the results to Excel in one streaming pass, colouring the Δ cells with conditional formatting.
+
+    Each Δ column gets two sheet-level rules driven by the tolerances: red when outside tolerance and
+    green when within, so no cell is styled one at a time. drift_df, if given (see drift.DriftAccumulator.table),
+    goes on a second "Drift" sheet.
+    """
+    if len(output_df) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(output_df)} rows do not fit in an Excel sheet; use the csv or parquet format instead")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Results')
+
+    # Define colors for highlighting
+    red_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")  # Light red
+    red_font = Font(color="9C0006", bold=False)  # Dark red (unbolded)
+
+    green_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")  # Light green
+    green_font = Font(color="006100", bold=False)  # Dark green (unbolded)
+
+    # Red if outside tolerance, green if within tolerance, for ΔLength, ΔWidth and ΔHeight
+    last_row = len(output_df) + 1
+    for idx, col in enumerate(output_df.columns):
+        if col not in DELTA_COLUMNS or last_row < 2:
+            continue
+        letter = get_column_letter(idx + 1)
+        tolerance = tolerances[col.replace('Δ', '').lower()]  # Get tolerance for Length, Width, or Height
+        cells = f"{letter}2:{letter}{last_row}"
+        ws.conditional_formatting.add(cells, FormulaRule(formula=[f"ABS({letter}2)>{tolerance}"], fill=red_fill, font=red_font))
+        ws.conditional_formatting.add(cells, FormulaRule(formula=[f"ABS({letter}2)<={tolerance}"], fill=green_fill, font=green_font))
+
+    _append_frame(ws, output_df)
+
+    if drift_df is not None:
+        _append_frame(wb.create_sheet('Drift'), drift_df)
+
+    wb.save(excel_file)
+
+def _append_frame(ws, df):
+    """Append a DataFrame to a write-only sheet: a header styled like pandas' to_excel header, then the rows."""
+    header_font = Font(bold=True)
+    header_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    header_alignment = Alignment(horizontal='center', vertical='top')
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font, cell.border, cell.alignment = header_font, header_border, header_alignment
+        header.append(cell)
+    ws.append(header)
+
+    # Stream the rows out column-wise converted, without keeping cell objects around
+    for row in zip(*(_column_values(df[col]) for col in df.columns)):
+        ws.append(row)
+
+def write_sidecar(results_file, output_df, tolerances, rows=None):
+    """Write <results_file>.json describing a columnar results file (columns, dtypes, rows and tolerances)."""
+    sidecar_file = results_file + '.json'
+    with open(sidecar_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'file': os.path.basename(results_file),
+            'rows': len(output_df) if rows is None else rows,
+            'columns': [str(col) for col in output_df.columns],
+            'dtypes': {str(col): str(dtype) for col, dtype in output_df.dtypes.items()},
+            'tolerances': tolerances,
+            'delta_columns': [col for col in DELTA_COLUMNS if col in output_df.columns]
+        }, f, indent=4, ensure_ascii=False)
+    return sidecar_file
+
+def write_csv(output_df, csv_file, tolerances):
+    """Write the results to CSV with a JSON sidecar carrying the tolerances used to judge the Δ columns."""
+    output_df.to_csv(csv_file, index=False, encoding='utf-8')
+    write_sidecar(csv_file, output_df, tolerances)
+
+def write_parquet(output_df, parquet_file, tolerances):
+    """Write the results to Parquet (needs pyarrow) with the tolerances stored as file metadata and in a sidecar."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Writing Parquet needs pyarrow (pip install pyarrow); use the csv format instead")
+
+    table = pa.Table.from_pandas(output_df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'tolerances': json.dumps(tolerances).encode()})
+    pq.write_table(table, parquet_file)
+    write_sidecar(parquet_file, output_df, tolerances)
+
+def write_results(output_df, output_path, file_name, tolerances, fmt='xlsx', drift_df=None):
+    """Write the per-measurement results in the chosen format and return the file path (drift_df: Excel "Drift" sheet)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {FORMATS}")
+
+    results_file = os.path.join(output_path, f"{file_name}.{fmt}")
+    if fmt == 'xlsx':
+        write_excel(output_df, results_file, tolerances, drift_df)
+    elif fmt == 'csv':
+        write_csv(output_df, results_file, tolerances)
+    else:
+        write_parquet(output_df, results_file, tolerances)
+    return results_file
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+AXES = ['Length', 'Width', 'Height']
+
+# Columns of the failure explorer, in display order
+COLUMNS = ['Index', 'Box', 'Length', 'Width', 'Height', 'ΔLength', 'ΔWidth', 'ΔHeight', 'Max |Δ|', 'Failed']
+
+class FailureTable:
+    """The failed rows of a run as columns the failure explorer can page through without rendering them all.
+
+    Each failed row keeps its box as an integer code, a bit per axis it failed on (round(abs(Δ), 1) above the
+    tolerance, same as the tolerance check) and its largest |Δ|. The order of the rows by each column is computed
+    once (on first use) and kept, so sorting again is a lookup; filtering by box, axis and |Δ| is one boolean mask
+    over those codes and bits. A query returns a FailureView, which formats only the rows of the page asked for.
+    """
+
+    def __init__(self, failed_df, tolerances):
+        self.index = failed_df['Index'].to_numpy()
+        self.dims = np.column_stack([failed_df[axis].to_numpy(dtype=np.float64) for axis in AXES]).reshape(-1, 3)
+        self.deltas = np.column_stack([failed_df[f'Δ{axis}'].to_numpy(dtype=np.float64) for axis in AXES]).reshape(-1, 3)
+
+        # Box labels sorted, so sorting by code is sorting by box
+        codes, self.boxes = pd.factorize(failed_df['Box'], sort=True)
+        self.codes = codes.astype(np.int32)
+
+        magnitudes = np.abs(self.deltas)
+        self.failed_axes = np.zeros(len(failed_df), dtype=np.uint8)
+        for bit, axis in enumerate(AXES):
+            self.failed_axes |= (np.round(magnitudes[:, bit], 1) > tolerances[axis.lower()]).astype(np.uint8) << bit
+        # A missing Δ counts as 0 for the magnitude, so those rows sort first and pass any |Δ| filter of 0
+        self.magnitudes = np.nan_to_num(magnitudes, nan=0.0)
+        self.max_delta = self.magnitudes.max(axis=1) if len(failed_df) else np.zeros(0)
+
+        self._orders = {}
+
+    @classmethod
+    def from_summary(cls, summary):
+        """Build the table from the failure rows a SummaryAccumulator kept."""
+        return cls(summary.failed_rows(all_columns=True), summary.tolerances)
+
+    def __len__(self):
+        return len(self.index)
+
+    def box_counts(self):
+        """Return the number of failed rows of every box, sorted by box."""
+        return dict(zip(self.boxes, np.bincount(self.codes, minlength=len(self.boxes)).tolist()))
+
+    def sort_key(self, column):
+        """Return the values a column sorts by; Δ columns sort by magnitude."""
+        if column == 'Index':
+            return self.index
+        if column == 'Box':
+            return self.codes
+        if column in AXES:
+            return self.dims[:, AXES.index(column)]
+        if column.startswith('Δ'):
+            return self.magnitudes[:, AXES.index(column[1:])]
+        if column == 'Max |Δ|':
+            return self.max_delta
+        if column == 'Failed':
+            return self.failed_axes
+        raise KeyError(column)
+
+    def order(self, column):
+        """Return the row positions sorted by a column (ties by box, then index), computed on first use."""
+        if column not in self._orders:
+            # lexsort sorts by the last key first
+            self._orders[column] = np.lexsort((self.index, self.codes, self.sort_key(column)))
+        return self._orders[column]
+
+    def mask(self, boxes=None, axis=None, min_delta=None):
+        """Return the rows of the given boxes (None for all), failed on the given axis (None for any) with max |Δ| >= min_delta."""
+        keep = np.ones(len(self), dtype=bool)
+        if boxes is not None:
+            keep &= self.boxes.isin(list(boxes))[self.codes]
+        if axis is not None:
+            keep &= (self.failed_axes & (1 << AXES.index(axis))) != 0
+        if min_delta:
+            keep &= self.max_delta >= min_delta
+        return keep
+
+    def query(self, sort='Box', descending=False, boxes=None, axis=None, min_delta=None):
+        """Return a FailureView of the filtered rows in the given order."""
+        order = self.order(sort)
+        if descending:
+            order = order[::-1]
+        keep = self.mask(boxes, axis, min_delta)
+        return FailureView(self, order if keep.all() else order[keep[order]])
+
+    def frame(self, positions=None):
+        """Return the rows at the given positions (all rows by default) as a DataFrame with the explorer's columns."""
+        positions = np.arange(len(self)) if positions is None else positions
+        data = {'Index': self.index[positions], 'Box': np.asarray(self.boxes, dtype=object)[self.codes[positions]]}
+        for i, axis in enumerate(AXES):
+            data[axis] = self.dims[positions, i]
+        for i, axis in enumerate(AXES):
+            data[f'Δ{axis}'] = self.deltas[positions, i]
+        data['Max |Δ|'] = self.max_delta[positions]
+        data['Failed'] = [failed_axes_label(bits) for bits in self.failed_axes[positions]]
+        return pd.DataFrame(data, columns=COLUMNS)
+
+class FailureView:
+    """One sorted, filtered selection of a FailureTable, fetched a page at a time."""
+
+    def __init__(self, table, positions):
+        self.table = table
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def rows(self, start, count):
+        """Return the display values of count rows starting at start, as tuples in COLUMNS order."""
+        table = self.table
+        page = self.positions[start:start + count]
+        rows = []
+        for position in page.tolist():
+            dims = table.dims[position]
+            deltas = table.deltas[position]
+            rows.append((int(table.index[position]), table.boxes[table.codes[position]],
+                         *(format_value(value) for value in dims), *(format_value(value) for value in deltas),
+                         format_value(table.max_delta[position]), failed_axes_label(table.failed_axes[position])))
+        return rows
+
+    def frame(self):
+        """Return every row of the view as a DataFrame, e.g. to save it."""
+        return self.table.frame(self.positions)
+
+def format_value(value):
+    return "" if np.isnan(value) else f"{value:.2f}"
+
+def failed_axes_label(bits):
+    """Name the axes set in a failed-axis bit mask, e.g. 'L W'."""
+    return " ".join(axis[0] for bit, axis in enumerate(AXES) if bits & (1 << bit))
@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+import pipeline
+from settings import DATA_DIR
+
+# Bump when the stored layout changes, so old entries are imported again
+STORE_VERSION = 2
+
+DEFAULT_STORE_DIR = os.path.join(DATA_DIR, "logs")
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024  # 4 GB
+
+META_FILE = 'meta.json'
+
+# How a column is stored: numbers as raw binary, anything else as text
+NUMERIC_KINDS = ['Int16', 'int64', 'float64']
+TEXT = 'text'
+
+class LogStore:
+    """Columnar copies of parsed logs, so each .log is only parsed as text once.
+
+    A log is imported into its own folder with one file per column. The analysis columns (Index, Length, Width,
+    Height and the DIM State/Status columns) are raw binary in the dtypes pipeline.read_log gives them, plus a
+    null mask where a state had blanks; open() memory-maps those files, so loading a stored log copies nothing
+    until the rows are used. Every other column (Timestamp, Barcode...) is kept as the text it was logged as,
+    for combine_logs.py, and only decoded a chunk at a time when asked for with all_columns. Entries are keyed
+    on the log's path, size and modification time, so an edited or replaced log is imported again.
+    """
+
+    def __init__(self, folder=DEFAULT_STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+
+    def _source_key(self, log_file):
+        return hashlib.sha1(os.path.normcase(os.path.abspath(log_file)).encode('utf-8')).hexdigest()
+
+    def entry_folder(self, log_file, stat=None):
+        """Return the folder holding the columns of this version of a log."""
+        stat = stat or os.stat(log_file)
+        return os.path.join(self.folder, f"{self._source_key(log_file)}-{stat.st_size}-{stat.st_mtime_ns}")
+
+    def current_entry(self, log_file):
+        """Return the entry folder if the log was imported since it last changed, otherwise None."""
+        entry = self.entry_folder(log_file)
+        meta = self._read_meta(entry)
+        if meta is None or meta['version'] != STORE_VERSION:
+            return None
+        return entry
+
+    def import_log(self, log_file, chunksize=pipeline.DEFAULT_CHUNKSIZE):
+        """Parse a log in chunks and write its columns; returns the entry folder."""
+        stat = os.stat(log_file)
+        entry = self.entry_folder(log_file, stat)
+
+        # Build the entry in a private folder and rename it into place, so readers never see a partial entry
+        temp = f"{entry}.tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        try:
+            header = list(pd.read_csv(log_file, sep=';', nrows=0).columns)
+            writers = [_ColumnWriter(temp, f'{i}', pipeline.LOG_DTYPES.get(col, TEXT)) for i, col in enumerate(header)]
+
+            rows = 0
+            try:
+                for chunk in pipeline.read_log_chunks(log_file, chunksize, all_columns=True):
+                    for col, writer in zip(header, writers):
+                        writer.write(chunk[col])
+                    rows += len(chunk)
+            finally:
+                for writer in writers:
+                    writer.close()
+
+            # The metadata is written last; an entry without it is never read
+            columns = [dict(name=col, **writer.meta()) for col, writer in zip(header, writers)]
+            with open(os.path.join(temp, META_FILE), 'w') as f:
+                json.dump({'version': STORE_VERSION, 'source': os.path.abspath(log_file), 'size': stat.st_size,
+                           'mtime_ns': stat.st_mtime_ns, 'rows': rows, 'columns': columns}, f, indent=4)
+
+            self._remove_stale(log_file, keep=entry)
+            try:
+                os.rename(temp, entry)
+            except OSError:
+                # Another process imported the same log first
+                if self._read_meta(entry) is None:
+                    raise
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+
+        self.evict(keep=entry)
+        return entry
+
+    def open(self, log_file, all_columns=False):
+        """Return a log's rows as a DataFrame backed by the memory-mapped columns, importing the log first if needed.
+
+        Only the analysis columns are returned, as pipeline.read_log does, unless all_columns is set.
+        """
+        entry = self.current_entry(log_file) or self.import_log(log_file)
+        return self.read_entry(entry, all_columns)
+
+    def open_chunks(self, log_file, chunksize=pipeline.DEFAULT_CHUNKSIZE, all_columns=False):
+        """Yield a stored log chunksize rows at a time, like pipeline.read_log_chunks (numeric columns are views)."""
+        entry = self.current_entry(log_file) or self.import_log(log_file)
+        meta = self._use_entry(entry)
+        for start in range(0, meta['rows'], chunksize):
+            yield self._read_rows(entry, meta, start, min(start + chunksize, meta['rows']), all_columns)
+
+    def read_entry(self, entry, all_columns=False):
+        """Build the DataFrame of an entry folder without copying its numeric columns."""
+        meta = self._use_entry(entry)
+        return self._read_rows(entry, meta, 0, meta['rows'], all_columns)
+
+    def _use_entry(self, entry):
+        """Return the metadata of an entry and mark it as recently used."""
+        meta = self._read_meta(entry)
+        if meta is None:
+            raise FileNotFoundError(f"No stored log in {entry}")
+        os.utime(os.path.join(entry, META_FILE))
+        return meta
+
+    def _read_rows(self, entry, meta, start, stop, all_columns):
+        data = {}
+        for column in meta['columns']:
+            if all_columns or column['name'] in pipeline.LOG_COLUMNS:
+                data[column['name']] = _read_column(os.path.join(entry, column['file']), column['kind'], column['mask'],
+                                                    meta['rows'], start, stop)
+        return pd.DataFrame(data, columns=list(data), index=pd.RangeIndex(start, stop), copy=False)
+
+    def evict(self, keep=None):
+        """Delete the least recently used entries until the store fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.folder):
+            entry = os.path.join(self.folder, name)
+            meta_file = os.path.join(entry, META_FILE)
+            if entry == keep or not os.path.isfile(meta_file):
+                continue
+            size = sum(file.stat().st_size for file in os.scandir(entry) if file.is_file())
+            entries.append((os.stat(meta_file).st_mtime, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        if keep and os.path.isdir(keep):
+            total += sum(file.stat().st_size for file in os.scandir(keep) if file.is_file())
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # A column still mapped by another process cannot be deleted on Windows; it goes next time
+            shutil.rmtree(entry, ignore_errors=True)
+            if not os.path.exists(entry):
+                total -= size
+
+    def clear(self):
+        """Delete every stored log."""
+        for name in os.listdir(self.folder):
+            shutil.rmtree(os.path.join(self.folder, name), ignore_errors=True)
+
+    def _remove_stale(self, log_file, keep):
+        """Delete the entries of older versions of a log."""
+        prefix = self._source_key(log_file) + '-'
+        for name in os.listdir(self.folder):
+            entry = os.path.join(self.folder, name)
+            if name.startswith(prefix) and entry != keep and '.tmp-' not in name:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _read_meta(self, entry):
+        try:
+            with open(os.path.join(entry, META_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+def _map_column(file_path, dtype, rows):
+    """Memory-map one stored column (read-only), as a plain ndarray view of the mapping."""
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(file_path, dtype=dtype, mode='r', shape=(rows,)).view(np.ndarray)
+
+def _read_column(file_path, kind, has_mask, rows, start, stop):
+    """Return rows start:stop of a stored column: a view of the mapping for numbers, decoded strings for text.
+
+    Text is stored as UTF-8 values each ended by a NUL byte, with the byte offset of every row in .offsets.
+    """
+    if kind == TEXT:
+        offsets = _map_column(file_path + '.offsets', np.int64, rows + 1)
+        text = _map_column(file_path, np.uint8, int(offsets[-1]))[offsets[start]:offsets[stop]]
+        return np.array(text.tobytes().decode('utf-8').split('\0')[:-1], dtype=object)
+    if kind == 'Int16':
+        values = _map_column(file_path, np.int16, rows)[start:stop]
+        mask = _map_column(file_path + '.mask', np.bool_, rows)[start:stop] if has_mask else np.zeros(stop - start, dtype=np.bool_)
+        return pd.arrays.IntegerArray(values, mask)
+    return _map_column(file_path, np.dtype(kind), rows)[start:stop]
+
+def _kind(series):
+    """Return how a column of parsed log rows is stored."""
+    if series.dtype == 'Int16':
+        return 'Int16'
+    if series.dtype in (np.int64, np.float64):
+        return str(series.dtype)
+    return TEXT
+
+def _as_kind(series, kind):
+    """Convert a column to another storage kind: float64 for mixed numbers, text for anything else."""
+    if kind == 'float64':
+        return pd.Series(series.to_numpy(dtype=np.float64, na_value=np.nan), index=series.index)
+    return series.astype(object).where(series.notna(), '').astype(str)
+
+class _ColumnWriter:
+    """Writes one column of a log into an entry folder, a chunk at a time.
+
+    The column starts in the kind given (the compact dtype for analysis columns, text for the others). A chunk
+    that needs a wider kind (e.g. a blank Index, a fractional state) widens the column: what was written so far
+    is read back, converted and rewritten, so the stored column has the dtypes a whole-log read would give it.
+    """
+
+    def __init__(self, folder, file, kind):
+        self.folder = folder
+        self.file = file
+        self.path = os.path.join(folder, file)
+        self.kind = kind
+        self.rows = 0
+        self.has_mask = False
+        self.files = None
+
+    def meta(self):
+        return {'kind': self.kind, 'file': self.file, 'mask': self.has_mask}
+
+    def write(self, series):
+        kind = _kind(series)
+        if kind != self.kind:
+            wider = 'float64' if kind in NUMERIC_KINDS and self.kind in NUMERIC_KINDS else TEXT
+            if wider != self.kind:
+                self.widen(wider)
+            if wider != kind:
+                series = _as_kind(series, wider)
+
+        if self.files is None:
+            self.open()
+        if self.kind == TEXT:
+            encoded = [value.encode('utf-8') for value in series.to_numpy(dtype=object)]
+            lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)) + 1
+            self.files['data'].write(b'\0'.join(encoded) + b'\0' if encoded else b'')
+            (self.text_bytes + np.cumsum(lengths)).tofile(self.files['offsets'])
+            self.text_bytes += int(lengths.sum())
+        elif self.kind == 'Int16':
+            mask = series.isna().to_numpy()
+            series.to_numpy(dtype=np.int16, na_value=0).tofile(self.files['data'])
+            mask.tofile(self.files['mask'])
+            self.has_mask = self.has_mask or bool(mask.any())
+        else:
+            series.to_numpy(dtype=self.kind).tofile(self.files['data'])
+        self.rows += len(series)
+
+    def open(self):
+        self.files = {'data': open(self.path, 'wb')}
+        if self.kind == TEXT:
+            self.files['offsets'] = open(self.path + '.offsets', 'wb')
+            np.zeros(1, dtype=np.int64).tofile(self.files['offsets'])
+            self.text_bytes = 0
+        elif self.kind == 'Int16':
+            self.files['mask'] = open(self.path + '.mask', 'wb')
+
+    def close(self):
+        if self.files is None:
+            self.open()  # a column without rows still gets its (empty) files
+        for f in self.files.values():
+            f.close()
+        # Only keep the null mask of a column that had blanks
+        if self.kind == 'Int16' and not self.has_mask:
+            os.remove(self.path + '.mask')
+
+    def widen(self, kind):
+        """Convert the rows written so far to a wider kind and continue in it."""
+        written = None
+        if self.files is not None:
+            for f in self.files.values():
+                f.close()
+            written = pd.Series(_read_column(self.path, self.kind, True, self.rows, 0, self.rows))
+            for suffix in ['', '.mask', '.offsets']:
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+        self.kind, self.rows, self.has_mask, self.files = kind, 0, False, None
+        if written is not None and len(written):
+            self.write(_as_kind(written, kind))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import dimensioner logs into the columnar log store ahead of a run.")
+    parser.add_argument('logs', nargs='*', help="Log files to import (already imported, unchanged logs are skipped)")
+    parser.add_argument('--folder', default=DEFAULT_STORE_DIR, help="Folder of the log store (default: %(default)s)")
+    parser.add_argument('--clear', action='store_true', help="Delete every stored log first")
+    args = parser.parse_args(argv)
+
+    store = LogStore(args.folder)
+    if args.clear:
+        store.clear()
+
+    for log_file in args.logs:
+        entry = store.current_entry(log_file)
+        if entry:
+            print(f"{log_file}: up to date")
+        else:
+            entry = store.import_log(log_file)
+            print(f"{log_file}: imported {len(store.read_entry(entry))} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
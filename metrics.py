@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import ctypes
+import platform
+import threading
+from contextlib import contextmanager
+
+METRICS_FILE = "run_metrics.json"
+
+# How often the background thread samples the process memory while a stage runs
+SAMPLE_INTERVAL = 0.01
+
+if sys.platform == 'win32':
+    from ctypes import wintypes
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+def current_rss():
+    """Return the resident memory of this process in bytes, or None if the platform does not expose it."""
+    if sys.platform == 'win32':
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_current_process.restype = wintypes.HANDLE
+        if ctypes.windll.psapi.GetProcessMemoryInfo(get_current_process(), ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+class _MemorySampler(threading.Thread):
+    """Background thread keeping the highest resident memory seen since the last reset()."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss()
+        self._stopped = threading.Event()
+
+    def reset(self):
+        self.peak = current_rss()
+
+    def sample(self):
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return self.peak
+
+    def run(self):
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            self.sample()
+
+    def stop(self):
+        self._stopped.set()
+
+class StageMetrics:
+    """Wall time, rows in/out and peak process memory of one pipeline stage (summed over chunks)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows_in = None
+        self.rows_out = None
+        self.peak_bytes = None
+        self.error = None
+
+    def add_rows(self, rows_in=None, rows_out=None):
+        if rows_in is not None:
+            self.rows_in = (self.rows_in or 0) + rows_in
+        if rows_out is not None:
+            self.rows_out = (self.rows_out or 0) + rows_out
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_rss_mb': None if self.peak_bytes is None else round(self.peak_bytes / 1024 ** 2, 3),
+            'error': self.error
+        }
+
+class _StageRecorder:
+    """Handle returned by RunMetrics.stage() to report the rows a stage consumed and produced."""
+
+    def __init__(self, stage):
+        self._stage = stage
+        self.rows_in = None
+        self.rows_out = None
+
+class RunMetrics:
+    """Record wall time, rows in/out and peak memory for each stage of a run.
+
+    Peak memory is the highest resident memory of the process while the stage ran, sampled by a background
+    thread every SAMPLE_INTERVAL seconds when track_memory is set (cheap enough to leave on).
+    Stages with the same name, e.g. one per chunk, are summed into a single entry.
+    """
+
+    def __init__(self, log_file=None, track_memory=True):
+        self.log_file = log_file
+        self.stages = {}
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._end = None
+        self._sampler = None
+        if track_memory and current_rss() is not None:
+            self._sampler = _MemorySampler()
+            self._sampler.start()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time the enclosed block as stage name; set .rows_out (and .rows_in) on the returned handle."""
+        stage = self.stages.setdefault(name, StageMetrics(name))
+        recorder = _StageRecorder(stage)
+        recorder.rows_in = rows_in
+
+        if self._sampler:
+            self._sampler.reset()
+        start = time.perf_counter()
+        try:
+            yield recorder
+        except BaseException as e:
+            stage.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stage.seconds += time.perf_counter() - start
+            stage.calls += 1
+            stage.add_rows(recorder.rows_in, recorder.rows_out)
+            if self._sampler:
+                stage.peak_bytes = max(stage.peak_bytes or 0, self._sampler.sample())
+
+    def stop(self):
+        """Freeze the total time and stop sampling memory."""
+        if self._end is None:
+            self._end = time.perf_counter()
+        if self._sampler:
+            self._sampler.stop()
+            self._sampler = None
+
+    @property
+    def total_seconds(self):
+        return (self._end or time.perf_counter()) - self._start
+
+    def as_dict(self):
+        return {
+            'log_file': self.log_file,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'total_seconds': round(self.total_seconds, 6),
+            'host': platform.node(),
+            'platform': platform.platform(),
+            'python': sys.version.split()[0],
+            'stages': [stage.as_dict() for stage in self.stages.values()]
+        }
+
+    def write(self, metrics_file):
+        """Write the metrics as JSON."""
+        with open(metrics_file, 'w') as f:
+            json.dump(self.as_dict(), f, indent=4)
+
+    def table(self):
+        """Return the stages as a fixed-width text table."""
+        lines = [f"{'Stage':<16} {'Time (s)':>10} {'Rows in':>12} {'Rows out':>12} {'Peak RSS MB':>12}"]
+        for stage in self.stages.values():
+            rows_in = '' if stage.rows_in is None else f"{stage.rows_in:,}"
+            rows_out = '' if stage.rows_out is None else f"{stage.rows_out:,}"
+            peak = '' if stage.peak_bytes is None else f"{stage.peak_bytes / 1024 ** 2:.1f}"
+            lines.append(f"{stage.name:<16} {stage.seconds:>10.3f} {rows_in:>12} {rows_out:>12} {peak:>12}"
+                         + (f"  {stage.error}" if stage.error else ""))
+        lines.append(f"{'total':<16} {self.total_seconds:>10.3f}")
+        return '\n'.join(lines)
+
+class RunCancelled(Exception):
+    """Raised at the start of the next stage once a run has been cancelled."""
+
+class ProgressMetrics(RunMetrics):
+    """RunMetrics that also reports every stage as it starts, and stops the run when cancel is set.
+
+    report(stage, rows_read, total_rows, eta_seconds) is called before each stage; rows_read counts the log rows
+    read so far, total_rows is the expected number (e.g. pipeline.estimate_rows) and the ETA is None until both are known.
+    cancel is a threading.Event checked between stages, so a chunked run stops within one chunk.
+    """
+
+    def __init__(self, log_file=None, report=None, cancel=None, total_rows=None, track_memory=True):
+        super().__init__(log_file, track_memory)
+        self.report = report
+        self.cancel = cancel
+        self.total_rows = total_rows
+
+    @property
+    def rows_read(self):
+        stage = self.stages.get('read_log')
+        return (stage.rows_out or 0) if stage else 0
+
+    def eta(self):
+        """Return the estimated seconds left, from the read rate so far."""
+        rows_read = self.rows_read
+        if not self.total_rows or not rows_read:
+            return None
+        return max(self.total_seconds * (self.total_rows - rows_read) / rows_read, 0.0)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        if self.cancel is not None and self.cancel.is_set():
+            raise RunCancelled(f"Cancelled before {name}")
+        if self.report:
+            self.report(name, self.rows_read, self.total_rows, self.eta())
+        with super().stage(name, rows_in) as recorder:
+            yield recorder
+
+class NullMetrics:
+    """Stand-in for RunMetrics when nothing is being recorded."""
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        yield _StageRecorder(None)
+
+NO_METRICS = NullMetrics()
@@ -0,0 +1,473 @@
+import os
+import numpy as np
+import pandas as pd
+from alignment import align_dimensions
+from boxes import BoxReference
+from drift import DriftAccumulator
+from metrics import NO_METRICS
+from settings import resource_path
+from sweep import ToleranceSweep
+
+DIMENSIONS = ['Length', 'Width', 'Height']
+DELTAS = [f'Δ{col}' for col in DIMENSIONS]
+
+# Columns the analysis needs from a log; everything else is skipped when reading in chunks
+STATE_COLUMNS = ['DIM State 1', 'DIM State 2', 'DIM State 3', 'Status 1', 'Status 2', 'Status 3']
+LOG_COLUMNS = ['Index'] + DIMENSIONS + STATE_COLUMNS
+
+# Compact dtypes for the log columns (states are small codes, nullable in case a field is blank)
+LOG_DTYPES = {'Index': 'int64', **{col: 'float64' for col in DIMENSIONS}, **{col: 'Int16' for col in STATE_COLUMNS}}
+
+# Dtypes given to read_csv; Index and the states are inferred as they always were and only narrowed afterwards
+# (see compact_log), so a blank Index or a fractional state still reads instead of failing the cast
+READ_DTYPES = {col: 'float64' for col in DIMENSIONS}
+
+# Columns kept for each failed row: the ones printed in the summary, plus the Δ values for the failure explorer
+SUMMARY_FAILURE_COLUMNS = ['Index', 'Length', 'Width', 'Height', 'Box']
+FAILURE_COLUMNS = SUMMARY_FAILURE_COLUMNS + ['ΔLength', 'ΔWidth', 'ΔHeight']
+
+# Columns exported for each measurement, and their names in the output
+OUTPUT_COLUMNS = ['Index', 'Length', 'Width', 'Height', 'Box', 'ΔLength', 'ΔWidth', 'ΔHeight', 'DIM State 1', 'DIM State 2', 'DIM State 3']
+OUTPUT_NAMES = {
+    'DIM State 1': 'State 1',
+    'DIM State 2': 'State 2',
+    'DIM State 3': 'State 3'
+}
+
+# Rows per chunk in chunked mode
+DEFAULT_CHUNKSIZE = 100_000
+
+# Box classifiers: the trained KNN in model.joblib, or the built-in nearest-reference index
+CLASSIFIERS = ['knn', 'reference']
+
+def load_model(file_path=None, version=None):
+    """Load the box classifier: file_path if given, otherwise the requested (or active) version in the model
+    registry (see train.py), falling back to model.joblib when no model has been registered."""
+    import joblib  # imported here so runs with the reference classifier never load scikit-learn
+    from registry import ModelRegistry
+    if file_path is None:
+        file_path = ModelRegistry().model_file(version) or resource_path('model.joblib')
+    return joblib.load(file_path)
+
+def load_classifier(kind='knn', model_file=None, box_df=None, version=None):
+    """Load the KNN model or build the nearest-reference classifier from the box reference table."""
+    if kind == 'reference':
+        from classifier import ReferenceClassifier
+        return ReferenceClassifier(box_df if box_df is not None else load_reference())
+    elif kind == 'knn':
+        return load_model(model_file, version)
+    raise ValueError(f"Unknown classifier '{kind}', expected one of {CLASSIFIERS}")
+
+def load_reference(file_path=resource_path('Xactual.csv')):
+    """Load the table of actual box dimensions."""
+    return pd.read_csv(file_path)
+
+def compact_log(meas_df):
+    """Narrow the columns of parsed log rows to LOG_DTYPES wherever every value fits; the others keep their dtype."""
+    for col in meas_df.columns:
+        dtype = LOG_DTYPES.get(col)
+        if dtype is None or meas_df[col].dtype == dtype:
+            continue
+        try:
+            meas_df[col] = meas_df[col].astype(dtype)
+        except (ValueError, TypeError):
+            # e.g. a blank Index (float64) or a fractional state: keep what read_csv inferred
+            pass
+    return meas_df
+
+def read_log_csv(source, chunksize=None):
+    """Parse ';'-separated log text (a file or a buffer) with only the needed columns, in chunks if chunksize is given."""
+    reader = pd.read_csv(source, sep=';', usecols=lambda col: col in LOG_COLUMNS, dtype=READ_DTYPES, chunksize=chunksize)
+    if chunksize is None:
+        return compact_log(reader)
+    return (compact_log(chunk) for chunk in reader)
+
+def read_log(log_file, store=None):
+    """Read a whole ';'-separated log into memory, with only the needed columns (from the LogStore if one is given)."""
+    if store is not None:
+        return store.open(log_file)
+    return read_log_csv(log_file)
+
+def read_log_chunks(log_file, chunksize=DEFAULT_CHUNKSIZE, store=None, all_columns=False):
+    """Read a ';'-separated log in fixed-size chunks with only the needed columns (from the LogStore if one is given).
+
+    With all_columns, the log's other columns (Timestamp, Barcode...) come too, in the log's order, as the text
+    they were logged as; the analysis columns are parsed the same either way.
+    """
+    if store is not None:
+        return store.open_chunks(log_file, chunksize, all_columns)
+    chunks = read_log_csv(log_file, chunksize)
+    if not all_columns:
+        return chunks
+    return _with_text_columns(log_file, chunks, chunksize)
+
+def _with_text_columns(log_file, chunks, chunksize):
+    """Add the columns the analysis does not read to each chunk, read alongside them as text."""
+    columns = list(pd.read_csv(log_file, sep=';', nrows=0).columns)
+    others = [col for col in columns if col not in LOG_COLUMNS]
+    if not others:
+        yield from chunks
+        return
+    texts = pd.read_csv(log_file, sep=';', usecols=others, dtype=str, keep_default_na=False, chunksize=chunksize)
+    for chunk, text in zip(chunks, texts):
+        yield pd.concat([chunk, text], axis=1)[columns]
+
+def estimate_rows(log_file, sample_bytes=64 * 1024):
+    """Estimate the number of measurement rows in a log from its size and the line length of its first bytes."""
+    size = os.path.getsize(log_file)
+    with open(log_file, 'rb') as f:
+        sample = f.read(sample_bytes)
+    lines = sample.count(b'\n')
+    if size <= len(sample) or lines < 2:
+        return max(lines - 1, 0) + (1 if sample and not sample.endswith(b'\n') else 0)
+
+    # The header is usually longer than a row, so skip it when measuring the row length
+    header_end = sample.index(b'\n') + 1
+    row_bytes = (len(sample) - header_end) / (lines - 1)
+    return int((size - header_end) / row_bytes)
+
+def status_column(columns):
+    """Return the column that marks a populated measurement, or None if the log has neither."""
+    if "Status 3" in columns:
+        return "Status 3"
+    elif "DIM State 3" in columns:
+        return "DIM State 3"
+    return None
+
+def filter_status(meas_df, column):
+    """Drop the rows whose status column is 0 (no valid measurement)."""
+    if column is None:
+        return meas_df
+    return meas_df[(meas_df[column] != 0).fillna(True).astype(bool)]
+
+def classify(meas_df, knn, selected_boxes, reference):
+    """Round the measurements, predict their box and keep only the selected boxes.
+
+    reference is the boxes.BoxReference of the box table; each kept row also gets the code of its box ('Box Code').
+    """
+    meas_df = meas_df.copy()
+    meas_df[DIMENSIONS] = meas_df[DIMENSIONS].round(1) # rounds all L, W, H to nearest tenth (5.799999 -> 5.8)
+
+    # Predicts the actual dimensions based on measured data, and looks each box up once: the code then stands in
+    # for the label in the selection and the alignment
+    if len(meas_df) and hasattr(knn, 'predict_codes'):
+        # The classifier already returns codes; map its few classes onto the table's instead of every row's label
+        predicted = knn.predict_codes(meas_df[DIMENSIONS].to_numpy())
+        meas_df['Box'] = knn.labels(predicted)
+        codes = np.append(reference.codes(knn.classes_), -1)[predicted]
+    else:
+        if len(meas_df):
+            meas_df['Box'] = knn.predict(meas_df[DIMENSIONS])
+        else:
+            meas_df['Box'] = pd.Series(dtype=object)
+        codes = reference.codes(meas_df['Box'])
+    meas_df['Box Code'] = codes.astype('int16' if len(reference) < 2 ** 15 else 'int32')
+
+    return meas_df[reference.selection(selected_boxes)[codes]] # drops unselected boxes
+
+def align(meas_df, reference):
+    """Add the rotation-aligned Δ columns, taking the actual box dimensions from the boxes.BoxReference by box code."""
+    merged_df = meas_df.reset_index(drop=True)
+    codes = merged_df['Box Code'] if 'Box Code' in merged_df.columns else reference.codes(merged_df['Box'])
+
+    # Align Actual vs Result dimensions (i.e. "5.2x6.2x2.0" would be "6x5x2" box but calculated difference would be "5x6x2")
+    deltas, _ = align_dimensions(merged_df[DIMENSIONS].to_numpy(), reference.actual(codes))
+
+    # Round the differences to .2f, same as calculate_min_difference
+    merged_df[DELTAS] = deltas.round(2)
+
+    return merged_df
+
+def process_rows(meas_df, knn, selected_boxes, reference, metrics=NO_METRICS):
+    """Filter -> classify -> align one batch of raw log rows, recording each stage in metrics."""
+    # Drop unpopulated rows ("Status 3" or "DIM State 3" equal to 0)
+    column = status_column(meas_df.columns)
+    with metrics.stage('status_filter', rows_in=len(meas_df)) as stage:
+        meas_df = filter_status(meas_df, column)
+        stage.rows_out = len(meas_df)
+
+    # Predict the box for each measurement
+    with metrics.stage('classify', rows_in=len(meas_df)) as stage:
+        meas_df = classify(meas_df, knn, selected_boxes, reference)
+        stage.rows_out = len(meas_df)
+
+    # Align each measurement with the actual dimensions
+    with metrics.stage('align', rows_in=len(meas_df)) as stage:
+        merged_df = align(meas_df, reference)
+        stage.rows_out = len(merged_df)
+
+    return merged_df, column is not None
+
+def prepare_log(log_file, knn, box_df, metrics=NO_METRICS, store=None):
+    """Parse, status-filter, classify and align a whole log against every box in the reference table.
+
+    This is the expensive part of an analysis and does not depend on the tolerances or the box selection,
+    so it can be cached. Returns the aligned rows (output columns only) and whether the log had a status column.
+    """
+    # Create a dataframe of all the measurements from the log file
+    with metrics.stage('read_log') as stage:
+        meas_df = read_log(log_file, store)
+        stage.rows_out = len(meas_df)
+
+    reference = BoxReference(box_df)
+    merged_df, has_status = process_rows(meas_df, knn, reference.labels, reference, metrics)
+
+    return merged_df[[col for col in OUTPUT_COLUMNS if col in merged_df.columns]], has_status
+
+def select_boxes(merged_df, selected_boxes):
+    """Keep only the aligned rows of the selected boxes."""
+    return merged_df[merged_df['Box'].isin(selected_boxes)]
+
+def out_of_spec(merged_df, tolerances):
+    """Return one boolean Series per dimension marking the Δ values outside tolerance."""
+    return [round(merged_df[f'Δ{col}'].abs(), 1) > tolerances[col.lower()] for col in DIMENSIONS]
+
+def output_frame(merged_df):
+    """Select and rename the columns exported for each measurement."""
+    columns = [col for col in OUTPUT_COLUMNS if col in merged_df.columns]
+    return merged_df[columns].rename(columns=OUTPUT_NAMES)
+
+class SummaryAccumulator:
+    """Collect the counters, failure rows and calibration statistics for summary.txt one batch of aligned rows at a time.
+
+    With sweep_grids (see sweep.tolerance_grids), the same batches also fill a ToleranceSweep in .sweep.
+    """
+
+    def __init__(self, selected_boxes, tolerances, keep_failures=True, sweep_grids=None):
+        self.selected_boxes = selected_boxes
+        self.tolerances = tolerances
+        self.keep_failures = keep_failures  # False for long-running counters that never print the failed rows
+        self.has_status = True
+        self.total_rows = 0
+        self.count_ole = 0
+        self.count_owi = 0
+        self.count_ohi = 0
+        self.failure_counts = {}
+        self.failures = []
+        self.box_counts = {}
+        self.drift = DriftAccumulator()
+        self.sweep = ToleranceSweep(sweep_grids) if sweep_grids else None
+
+    def add(self, merged_df):
+        """Add one batch of aligned rows."""
+        off_length, off_width, off_height = out_of_spec(merged_df, self.tolerances)
+
+        # Calculate the frequency each column is out of spec
+        self.count_ole += int(off_length.sum())
+        self.count_owi += int(off_width.sum())
+        self.count_ohi += int(off_height.sum())
+        self.total_rows += merged_df.shape[0]
+
+        # Keep only the rows that failed, and only the columns printed in the summary or shown in the failure explorer
+        filtered_df = merged_df[off_length | off_width | off_height]
+        for label, count in filtered_df.groupby('Box').size().items():
+            self.failure_counts[label] = self.failure_counts.get(label, 0) + int(count)
+        if len(filtered_df) and self.keep_failures:
+            self.failures.append(filtered_df[FAILURE_COLUMNS])
+
+        # Count the measurements of each box, so per-box success rates can be reported
+        for label, count in merged_df.groupby('Box').size().items():
+            self.box_counts[label] = self.box_counts.get(label, 0) + int(count)
+
+        # Distribution of the Δ values per box and axis, for calibration
+        self.drift.add(merged_df)
+
+        # Pass/fail counts at every tolerance of the sweep grid
+        if self.sweep is not None:
+            self.sweep.add(merged_df)
+
+    @property
+    def seen_boxes(self):
+        return set(self.box_counts)
+
+    @property
+    def total_bad(self):
+        return sum(self.failure_counts.values())
+
+    @property
+    def success_rate(self):
+        return (self.total_rows - self.total_bad) / self.total_rows * 100 if self.total_rows else 0.0
+
+    def merge(self, other):
+        """Add the counters and failure rows of another accumulator (e.g. from another log or worker)."""
+        self.has_status = self.has_status and other.has_status
+        self.total_rows += other.total_rows
+        self.count_ole += other.count_ole
+        self.count_owi += other.count_owi
+        self.count_ohi += other.count_ohi
+        for label, count in other.failure_counts.items():
+            self.failure_counts[label] = self.failure_counts.get(label, 0) + count
+        if self.keep_failures:
+            self.failures.extend(other.failures)
+        for label, count in other.box_counts.items():
+            self.box_counts[label] = self.box_counts.get(label, 0) + count
+        self.drift.merge(other.drift)
+        if other.sweep is not None:
+            if self.sweep is None:
+                self.sweep = ToleranceSweep(other.sweep.grids)
+            self.sweep.merge(other.sweep)
+
+    def failed_rows(self, all_columns=False):
+        """Return every failed row sorted by box and index, with the summary's columns (or also the Δ values)."""
+        columns = FAILURE_COLUMNS if all_columns else SUMMARY_FAILURE_COLUMNS
+        if not self.failures:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(self.failures, ignore_index=True).sort_values(by=['Box', 'Index'])[columns]
+
+    def write(self, file, list_failures=True, max_listed=None):
+        """Print the summary in the same layout parse_log has always used (optionally without the failed rows).
+
+        With max_listed, only the first max_listed failed rows are printed, followed by how many were left out.
+        """
+        if not self.has_status:
+            print("Neither 'Status 3' nor 'DIM State 3' columns are present in the DataFrame.", file=file)
+
+        total_rows = self.total_rows
+
+        # Check whether any dimensions are out of spec
+        if self.count_ole > 0 or self.count_owi > 0 or self.count_ohi > 0:
+
+            # Print the occurrences each time length, width, and height is off
+            print(f"Length is off:  {self.count_ole} out of {total_rows} time(s)", file=file)
+            print(f"Width  is off:  {self.count_owi} ouf of {total_rows} time(s)", file=file)
+            print(f"Height is off:  {self.count_ohi} out of {total_rows} time(s)\n", file=file)
+
+        else:
+            print("All populated dimensions are within spec!", file=file)
+
+        total_bad = self.total_bad
+
+        # Convert the sorted failures to a string without the default index
+        failed_boxes = ""
+        if list_failures:
+            failed_df = self.failed_rows()
+            # Rendering every row as text is slow and unreadable on a bad run, so long lists can be cut short
+            if max_listed is not None and len(failed_df) > max_listed:
+                failed_boxes = failed_df.head(max_listed).to_string(index=False)
+                failed_boxes += f"\n... and {len(failed_df) - max_listed} more failed rows, not listed here (every row is in the results file)"
+            else:
+                failed_boxes = failed_df.to_string(index=False)
+
+        # Print boxes that fail
+        for label in sorted(self.failure_counts):
+            print(f"Box {label} is out of spec {self.failure_counts[label]} time(s)", file=file)
+
+        # Set the display option to expand the column width
+        pd.set_option('display.max_colwidth', None)
+
+        # Calculate and print the success rate; print failed boxes if applicable
+        success_rate = self.success_rate
+        print(f"\n{total_bad} out of {total_rows} boxes failed: {success_rate:.2f}% success rate\n", f"\nFailed boxes:\n{failed_boxes}" if total_bad and list_failures else "", file=file)
+
+        # Track missing boxes
+        missing_boxes = set(self.selected_boxes) - self.seen_boxes  # Boxes that didn't make it
+
+        # Print missing boxes information
+        if missing_boxes:
+            print("\nThe following selected boxes were missing in the results:", file=file)
+            for box in missing_boxes:
+                print(f"- {box}", file=file)
+        else:
+            print("\nAll selected boxes were included in the results.", file=file)
+
+        # Per-box, per-axis bias, spread and trend of the Δ values
+        self.drift.write(file)
+
+class AnalysisResult:
+    """Outcome of analysing one log: the summary counters plus the per-measurement results."""
+
+    def __init__(self, log_file, summary, results=None, results_file=None):
+        self.log_file = log_file
+        self.summary = summary
+        self.results = results  # DataFrame of every measurement (in-memory mode)
+        self.results_file = results_file  # CSV the results were streamed to (chunked mode)
+
+    @property
+    def total_rows(self):
+        return self.summary.total_rows
+
+    @property
+    def total_bad(self):
+        return self.summary.total_bad
+
+    @property
+    def success_rate(self):
+        return self.summary.success_rate
+
+def analyze_log(log_file, tolerances, selected_boxes, knn, box_df, chunked=False, chunksize=DEFAULT_CHUNKSIZE, results_file=None, cache=None,
+                metrics=NO_METRICS, store=None, sweep_grids=None):
+    """Run filter -> classify -> align -> tolerance check over one log and return an AnalysisResult.
+
+    In chunked mode the log is read chunksize rows at a time so memory stays bounded, and the
+    per-measurement results are streamed to results_file (CSV) instead of being kept.
+    Otherwise, a ResultCache (see cache.py) lets repeated runs over the same log skip straight to the tolerance check.
+    A LogStore (see logstore.py) replaces the text parsing with its memory-mapped columnar copy of the log.
+    Pass a metrics.RunMetrics to record the time, rows and memory of each stage.
+    With sweep_grids, the pass/fail counts at every tolerance of the grids are collected in the same pass (summary.sweep).
+    """
+    summary = SummaryAccumulator(selected_boxes, tolerances, sweep_grids=sweep_grids)
+
+    if not chunked:
+        # Parse, filter, classify and align the log, or reuse the cached result for this log and model
+        if cache is not None:
+            merged_df, summary.has_status = cache.prepare_log(log_file, knn, box_df, metrics, store)
+        else:
+            merged_df, summary.has_status = prepare_log(log_file, knn, box_df, metrics, store)
+
+        # Only the cheap steps depend on the box selection and tolerances
+        with metrics.stage('select_boxes', rows_in=len(merged_df)) as stage:
+            merged_df = select_boxes(merged_df, selected_boxes)
+            stage.rows_out = len(merged_df)
+
+        with metrics.stage('tolerance_check', rows_in=len(merged_df)) as stage:
+            summary.add(merged_df)
+            stage.rows_out = summary.total_bad
+
+        return AnalysisResult(log_file, summary, results=output_frame(merged_df))
+
+    # Built once per log, so each chunk looks its boxes up by code
+    reference = BoxReference(box_df)
+    results = open(results_file, 'w', newline='', encoding='utf-8') if results_file else None
+    try:
+        header = True
+        chunks = iter(read_log_chunks(log_file, chunksize, store))
+        while True:
+            with metrics.stage('read_log') as stage:
+                chunk = next(chunks, None)
+                stage.rows_out = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+
+            # Filter -> classify -> align -> tolerance check, one chunk at a time
+            merged_df, summary.has_status = process_rows(chunk, knn, selected_boxes, reference, metrics)
+            with metrics.stage('tolerance_check', rows_in=len(merged_df)) as stage:
+                failed_before = summary.total_bad
+                summary.add(merged_df)
+                stage.rows_out = summary.total_bad - failed_before
+
+            # Append this chunk's results to the CSV
+            if results:
+                with metrics.stage('write_results', rows_in=len(merged_df)):
+                    output_frame(merged_df).to_csv(results, index=False, header=header)
+                header = False
+    finally:
+        if results:
+            results.close()
+
+    return AnalysisResult(log_file, summary, results_file=results_file)
+
+def output_folder(log_file, base_folder, folder_name=None):
+    """Create and return the output folder for a log (<base_folder>/output/<log name, or folder_name>) and the log name."""
+    # Split the base name into filename and extension
+    file_name, _ = os.path.splitext(os.path.basename(log_file))
+
+    # Create a directory with filename
+    output_path = os.path.join(base_folder, f"output/{folder_name or file_name}")
+    os.makedirs(output_path, exist_ok=True)
+
+    return output_path, file_name
+
+def write_summary(result, summary_file, max_listed=None):
+    """Write summary.txt for an AnalysisResult, listing at most max_listed failed rows if given."""
+    with open(summary_file, 'w') as file:
+        result.summary.write(file, max_listed=max_listed)
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+from settings import DATA_DIR
+
+# Per user, so models registered from a packaged build outlive its temporary resource folder
+DEFAULT_REGISTRY_DIR = os.path.join(DATA_DIR, "models")
+REGISTRY_FILE = 'registry.json'
+
+class ModelRegistry:
+    """Versioned box classifiers in one folder, with registry.json holding each model's metadata and the active version.
+
+    Reading the registry only needs the standard library; joblib is imported when a model is saved or loaded.
+    """
+
+    def __init__(self, folder=DEFAULT_REGISTRY_DIR):
+        self.folder = folder
+        self.registry_file = os.path.join(folder, REGISTRY_FILE)
+
+    def _load(self):
+        if not os.path.exists(self.registry_file):
+            return {'active': None, 'models': []}
+        with open(self.registry_file, 'r') as f:
+            return json.load(f)
+
+    def _save(self, data):
+        os.makedirs(self.folder, exist_ok=True)
+        temp_file = self.registry_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_file, self.registry_file)
+
+    def versions(self):
+        """Return the metadata of every registered model, oldest first."""
+        return self._load()['models']
+
+    @property
+    def active_version(self):
+        return self._load()['active']
+
+    def entry(self, version):
+        """Return the metadata of one version."""
+        for entry in self.versions():
+            if entry['version'] == version:
+                return entry
+        raise KeyError(f"No model version '{version}' in {self.registry_file}")
+
+    def model_file(self, version=None):
+        """Return the file of a version (default: the active one), or None if nothing is registered."""
+        version = version or self.active_version
+        if version is None:
+            return None
+        return os.path.join(self.folder, self.entry(version)['file'])
+
+    def register(self, model, metadata, activate=False, training_df=None):
+        """Save a model with its metadata and return its version (a timestamp); optionally make it the active one.
+
+        training_df, the rows the model was fitted on, is saved next to it so the model can be refit later
+        (see training_data). Only activate makes the new model active; until then parse_log keeps its model.
+        """
+        import joblib
+
+        data = self._load()
+        version = time.strftime("%Y-%m-%d-%H%M%S")
+        existing = {entry['version'] for entry in data['models']}
+        suffix = 1
+        while version in existing:
+            suffix += 1
+            version = f"{time.strftime('%Y-%m-%d-%H%M%S')}-{suffix}"
+
+        os.makedirs(self.folder, exist_ok=True)
+        model_file = f"model_{version}.joblib"
+        joblib.dump(model, os.path.join(self.folder, model_file))
+        entry = {'version': version, 'file': model_file}
+        if training_df is not None:
+            entry['data_file'] = f"model_{version}.data.csv"
+            training_df.to_csv(os.path.join(self.folder, entry['data_file']), index=False)
+
+        data['models'].append({**entry, **metadata})
+        if activate:
+            data['active'] = version
+        self._save(data)
+        return version
+
+    def activate(self, version):
+        """Make a registered version the one parse_log uses."""
+        self.entry(version)
+        data = self._load()
+        data['active'] = version
+        self._save(data)
+
+    def training_data(self, version=None):
+        """Load the rows a version (default: the active one) was fitted on."""
+        import pandas as pd
+        version = version or self.active_version
+        entry = self.entry(version)
+        if 'data_file' not in entry:
+            raise FileNotFoundError(f"Model version '{version}' was registered without its training data")
+        return pd.read_csv(os.path.join(self.folder, entry['data_file']))
+
+    def load(self, version=None):
+        """Load a version (default: the active one)."""
+        import joblib
+        model_file = self.model_file(version)
+        if model_file is None:
+            raise FileNotFoundError(f"No active model in {self.registry_file}")
+        return joblib.load(model_file)
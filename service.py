@@ -0,0 +1,540 @@
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+from batch import process_log
+from cache import ResultCache, DEFAULT_CACHE_DIR
+from export import FORMATS
+from logstore import LogStore, DEFAULT_STORE_DIR
+from metrics import ProgressMetrics, RunCancelled, METRICS_FILE
+from pipeline import load_reference, load_classifier, estimate_rows, CLASSIFIERS, DEFAULT_CHUNKSIZE
+from settings import load_tolerances, load_selected_boxes, resource_path
+from sweep import tolerance_grids
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), ".dim-testing", "service")
+
+# Uploads are written to disk this many bytes at a time
+UPLOAD_BLOCK = 1024 * 1024
+
+FINISHED = ('done', 'failed', 'cancelled')
+
+CONTENT_TYPES = {
+    '.txt': 'text/plain; charset=utf-8',
+    '.csv': 'text/csv; charset=utf-8',
+    '.json': 'application/json',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.parquet': 'application/octet-stream',
+}
+
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+           411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+class HTTPError(Exception):
+    """An error answered to the client with its status code and a JSON message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def records(df):
+    """Return a DataFrame as JSON-ready records (NaN as null)."""
+    return json.loads(df.to_json(orient='records', force_ascii=False))
+
+def summary_dict(summary):
+    """Return the counters of a SummaryAccumulator as JSON-ready values."""
+    data = {
+        'total_rows': summary.total_rows,
+        'total_bad': summary.total_bad,
+        'success_rate': summary.success_rate,
+        'off': {'length': summary.count_ole, 'width': summary.count_owi, 'height': summary.count_ohi},
+        'failures': summary.failure_counts,
+        'boxes': summary.box_counts,
+        'missing_boxes': sorted(set(summary.selected_boxes) - summary.seen_boxes),
+        'has_status': summary.has_status,
+        'drift': records(summary.drift.table()),
+    }
+    if summary.sweep is not None:
+        curve_df = summary.sweep.curve()
+        curve_df.columns = [f"{tolerance:g}" for tolerance in curve_df.columns]
+        data['curve'] = json.loads(curve_df.to_json(orient='index'))
+    return data
+
+class Job:
+    """One analysis request: its log, options, state, progress events and outcome.
+
+    Only the event loop thread changes a job; the worker thread posts to it with call_soon_threadsafe.
+    """
+
+    def __init__(self, job_id, log_file, options, folder, uploaded):
+        self.id = job_id
+        self.log_file = log_file
+        self.options = options
+        self.folder = folder
+        self.uploaded = uploaded  # the log was sent with the request and lives in the job folder
+        self.state = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.progress = None
+        self.events = []
+        self.changed = asyncio.Event()
+        self.cancel = threading.Event()
+        self.summary = None
+        self.results_file = None
+        self.error = None
+        self.metrics = None
+
+    def publish(self, event):
+        """Record an event and wake everyone streaming this job."""
+        if event['event'] == 'progress':
+            self.progress = {key: event[key] for key in ('stage', 'rows_read', 'total_rows', 'eta')}
+        self.events.append(event)
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def set_state(self, state, **details):
+        self.state = state
+        if state == 'running':
+            self.started = time.time()
+        elif state in FINISHED:
+            self.finished = time.time()
+        self.publish({'event': 'state', 'state': state, **details})
+
+    def files(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(name for name in os.listdir(self.folder) if os.path.isfile(os.path.join(self.folder, name)))
+
+    def as_dict(self):
+        data = {
+            'id': self.id,
+            'state': self.state,
+            'log': os.path.basename(self.log_file),
+            'options': {key: value for key, value in self.options.items() if key != 'sweep_grids'},
+            'created': self.created,
+            'queued_seconds': (self.started or self.finished or time.time()) - self.created,
+            'run_seconds': ((self.finished or time.time()) - self.started) if self.started else None,
+            'progress': self.progress,
+        }
+        if self.error:
+            data['error'] = self.error
+        if self.summary is not None:
+            data['summary'] = summary_dict(self.summary)
+            data['results_file'] = os.path.basename(self.results_file) if self.results_file else None
+            data['files'] = self.files()
+        if self.metrics is not None:
+            data['stages'] = [stage.as_dict() for stage in self.metrics.stages.values()]
+        return data
+
+class AnalysisService:
+    """Keeps the model and the box reference table in memory and runs analysis jobs on a pool of threads.
+
+    At most `workers` jobs run at once; the others wait in the pool's queue, and new jobs are refused (503)
+    once `max_queue` jobs are waiting or running. Finished jobs are kept (with their output folder) until
+    more than `keep_jobs` have finished.
+
+    Jobs record the time and rows of each stage but not its memory: jobs share the process, so its peak
+    resident memory says nothing about any one of them.
+
+    Logs can be named by path only if the service has a data_root, and only inside it; without one, logs must be uploaded.
+    """
+
+    def __init__(self, knn, box_df, defaults, output_dir=DEFAULT_OUTPUT_DIR, workers=2, max_queue=64, keep_jobs=200,
+                 max_upload_bytes=1024 ** 3, cache=None, store=None, data_root=None):
+        self.knn = knn
+        self.box_df = box_df
+        self.box_labels = list(box_df['Box'].unique())
+        self.defaults = defaults
+        self.output_dir = output_dir
+        self.workers = workers
+        self.max_queue = max_queue
+        self.keep_jobs = keep_jobs
+        self.max_upload_bytes = max_upload_bytes
+        self.cache = cache
+        self.store = store
+        self.data_root = os.path.realpath(data_root) if data_root else None
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+        self.jobs = {}
+        self.started = time.time()
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Jobs
+
+    def active_jobs(self):
+        return [job for job in self.jobs.values() if job.state not in FINISHED]
+
+    def options(self, raw):
+        """Validate the run options of a request, filling in the service defaults.
+
+        raw is the JSON body or the query string, so each option may come as its JSON type or as text.
+        """
+        options = dict(self.defaults)
+        try:
+            tolerances = dict(options['tolerances'])
+            for axis in ['length', 'width', 'height']:
+                if raw.get(axis) not in (None, ''):
+                    if isinstance(raw[axis], bool):
+                        raise ValueError(f"{axis} must be a number, not {raw[axis]!r}")
+                    tolerances[axis] = float(raw[axis])
+                    if not math.isfinite(tolerances[axis]) or tolerances[axis] < 0:
+                        raise ValueError(f"{axis} must be a finite, non-negative tolerance, not {raw[axis]!r}")
+            options['tolerances'] = tolerances
+
+            boxes = raw.get('boxes')
+            if isinstance(boxes, str):
+                boxes = [box for box in boxes.split(',') if box]
+            if boxes is not None:
+                if not isinstance(boxes, list) or not all(isinstance(box, str) for box in boxes):
+                    raise ValueError(f"boxes must be a list of box names, not {boxes!r}")
+                unknown = [box for box in boxes if box not in self.box_labels]
+                if unknown:
+                    raise ValueError(f"Unknown boxes {unknown}, expected some of {self.box_labels}")
+                if boxes:
+                    options['selected_boxes'] = boxes
+
+            chunked = raw.get('chunked')
+            if isinstance(chunked, str) and chunked:
+                if chunked.lower() not in ('1', 'true', 'yes', '0', 'false', 'no'):
+                    raise ValueError(f"chunked must be true or false, not {chunked!r}")
+                options['chunked'] = chunked.lower() in ('1', 'true', 'yes')
+            elif chunked not in (None, ''):
+                if not isinstance(chunked, bool):
+                    raise ValueError(f"chunked must be true or false, not {chunked!r}")
+                options['chunked'] = chunked
+            if raw.get('format') not in (None, ''):
+                fmt = raw['format']
+                if fmt not in FORMATS + ['none']:
+                    raise ValueError(f"format must be one of {FORMATS + ['none']}")
+                options['format'] = None if fmt == 'none' else fmt
+
+            sweep = raw.get('sweep')
+            if sweep and not isinstance(sweep, str):
+                raise ValueError(f"sweep must be a grid like \"0:1:0.1\" or \"0.1,0.2,0.5\", not {sweep!r}")
+            options['sweep'] = sweep or None
+            # Grids too large for a sweep's memory are refused here, before the job is queued
+            options['sweep_grids'] = tolerance_grids(sweep) if sweep else None
+        except (ValueError, TypeError) as e:
+            # TypeError: a JSON value of the wrong type, e.g. a list for a tolerance
+            raise HTTPError(400, str(e))
+        return options
+
+    def resolve_path(self, log_file):
+        """Return the real path of a log named in a request, refusing anything outside the data root."""
+        if self.data_root is None:
+            raise HTTPError(400, "This service does not read logs by path (start it with --data-root), upload the log instead")
+        path = os.path.realpath(os.path.join(self.data_root, log_file))
+        if os.path.commonpath([self.data_root, path]) != self.data_root:
+            raise HTTPError(400, f"{log_file!r} is outside the data folder of the service")
+        if not os.path.isfile(path):
+            raise HTTPError(400, f"No log file at {log_file!r}")
+        return path
+
+    def new_job(self, log_file, options, uploaded=False, job_id=None):
+        """Create a queued job and start it in the background."""
+        if len(self.active_jobs()) >= self.max_queue:
+            raise HTTPError(503, f"{self.max_queue} jobs are already queued or running, try again later")
+        job_id = job_id or uuid.uuid4().hex[:12]
+        job = Job(job_id, log_file, options, os.path.join(self.output_dir, job_id), uploaded)
+        os.makedirs(job.folder, exist_ok=True)
+        self.jobs[job_id] = job
+        job.publish({'event': 'state', 'state': 'queued'})
+        asyncio.get_running_loop().create_task(self.run_job(job))
+        self.forget_old_jobs()
+        return job
+
+    async def run_job(self, job):
+        loop = asyncio.get_running_loop()
+        try:
+            job.summary, job.results_file, job.metrics = await loop.run_in_executor(self.executor, self.analyze, job, loop)
+            job.set_state('done', summary=summary_dict(job.summary))
+        except RunCancelled:
+            job.set_state('cancelled')
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.log_file}): {e}", exc_info=True)
+            job.error = f"{type(e).__name__}: {e}"
+            job.set_state('failed', error=job.error)
+
+    def analyze(self, job, loop):
+        """Run one job on a worker thread, posting its progress to the event loop."""
+        if job.cancel.is_set():
+            raise RunCancelled("Cancelled before it started")
+        loop.call_soon_threadsafe(job.set_state, 'running')
+
+        def report(stage, rows_read, total_rows, eta):
+            loop.call_soon_threadsafe(job.publish, {'event': 'progress', 'stage': stage, 'rows_read': rows_read,
+                                                    'total_rows': total_rows, 'eta': eta})
+
+        metrics = ProgressMetrics(job.log_file, report=report, cancel=job.cancel, total_rows=estimate_rows(job.log_file),
+                                  track_memory=False)
+        file_name = os.path.splitext(os.path.basename(job.log_file))[0]
+        try:
+            # Uploads are read once, so only logs given by path are worth importing into the log store
+            result, results_file = process_log(job.log_file, job.folder, file_name, job.options, self.knn, self.box_df, metrics,
+                                               self.cache, None if job.uploaded else self.store)
+        finally:
+            metrics.stop()
+            metrics.write(os.path.join(job.folder, METRICS_FILE))
+
+        # The failure rows are in summary.txt; the job only keeps the counters
+        result.summary.failures = []
+        return result.summary, results_file, metrics
+
+    def cancel_job(self, job):
+        if job.state in FINISHED:
+            raise HTTPError(409, f"Job {job.id} is already {job.state}")
+        job.cancel.set()
+
+    def forget_old_jobs(self):
+        """Drop the oldest finished jobs, and their output folders, beyond keep_jobs."""
+        finished = [job for job in self.jobs.values() if job.state in FINISHED]
+        for job in sorted(finished, key=lambda job: job.finished)[:max(len(finished) - self.keep_jobs, 0)]:
+            del self.jobs[job.id]
+            shutil.rmtree(job.folder, ignore_errors=True)
+
+    def get_job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPError(404, f"No job {job_id}")
+        return job
+
+    # HTTP
+
+    async def handle(self, reader, writer):
+        """Serve one request per connection."""
+        try:
+            method, path, query, headers = await read_request(reader)
+            await self.route(method, path, query, headers, reader, writer)
+        except HTTPError as e:
+            await send_json(writer, e.status, {'error': e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logging.error(f"Request failed: {e}", exc_info=True)
+            await send_json(writer, 500, {'error': f"{type(e).__name__}: {e}"})
+        finally:
+            writer.close()
+
+    async def route(self, method, path, query, headers, reader, writer):
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+
+        if parts == ['health'] and method == 'GET':
+            await send_json(writer, 200, {
+                'status': 'ok', 'uptime': time.time() - self.started, 'workers': self.workers,
+                'running': sum(job.state == 'running' for job in self.jobs.values()),
+                'queued': sum(job.state == 'queued' for job in self.jobs.values()),
+                'boxes': self.box_labels
+            })
+        elif parts == ['jobs'] and method == 'GET':
+            await send_json(writer, 200, [{'id': job.id, 'state': job.state, 'log': os.path.basename(job.log_file)}
+                                          for job in self.jobs.values()])
+        elif parts == ['jobs'] and method == 'POST':
+            job = await self.submit(query, headers, reader)
+            if query.get('wait') in ('1', 'true'):
+                while job.state not in FINISHED:
+                    await job.changed.wait()
+                await send_json(writer, 200, job.as_dict())
+            else:
+                await send_json(writer, 202, job.as_dict())
+        elif len(parts) == 2 and parts[0] == 'jobs' and method == 'GET':
+            await send_json(writer, 200, self.get_job(parts[1]).as_dict())
+        elif len(parts) == 2 and parts[0] == 'jobs' and method == 'DELETE':
+            job = self.get_job(parts[1])
+            self.cancel_job(job)
+            await send_json(writer, 202, job.as_dict())
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events' and method == 'GET':
+            await self.stream_events(self.get_job(parts[1]), writer)
+        elif len(parts) == 4 and parts[0] == 'jobs' and parts[2] == 'files' and method == 'GET':
+            job = self.get_job(parts[1])
+            if parts[3] not in job.files():
+                raise HTTPError(404, f"Job {job.id} has no file {parts[3]}")
+            await send_file(writer, os.path.join(job.folder, parts[3]))
+        elif parts and parts[0] in ('health', 'jobs'):
+            raise HTTPError(405, f"{method} is not supported on {path}")
+        else:
+            raise HTTPError(404, f"Nothing at {path}")
+
+    async def submit(self, query, headers, reader):
+        """Create a job from a request: a JSON body naming a log on this host, or the log itself as the body."""
+        length = headers.get('content-length')
+        if length is None:
+            raise HTTPError(411, "Content-Length is required")
+        try:
+            length = int(length)
+        except ValueError:
+            raise HTTPError(400, f"Invalid Content-Length: {length!r}")
+        if length < 0:
+            raise HTTPError(400, f"Invalid Content-Length: {length}")
+        if length > self.max_upload_bytes:
+            raise HTTPError(413, f"Uploads are limited to {self.max_upload_bytes} bytes")
+
+        if headers.get('content-type', '').startswith('application/json'):
+            try:
+                raw = json.loads(await reader.readexactly(length) or b'{}')
+            except ValueError as e:
+                raise HTTPError(400, f"Invalid JSON: {e}")
+            if not isinstance(raw, dict):
+                raise HTTPError(400, "The JSON body must be an object")
+            log_file = raw.get('path')
+            if not isinstance(log_file, str) or not log_file:
+                raise HTTPError(400, f"path must name a log file, not {log_file!r}")
+            log_file = self.resolve_path(log_file)
+            return self.new_job(log_file, self.options(raw))
+
+        # The log is the body; the options come in the query string
+        options = self.options(query)
+        job_id = uuid.uuid4().hex[:12]
+        upload_folder = os.path.join(self.output_dir, job_id, 'upload')
+        os.makedirs(upload_folder, exist_ok=True)
+        log_file = os.path.join(upload_folder, os.path.basename(query.get('name') or 'upload.log'))
+        try:
+            with open(log_file, 'wb') as f:
+                remaining = length
+                while remaining:
+                    block = await reader.readexactly(min(UPLOAD_BLOCK, remaining))
+                    f.write(block)
+                    remaining -= len(block)
+        except BaseException:
+            shutil.rmtree(os.path.dirname(upload_folder), ignore_errors=True)
+            raise
+        return self.new_job(log_file, options, uploaded=True, job_id=job_id)
+
+    async def stream_events(self, job, writer):
+        """Stream the job's events as newline-delimited JSON until it finishes."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        sent = 0
+        while True:
+            changed = job.changed
+            for event in job.events[sent:]:
+                writer.write(json.dumps(event).encode() + b'\n')
+            sent = len(job.events)
+            await writer.drain()
+            if job.state in FINISHED:
+                return
+            await changed.wait()
+
+async def read_request(reader):
+    """Read the request line and headers; return (method, path, query, headers)."""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.LimitOverrunError:
+        raise HTTPError(400, "Request headers are too large")
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        raise HTTPError(411, "Chunked uploads are not supported, send a Content-Length")
+
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return method.upper(), url.path, query, headers
+
+async def send_response(writer, status, body, content_type, extra_headers=""):
+    writer.write((f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                  f"Content-Length: {len(body)}\r\nConnection: close\r\n{extra_headers}\r\n").encode() + body)
+    await writer.drain()
+
+async def send_json(writer, status, data):
+    await send_response(writer, status, json.dumps(data, default=str).encode(), 'application/json')
+
+async def send_file(writer, file_path):
+    """Send a file in blocks, so large exports are never held in memory."""
+    size = os.path.getsize(file_path)
+    content_type = CONTENT_TYPES.get(os.path.splitext(file_path)[1].lower(), 'application/octet-stream')
+    writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nContent-Length: {size}\r\n"
+                  f"Content-Disposition: attachment; filename=\"{os.path.basename(file_path)}\"\r\nConnection: close\r\n\r\n").encode())
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(UPLOAD_BLOCK), b''):
+            writer.write(block)
+            await writer.drain()
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    """Run the HTTP server until cancelled; ready(server) is called once it listens."""
+    server = await asyncio.start_server(service.handle, host, port)
+    if ready:
+        ready(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for job in service.active_jobs():
+            job.cancel.set()
+        service.executor.shutdown(wait=False, cancel_futures=True)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve the analysis over HTTP on this machine, with the model kept in memory, "
+                                                 "so many dimensioner stations can share one analysis host.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Address to listen on (default: %(default)s; use 0.0.0.0 to accept other machines)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=2, help="Jobs analysed at the same time (default: %(default)s)")
+    parser.add_argument('--max-queue', type=int, default=64, help="Jobs waiting or running before new ones are refused (default: %(default)s)")
+    parser.add_argument('--keep-jobs', type=int, default=200, help="Finished jobs kept, with their output, before the oldest are deleted")
+    parser.add_argument('--max-upload-mb', type=float, default=1024, help="Largest log accepted as an upload, in MB (default: %(default)s)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help="Folder of the job outputs (default: %(default)s)")
+    parser.add_argument('--data-root', help="Folder of the logs jobs may name by path, relative to it (default: none, logs must be uploaded)")
+    parser.add_argument('--classifier', choices=CLASSIFIERS, default='knn', help="Trained KNN model, or the nearest box in the reference table (no scikit-learn)")
+    parser.add_argument('--model', help="KNN model file to use with --classifier knn (default: the active model in the registry, or model.joblib)")
+    parser.add_argument('--model-version', help="Registered model version to use instead of the active one (see train.py --list)")
+    parser.add_argument('--reference', default=resource_path('Xactual.csv'), help="CSV of the actual box dimensions")
+    parser.add_argument('--format', choices=FORMATS + ['none'], default='xlsx', help="Default export format of the results (default: %(default)s)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk for chunked jobs")
+    parser.add_argument('--cache', action='store_true', help="Reuse parsed and aligned logs from the result cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Folder of the result cache (default: %(default)s)")
+    parser.add_argument('--log-store', action='store_true', help="Read logs given by path from their columnar copies")
+    parser.add_argument('--log-store-dir', default=DEFAULT_STORE_DIR, help="Folder of the log store (default: %(default)s)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # Loaded once; every job reuses them
+    start = time.perf_counter()
+    box_df = load_reference(args.reference)
+    knn = load_classifier(args.classifier, args.model, box_df, args.model_version)
+    defaults = {
+        'tolerances': load_tolerances(),
+        'selected_boxes': load_selected_boxes() or list(box_df['Box'].unique()),
+        'chunked': False,
+        'chunksize': args.chunksize,
+        'format': None if args.format == 'none' else args.format,
+        'sweep': None,
+        'sweep_grids': None
+    }
+    service = AnalysisService(knn, box_df, defaults, args.output, workers=args.workers, max_queue=args.max_queue,
+                              keep_jobs=args.keep_jobs, max_upload_bytes=int(args.max_upload_mb * 1024 ** 2),
+                              cache=ResultCache(args.cache_dir) if args.cache else None,
+                              store=LogStore(args.log_store_dir) if args.log_store else None, data_root=args.data_root)
+    logging.info(f"Model and reference table loaded in {time.perf_counter() - start:.2f} s")
+
+    def ready(server):
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"Serving on http://{host}:{port} with {args.workers} worker(s) (Ctrl+C to stop)", flush=True)
+
+    try:
+        asyncio.run(serve(service, args.host, args.port, ready))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import os
+import sys
+import csv
+import json
+
+# Only the standard library is imported here, so the GUI can read its settings and show its window
+# before pandas, scikit-learn and openpyxl are loaded
+
+# Per-user folder of what is kept between runs; unlike resource_path, it is writable in a PyInstaller build
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".dim-testing")
+
+# Where the GUI keeps its result cache and log store and how large each may grow; storage.json can change any of these
+DEFAULT_STORAGE = {
+    'cache': {'enabled': True, 'folder': os.path.join(DATA_DIR, "cache"), 'max_mb': 1024},
+    'log_store': {'enabled': True, 'folder': os.path.join(DATA_DIR, "logs"), 'max_mb': 4096},
+}
+
+def resource_path(relative_path):
+    base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, relative_path)
+
+def load_tolerances(file_path=resource_path('tolerances.json')):
+    """Load the last used tolerances from a JSON file."""
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    return {"length": 0.2, "width": 0.2, "height": 0.2}  # Default values
+
+def save_selected_boxes(selected_boxes, file_path=resource_path("selected_boxes.json")):
+    """Save selected boxes to a file."""
+    with open(file_path, 'w') as f:
+        json.dump(selected_boxes, f)
+
+def load_selected_boxes(file_path=resource_path("selected_boxes.json")):
+    """Load selected boxes from a file."""
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    return None
+
+def load_box_labels(file_path=resource_path('Xactual.csv')):
+    """Return the unique box labels of the reference table, in file order, without loading pandas."""
+    with open(file_path, 'r', newline='') as f:
+        return list(dict.fromkeys(row['Box'] for row in csv.DictReader(f)))
+
+def load_storage(file_path=resource_path('storage.json')):
+    """Load the storage settings from a JSON file, e.g. {"cache": {"enabled": false}}; anything left out keeps its default."""
+    storage = {name: dict(values) for name, values in DEFAULT_STORAGE.items()}
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as f:
+            for name, values in json.load(f).items():
+                if name in storage:
+                    storage[name].update(values)
+    for values in storage.values():
+        values['folder'] = os.path.expanduser(values['folder'])
+    return storage
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+AXES = ['Length', 'Width', 'Height']
+
+SWEEP_FILE = "tolerance_sweep.csv"
+CURVE_FILE = "tolerance_curve.csv"
+
+# Default grid for every axis: 0.0 to 1.0 in steps of 0.1
+DEFAULT_GRID = "0:1:0.1"
+
+# Most tolerances in the grid of one axis. The sweep keeps a (points + 1)^3 histogram per box, so memory grows
+# with the cube of this; Δ is rounded to 0.1 before the check, so finer steps than 0.1 add no information anyway.
+MAX_GRID_POINTS = 51
+
+SWEEP_COLUMNS = ['Box', 'Length Tol', 'Width Tol', 'Height Tol', 'Measured', 'Passed', 'Failed', 'Success Rate']
+
+def parse_grid(spec):
+    """Parse a tolerance grid: "start:stop:step" (stop included) or a comma-separated list of values."""
+    if ':' in spec:
+        start, stop, step = (float(value) for value in spec.split(':'))
+        if not np.isfinite([start, stop, step]).all():
+            raise ValueError(f"Tolerance grid bounds must be finite numbers: {spec}")
+        if step <= 0:
+            raise ValueError(f"Tolerance grid step must be positive: {spec}")
+        # Checked before the values are generated, so a tiny step cannot allocate them all first
+        if int((stop - start) / step + 1e-9) + 1 > MAX_GRID_POINTS:
+            raise ValueError(f"Tolerance grid {spec} has more than {MAX_GRID_POINTS} points, use a larger step")
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = [float(value) for value in spec.split(',') if value.strip()]
+        if not np.isfinite(values).all():
+            raise ValueError(f"Tolerances of the grid must be finite numbers: {spec}")
+    # Rounded so 0.1 * 3 is the same tolerance as a typed 0.3
+    values = sorted({round(float(value), 10) for value in values})
+    if len(values) > MAX_GRID_POINTS:
+        raise ValueError(f"Tolerance grid {spec} has more than {MAX_GRID_POINTS} points")
+    if not values:
+        raise ValueError(f"Tolerance grid {spec!r} has no values")
+    return values
+
+def tolerance_grids(spec=DEFAULT_GRID, length=None, width=None, height=None):
+    """Return the grid of each axis: spec for all of them, unless an axis has its own."""
+    default = parse_grid(spec)
+    return {axis: parse_grid(own) if own else default for axis, own in zip(AXES, [length, width, height])}
+
+class ToleranceSweep:
+    """Pass/fail counts of every box at every point of a per-axis tolerance grid, from one pass over the aligned rows.
+
+    A row fails an axis when round(abs(Δ), 1) is above the tolerance, same as the tolerance check. Each rounded Δ
+    is placed with searchsorted at the number of grid tolerances it is above, and the rows are counted in a
+    (Length, Width, Height) histogram per box. Cumulative sums of the histogram then give the rows passing at
+    every grid point at once, so no tolerance needs its own pass over the rows. Sweeps merge like counters.
+    """
+
+    def __init__(self, grids):
+        self.grids = {axis: np.asarray(sorted(grids[axis]), dtype=np.float64) for axis in AXES}
+        self.shape = tuple(len(self.grids[axis]) + 1 for axis in AXES)
+        self.counts = {}  # Box -> int64 histogram of shape self.shape
+
+    def add(self, merged_df):
+        """Add one batch of aligned rows (with the Box and Δ columns)."""
+        if not len(merged_df):
+            return
+
+        bins = []
+        for axis in AXES:
+            rounded = np.round(np.abs(merged_df[f'Δ{axis}'].to_numpy(dtype=np.float64)), 1)
+            position = np.searchsorted(self.grids[axis], rounded, side='left')
+            # A missing Δ never compares above a tolerance, so it passes everywhere
+            bins.append(np.where(np.isnan(rounded), 0, position))
+
+        # Only the (box, cell) pairs that occur are counted, rather than a dense histogram per box of every chunk
+        codes, labels = pd.factorize(merged_df['Box'])
+        size = int(np.prod(self.shape))
+        keys, counts = np.unique(codes.astype(np.int64) * size + np.ravel_multi_index(bins, self.shape), return_counts=True)
+        bounds = np.searchsorted(keys, np.arange(len(labels) + 1) * size)
+
+        for code, label in enumerate(labels):
+            if label not in self.counts:
+                self.counts[label] = np.zeros(self.shape, dtype=np.int64)
+            cells = slice(bounds[code], bounds[code + 1])
+            self.counts[label].reshape(-1)[keys[cells] - code * size] += counts[cells]
+
+    def merge(self, other):
+        """Add the counts of another sweep over the same grids (e.g. from another chunk, log or worker)."""
+        for label, histogram in other.counts.items():
+            if label in self.counts:
+                self.counts[label] = self.counts[label] + histogram
+            else:
+                self.counts[label] = histogram.copy()
+
+    def passed(self, histogram):
+        """Return the rows passing at every grid point (one axis per dimension) from a histogram."""
+        cumulative = histogram.cumsum(axis=0).cumsum(axis=1).cumsum(axis=2)
+        return cumulative[:-1, :-1, :-1]
+
+    def histograms(self):
+        """Return the histogram of every box, sorted by box, followed by the total over all boxes as 'All'."""
+        histograms = {label: self.counts[label] for label in sorted(self.counts)}
+        if histograms:
+            histograms['All'] = sum(histograms.values())
+        return histograms
+
+    def table(self):
+        """Return the pass/fail counts of every box (and 'All') at every point of the grid, one row each."""
+        grid = np.meshgrid(*(self.grids[axis] for axis in AXES), indexing='ij')
+        frames = []
+        for label, histogram in self.histograms().items():
+            measured = int(histogram.sum())
+            passed = self.passed(histogram).ravel()
+            frames.append(pd.DataFrame({
+                'Box': label,
+                'Length Tol': grid[0].ravel(), 'Width Tol': grid[1].ravel(), 'Height Tol': grid[2].ravel(),
+                'Measured': measured, 'Passed': passed, 'Failed': measured - passed,
+                'Success Rate': passed / measured * 100 if measured else np.nan
+            }))
+        if not frames:
+            return pd.DataFrame(columns=SWEEP_COLUMNS)
+        return pd.concat(frames, ignore_index=True)[SWEEP_COLUMNS]
+
+    def curve(self):
+        """Return the success rate of every box (rows) when all three axes use the same tolerance (columns).
+
+        Only the tolerances found in every axis' grid are included.
+        """
+        common = sorted(set(self.grids['Length']) & set(self.grids['Width']) & set(self.grids['Height']))
+        positions = [np.searchsorted(self.grids[axis], common) for axis in AXES]
+        rows = {}
+        for label, histogram in self.histograms().items():
+            measured = histogram.sum()
+            passed = self.passed(histogram)[positions[0], positions[1], positions[2]]
+            rows[label] = passed / measured * 100 if measured else np.full(len(common), np.nan)
+        return pd.DataFrame.from_dict(rows, orient='index', columns=common).rename_axis('Box')
+
+    def write(self, file):
+        """Print the success rate of every box against a tolerance applied to all three axes."""
+        curve_df = self.curve()
+        if curve_df.empty or not len(curve_df.columns):
+            return
+        curve_df.columns = [f"{tolerance:g}" for tolerance in curve_df.columns]
+        print("Success rate (%) by tolerance on all three axes:", file=file)
+        print(curve_df.to_string(float_format=lambda value: f"{value:.2f}"), file=file)
+
+def write_sweep(sweep, sweep_file, curve_file):
+    """Write the full grid table and the per-box curve as CSV."""
+    sweep.table().to_csv(sweep_file, index=False, encoding='utf-8')
+    sweep.curve().to_csv(curve_file, encoding='utf-8')
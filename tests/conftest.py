@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+# The modules live at the top of the repository, next to dim-testing.py
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+REFERENCE_FILE = os.path.join(repo_dir, 'Xactual.csv')
+LOG_HEADER = "Index;Length;Width;Height;DIM State 1;DIM State 2;DIM State 3"
+
+def write_log(path, rows):
+    """Write a ';'-separated dimensioner log of (length, width, height) rows, all populated."""
+    with open(path, 'w') as f:
+        print(LOG_HEADER, file=f)
+        for i, (length, width, height) in enumerate(rows, start=1):
+            print(f"{i};{length};{width};{height};1;1;1", file=f)
+    return str(path)
+
+@pytest.fixture
+def box_df():
+    from pipeline import load_reference
+    return load_reference(REFERENCE_FILE)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from alignment import align_dimensions, calculate_min_difference, ROTATIONS
+
+def row_wise(measured, actual):
+    """The deltas of the row-wise calculate_min_difference, as the "%.2f" strings it returns."""
+    df = pd.DataFrame(np.hstack([measured, actual]),
+                      columns=['Length', 'Width', 'Height', 'Length Actual', 'Width Actual', 'Height Actual'])
+    return df.apply(calculate_min_difference, axis=1).to_numpy()
+
+def formatted(deltas):
+    return np.vectorize(lambda delta: f"{delta:.2f}")(deltas)
+
+def test_matches_the_row_wise_version():
+    rng = np.random.default_rng(1)
+    actual = rng.choice([2.0, 3.0, 4.0, 5.0, 6.0, 10.0, 15.0], size=(500, 3))
+    measured = (actual[np.arange(500)[:, None], rng.permuted(np.tile([0, 1, 2], (500, 1)), axis=1)]
+                + rng.normal(0, 0.3, size=(500, 3))).round(2)
+
+    deltas, _ = align_dimensions(measured, actual)
+    assert (formatted(deltas) == row_wise(measured, actual)).all()
+
+@pytest.mark.parametrize('measured, actual', [
+    ([4.0, 4.0, 4.0], [4.0, 4.0, 4.0]),   # a cube: every rotation is the same
+    ([5.0, 5.0, 5.0], [4.0, 6.0, 5.0]),   # every rotation is off by 2 in total
+    ([6.0, 4.5, 4.5], [6.0, 4.0, 5.0]),   # two rotations tie
+    ([0.0, 0.0, 0.0], [6.0, 5.0, 2.0]),   # an unpopulated row
+    ([0.0, 0.0, 0.0], [0.0, 0.0, 0.0]),
+])
+def test_ties_keep_the_first_rotation(measured, actual):
+    measured, actual = np.array([measured]), np.array([actual])
+    deltas, best = align_dimensions(measured, actual)
+    assert (formatted(deltas) == row_wise(measured, actual)).all()
+
+    totals = [np.abs(measured[0] - actual[0, rotation]).sum() for rotation in ROTATIONS]
+    assert best[0] == int(np.argmin(totals))  # argmin returns the first of equal totals
+
+def test_empty_batch():
+    deltas, best = align_dimensions(np.empty((0, 3)), np.empty((0, 3)))
+    assert deltas.shape == (0, 3) and best.shape == (0,)
@@ -0,0 +1,54 @@
+import os
+import pytest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from conftest import REFERENCE_FILE, write_log
+from batch import analyze_logs, write_fleet_summary, output_names, _future_outcome
+from pipeline import SummaryAccumulator
+
+TOLERANCES = {'length': 0.2, 'width': 0.2, 'height': 0.2}
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_log_without_selected_boxes_is_processed(tmp_path, chunked):
+    # Every row is a 10x10x10, which is not among the selected boxes, so no row is left to check
+    log_file = write_log(tmp_path / 'station.log', [(10.0, 10.0, 10.0)] * 5)
+    outcomes = analyze_logs([log_file], TOLERANCES, ['4x4x4'], None, REFERENCE_FILE, str(tmp_path),
+                            workers=1, chunked=chunked, fmt=None, classifier='reference', track_memory=False)
+
+    summary = outcomes[log_file]
+    assert isinstance(summary, SummaryAccumulator)
+    assert summary.total_rows == 0
+    with open(tmp_path / 'output' / 'station' / 'summary.txt') as f:
+        assert "0 out of 0 boxes failed: 0.00% success rate" in f.read()
+
+    write_fleet_summary(outcomes, ['4x4x4'], TOLERANCES, str(tmp_path))
+    with open(tmp_path / 'output' / 'fleet_summary.txt') as f:
+        assert "station: no populated measurements" in f.read()
+
+def test_empty_log_is_processed(tmp_path):
+    log_file = write_log(tmp_path / 'empty.log', [])
+    outcomes = analyze_logs([log_file], TOLERANCES, ['4x4x4'], None, REFERENCE_FILE, str(tmp_path),
+                            workers=1, fmt=None, classifier='reference', track_memory=False)
+    assert outcomes[log_file].total_rows == 0
+    assert os.path.exists(tmp_path / 'output' / 'empty' / 'summary.txt')
+
+def test_same_named_logs_get_their_own_folders(tmp_path):
+    log_files = []
+    for station in ['a', 'b']:
+        os.makedirs(tmp_path / station)
+        log_files.append(write_log(tmp_path / station / 'dims.log', [(4.0, 4.0, 4.0)] * (3 if station == 'a' else 5)))
+    outcomes = analyze_logs(log_files, TOLERANCES, ['4x4x4'], None, REFERENCE_FILE, str(tmp_path / 'out'),
+                            workers=2, fmt=None, classifier='reference', track_memory=False)
+
+    names = output_names(log_files)
+    assert len(set(names.values())) == 2
+    assert [outcomes[log_file].total_rows for log_file in log_files] == [3, 5]
+    for log_file in log_files:
+        assert os.path.exists(tmp_path / 'out' / 'output' / names[log_file] / 'summary.txt')
+
+def test_crashed_worker_is_reported_per_log():
+    future = Future()
+    future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+    log_file, summary, error, metrics = _future_outcome(future, 'station.log')
+    assert (log_file, summary) == ('station.log', None)
+    assert error.startswith('BrokenProcessPool')
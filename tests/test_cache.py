@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import pandas as pd
+from conftest import write_log
+from cache import ResultCache
+from classifier import ReferenceClassifier
+from pipeline import prepare_log
+from settings import load_storage, DEFAULT_STORAGE
+
+ROWS = [(4.0, 4.0, 4.1), (6.1, 5.0, 2.0), (10.0, 10.0, 9.7)]
+
+class Stages:
+    """A stand-in for RunMetrics that records which stages ran."""
+
+    def __init__(self):
+        self.names = []
+
+    def stage(self, name, rows_in=None):
+        self.names.append(name)
+        return StageRecord()
+
+class StageRecord:
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def test_miss_then_hit(tmp_path, box_df):
+    log_file = write_log(tmp_path / 'station.log', ROWS)
+    cache = ResultCache(str(tmp_path / 'cache'))
+    knn = ReferenceClassifier(box_df)
+
+    first = Stages()
+    merged_df, has_status = cache.prepare_log(log_file, knn, box_df, first)
+    assert 'read_log' in first.names and 'cache_store' in first.names
+
+    second = Stages()
+    cached_df, cached_status = cache.prepare_log(log_file, knn, box_df, second)
+    assert 'read_log' not in second.names
+    assert cached_status == has_status
+    pd.testing.assert_frame_equal(cached_df, merged_df)
+    pd.testing.assert_frame_equal(cached_df, prepare_log(log_file, knn, box_df)[0])
+
+def test_changed_log_or_model_is_a_miss(tmp_path, box_df):
+    log_file = write_log(tmp_path / 'station.log', ROWS)
+    cache = ResultCache(str(tmp_path / 'cache'))
+    knn = ReferenceClassifier(box_df)
+    key = cache.key(log_file, knn, box_df)
+    cache.prepare_log(log_file, knn, box_df)
+    assert cache.get(key) is not None
+
+    # Another model, or another reference table, is another key
+    assert cache.key(log_file, ReferenceClassifier(box_df, relative_cutoff=None), box_df) != key
+    assert cache.key(log_file, knn, box_df.head(5)) != key
+
+    # The same log rewritten with other rows is hashed again
+    write_log(log_file, ROWS[:2])
+    stat = os.stat(log_file)
+    os.utime(log_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_key = cache.key(log_file, knn, box_df)
+    assert new_key != key
+    assert cache.get(new_key) is None
+    assert len(cache.prepare_log(log_file, knn, box_df)[0]) == 2
+
+def test_least_recently_used_entries_are_evicted(tmp_path, box_df):
+    knn = ReferenceClassifier(box_df)
+    cache = ResultCache(str(tmp_path / 'cache'))
+    keys = []
+    for i, name in enumerate(['a', 'b', 'c']):
+        # Different rows, as entries are keyed on the log's contents
+        log_file = write_log(tmp_path / f'{name}.log', ROWS * (50 + i))
+        keys.append(cache.key(log_file, knn, box_df))
+        cache.prepare_log(log_file, knn, box_df)
+    entry_size = max(os.path.getsize(cache.entry_path(key)) for key in keys)
+
+    # Use 'a' last, so 'b' is the least recently used
+    for key, age in zip(keys, [10, 30, 20]):
+        os.utime(cache.entry_path(key), (time.time() - age, time.time() - age))
+    cache.get(keys[0])
+
+    cache.max_bytes = entry_size * 2
+    cache.evict()
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+def test_storage_settings(tmp_path):
+    assert load_storage(str(tmp_path / 'missing.json')) == DEFAULT_STORAGE
+
+    settings_file = tmp_path / 'storage.json'
+    settings_file.write_text(json.dumps({'cache': {'enabled': False, 'folder': '~/elsewhere'}}))
+    storage = load_storage(str(settings_file))
+    assert storage['cache'] == {'enabled': False, 'folder': os.path.expanduser('~/elsewhere'), 'max_mb': DEFAULT_STORAGE['cache']['max_mb']}
+    assert storage['log_store'] == DEFAULT_STORAGE['log_store']
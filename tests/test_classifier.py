@@ -0,0 +1,27 @@
+import numpy as np
+from classifier import ReferenceClassifier, UNKNOWN_LABEL
+
+def test_matches_boxes_in_any_orientation(box_df):
+    classifier = ReferenceClassifier(box_df)
+    X = [[15.1, 9.9, 7.0], [7.0, 15.0, 10.1], [2.0, 4.1, 3.9], [0.0, 0.0, 0.0]]
+    assert classifier.predict(X).tolist() == ['15x10x7', '15x10x7', '4x4x2', '0x0x0']
+
+def test_rejects_measurements_far_from_every_box(box_df):
+    classifier = ReferenceClassifier(box_df)
+    X = [[36, 12, 10], [10, 10, 8], [402, 302, 202], [2.4, 2.4, 1.2]]
+    assert (classifier.predict_codes(X) == -1).all()
+    assert classifier.predict(X).tolist() == [UNKNOWN_LABEL] * 4
+
+def test_cutoff_can_be_disabled(box_df):
+    classifier = ReferenceClassifier(box_df, relative_cutoff=None)
+    assert classifier.predict([[10, 10, 8]]).tolist() == ['10x10x10']
+
+def test_unknown_rows_are_not_counted(box_df, tmp_path):
+    from conftest import write_log
+    from pipeline import analyze_log
+    log_file = write_log(tmp_path / 'station.log', [(10.0, 10.0, 10.1), (10.0, 10.0, 8.0), (36.0, 12.0, 10.0)])
+    tolerances = {'length': 0.2, 'width': 0.2, 'height': 0.2}
+    result = analyze_log(log_file, tolerances, list(box_df['Box']), ReferenceClassifier(box_df), box_df)
+    assert result.total_rows == 1
+    assert result.total_bad == 0
+    assert np.array_equal(result.results['Box'].unique(), ['10x10x10'])
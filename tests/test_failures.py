@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from failures import FailureTable, COLUMNS
+
+TOLERANCES = {'length': 0.2, 'width': 0.2, 'height': 0.2}
+
+@pytest.fixture
+def table():
+    failed_df = pd.DataFrame([
+        (1, '4x4x4', 4.5, 4.0, 4.0, 0.5, 0.0, 0.0),
+        (2, '6x5x2', 6.0, 5.3, 2.0, 0.0, 0.3, 0.0),
+        (3, '4x4x4', 4.0, 4.0, 3.1, 0.0, 0.0, -0.9),
+        (4, '10x10x10', 10.4, 10.25, 10.0, 0.4, 0.25, 0.0),  # |ΔWidth| rounds to 0.2, within tolerance
+        (5, '6x5x2', 6.3, 5.0, 2.3, 0.3, 0.0, 0.3),
+        (6, '4x4x4', 4.0, 4.0, 4.6, np.nan, np.nan, 0.6),
+    ], columns=['Index', 'Box', 'Length', 'Width', 'Height', 'ΔLength', 'ΔWidth', 'ΔHeight'])
+    return FailureTable(failed_df, TOLERANCES)
+
+def indexes(view):
+    return [row[0] for row in view.rows(0, len(view))]
+
+def test_sorted_by_box_then_index_by_default(table):
+    assert indexes(table.query()) == [4, 1, 3, 6, 2, 5]
+
+def test_delta_columns_sort_by_magnitude(table):
+    # Ties (|ΔHeight| = 0) stay in box, then index order
+    assert indexes(table.query('ΔHeight')) == [4, 1, 2, 5, 6, 3]
+    assert indexes(table.query('Max |Δ|')) == [2, 5, 4, 1, 6, 3]
+
+def test_descending_reverses_the_order(table):
+    assert indexes(table.query('Max |Δ|', descending=True)) == [3, 6, 1, 4, 5, 2]
+    assert indexes(table.query('Index', descending=True)) == [6, 5, 4, 3, 2, 1]
+
+def test_filters(table):
+    assert indexes(table.query('Index', min_delta=0.4)) == [1, 3, 4, 6]
+    assert indexes(table.query('Index', min_delta=0.95)) == []
+    assert indexes(table.query('Index', axis='Length')) == [1, 4, 5]
+    assert indexes(table.query('Index', axis='Width')) == [2]
+    assert indexes(table.query('Index', boxes=['4x4x4', '6x5x2'], axis='Height')) == [3, 5, 6]
+    assert indexes(table.query('Max |Δ|', descending=True, boxes=['4x4x4'], min_delta=0.55)) == [3, 6]
+
+def test_rows_at_the_end_of_the_view(table):
+    view = table.query('Index')
+    assert len(view.rows(4, 10)) == 2
+    assert view.rows(6, 10) == []
+    assert view.rows(5, 1) == [(6, '4x4x4', '4.00', '4.00', '4.60', '', '', '0.60', '0.60', 'H')]
+    assert view.rows(4, 1)[0][-1] == 'L H'
+
+def test_view_frame_matches_its_rows(table):
+    view = table.query('ΔLength', descending=True, axis='Length')
+    frame = view.frame()
+    assert list(frame.columns) == COLUMNS
+    assert frame['Index'].tolist() == indexes(view)
+
+def test_box_counts(table):
+    assert table.box_counts() == {'10x10x10': 1, '4x4x4': 3, '6x5x2': 2}
+
+def test_empty_table():
+    empty = pd.DataFrame(columns=['Index', 'Box', 'Length', 'Width', 'Height', 'ΔLength', 'ΔWidth', 'ΔHeight'])
+    view = FailureTable(empty, TOLERANCES).query('Max |Δ|', min_delta=0.1)
+    assert len(view) == 0 and view.rows(0, 50) == []
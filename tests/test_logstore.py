@@ -0,0 +1,93 @@
+import os
+import pandas as pd
+import pytest
+from conftest import write_log
+from combine_logs import combine_logs
+from logstore import LogStore
+from pipeline import read_log, read_log_chunks
+
+EXTRA_LOG = ("Timestamp;Index;Barcode;Length;Width;Height;Weight;DIM State 1;DIM State 2;DIM State 3\n"
+             "2024-05-01 08:00;1;00001;4.10;4.0;4.0;2.50;1;1;1\n"
+             "2024-05-01 08:01;2;0002;4.0;4.0;4.0;;1;;1\n"
+             "2024-05-01 08:02;3;é;4.0;4.0;3.9;1.5;;1;0\n"
+             "2024-05-01 08:03;4;;6.1;5.0;2.0;1.5;1;1;0\n"
+             "2024-05-01 08:04;5;00005;6.0;5.0;2.0;3;1;1;1\n")
+
+@pytest.fixture
+def store(tmp_path):
+    return LogStore(str(tmp_path / 'store'))
+
+@pytest.fixture
+def extra_log(tmp_path):
+    log_file = tmp_path / 'extra.log'
+    log_file.write_text(EXTRA_LOG, encoding='utf-8')
+    return str(log_file)
+
+@pytest.mark.parametrize('chunksize', [1, 2, 100])
+def test_round_trip_with_blank_states(store, extra_log, chunksize):
+    store.import_log(extra_log, chunksize=chunksize)
+    pd.testing.assert_frame_equal(store.open(extra_log), read_log(extra_log))
+    assert store.open(extra_log)['DIM State 2'].isna().tolist() == [False, True, False, False, False]
+
+    # The other columns come back as the text that was logged
+    everything = store.open(extra_log, all_columns=True)
+    assert list(everything.columns) == EXTRA_LOG.splitlines()[0].split(';')
+    assert everything['Barcode'].tolist() == ['00001', '0002', 'é', '', '00005']
+    assert everything['Weight'].tolist() == ['2.50', '', '1.5', '1.5', '3']
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3])
+def test_blank_index_and_fractional_state_widen_the_column(store, tmp_path, chunksize):
+    log_file = tmp_path / 'odd.log'
+    log_file.write_text("Index;Length;Width;Height;DIM State 1;DIM State 2;DIM State 3\n"
+                        "1;4.0;4.0;4.0;1;1;1\n"
+                        ";4.1;4.0;4.0;1;1;1\n"
+                        "3;4.0;4.0;3.9;;1.5;0\n")
+    store.import_log(str(log_file), chunksize=chunksize)
+
+    stored = store.open(str(log_file))
+    pd.testing.assert_frame_equal(stored, read_log(str(log_file)))
+    assert stored['Index'].dtype == 'float64' and stored['DIM State 2'].dtype == 'float64'
+
+@pytest.mark.parametrize('chunksize', [1, 2, 4, 100])
+def test_chunks_match_the_log(store, extra_log, chunksize):
+    for all_columns in [False, True]:
+        stored = list(store.open_chunks(extra_log, chunksize, all_columns))
+        parsed = list(read_log_chunks(extra_log, chunksize, all_columns=all_columns))
+        assert len(stored) == len(parsed)
+        for stored_chunk, parsed_chunk in zip(stored, parsed):
+            pd.testing.assert_frame_equal(stored_chunk, parsed_chunk, check_dtype=False)
+
+def test_empty_log(store, tmp_path):
+    log_file = write_log(tmp_path / 'empty.log', [])
+    assert len(store.open(log_file)) == 0
+    assert list(store.open(log_file).columns) == list(read_log(log_file).columns)
+    assert list(store.open_chunks(log_file)) == []
+
+def test_changed_log_is_imported_again(store, tmp_path):
+    log_file = write_log(tmp_path / 'station.log', [(4.0, 4.0, 4.0)])
+    first = store.import_log(log_file)
+    assert store.current_entry(log_file) == first
+
+    write_log(log_file, [(4.0, 4.0, 4.0), (6.0, 5.0, 2.0)])
+    os.utime(log_file, ns=(0, os.stat(log_file).st_mtime_ns + 10 ** 9))
+    assert store.current_entry(log_file) is None
+    assert len(store.open(log_file)) == 2
+    assert not os.path.exists(first)
+
+@pytest.mark.parametrize('chunksize', [1, 2, 100])
+def test_combine_with_and_without_the_store(store, extra_log, tmp_path, chunksize):
+    status_log = tmp_path / 'status.log'
+    status_log.write_text("Index;Length;Width;Height;Status 1;Status 2;Status 3\n1;6;5;2;1;1;1\n;6.1;5;2;1;1;0\n")
+    logs = [extra_log, str(status_log)]
+
+    plain, stored = str(tmp_path / 'plain.log'), str(tmp_path / 'stored.log')
+    combine_logs(logs, plain, chunksize, source=True)
+    combine_logs(logs, stored, chunksize, source=True, store=store)
+    with open(plain, encoding='utf-8') as f, open(stored, encoding='utf-8') as g:
+        text = f.read()
+        assert g.read() == text
+
+    # Whole numbers are written without ".0", even in a column that had blanks
+    lines = text.splitlines()
+    assert lines[1].startswith("2024-05-01 08:00;1;00001;4.1;4.0;4.0;2.50;1;1;1;")
+    assert lines[-1].split(';')[1] == ''
@@ -0,0 +1,86 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from classifier import ReferenceClassifier
+from pipeline import analyze_log, read_log, read_log_chunks
+
+TOLERANCES = {'length': 0.2, 'width': 0.2, 'height': 0.2}
+BOXES = ['4x4x4', '6x5x2', '10x10x10', '15x10x7']
+
+# The log layouts seen in the field: DIM State columns only, Status columns, and extra columns around them
+SCHEMAS = {
+    'dim_state': ['Index', 'Length', 'Width', 'Height', 'DIM State 1', 'DIM State 2', 'DIM State 3'],
+    'status': ['Index', 'Length', 'Width', 'Height', 'Status 1', 'Status 2', 'Status 3'],
+    'extra': ['Timestamp', 'Index', 'Barcode', 'Length', 'Width', 'Height', 'Weight', 'DIM State 1', 'DIM State 2', 'DIM State 3'],
+}
+
+def write_schema_log(path, columns, rows=400):
+    """Write a log with the given columns: a mix of boxes, in any orientation, some off, unpopulated or blank."""
+    rng = np.random.default_rng(7)
+    actual = [(4, 4, 4), (6, 5, 2), (10, 10, 10), (15, 10, 7), (12, 9, 1)]
+    with open(path, 'w') as f:
+        print(';'.join(columns), file=f)
+        for i in range(1, rows + 1):
+            dims = list(actual[rng.integers(len(actual))])
+            rng.shuffle(dims)
+            dims = [round(dim + rng.normal(0, 0.15), 2) for dim in dims]
+            state = 0 if i % 17 == 0 else 1
+            values = {'Index': i, 'Length': dims[0], 'Width': dims[1], 'Height': dims[2], 'Timestamp': f"2024-05-01 08:{i % 60:02d}",
+                      'Barcode': f"00{i:06d}", 'Weight': f"{rng.uniform(0, 5):.2f}"}
+            for n in (1, 2, 3):
+                values[f'DIM State {n}'] = values[f'Status {n}'] = state
+            if i % 23 == 0:
+                values['DIM State 1'] = values['Status 1'] = ''
+            print(';'.join(str(values[col]) for col in columns), file=f)
+    return str(path)
+
+def summary_text(summary):
+    file = io.StringIO()
+    summary.write(file)
+    return file.getvalue()
+
+@pytest.mark.parametrize('schema', SCHEMAS)
+@pytest.mark.parametrize('chunksize', [7, 100, 100_000])
+def test_chunked_and_in_memory_runs_match(box_df, tmp_path, schema, chunksize):
+    log_file = write_schema_log(tmp_path / f'{schema}.log', SCHEMAS[schema])
+    knn = ReferenceClassifier(box_df)
+
+    in_memory = analyze_log(log_file, TOLERANCES, BOXES, knn, box_df)
+    results_file = str(tmp_path / 'results.csv')
+    chunked = analyze_log(log_file, TOLERANCES, BOXES, knn, box_df, chunked=True, chunksize=chunksize, results_file=results_file)
+
+    assert in_memory.summary.total_bad > 0
+    assert summary_text(chunked.summary) == summary_text(in_memory.summary)
+    with open(results_file, encoding='utf-8') as f:
+        assert f.read() == in_memory.results.to_csv(index=False)
+
+def test_blank_index_and_fractional_states_read_as_before(tmp_path):
+    log_file = tmp_path / 'odd.log'
+    log_file.write_text("Index;Length;Width;Height;DIM State 1;DIM State 2;DIM State 3\n"
+                        "1;4.0;4.0;4.0;1;1.5;1\n"
+                        ";4.1;4.0;4.0;1;1;1\n"
+                        "3;4.0;4.0;3.9;;1;0\n")
+    baseline = pd.read_csv(log_file, sep=';')
+
+    # The blank Index and the fractional state keep the dtypes read_csv infers; the blank state fits Int16
+    meas_df = read_log(str(log_file))
+    assert meas_df['Index'].dtype == baseline['Index'].dtype == 'float64'
+    assert meas_df['DIM State 2'].dtype == baseline['DIM State 2'].dtype == 'float64'
+    assert meas_df['DIM State 1'].dtype == 'Int16'
+    pd.testing.assert_frame_equal(meas_df.astype('float64'), baseline.astype('float64'))
+
+    chunks = list(read_log_chunks(str(log_file), chunksize=2))
+    assert sum(len(chunk) for chunk in chunks) == 3
+    assert chunks[1]['DIM State 1'].dtype == 'Int16'  # narrowed where every value fits
+
+def test_compact_dtypes_when_the_values_fit(tmp_path):
+    log_file = tmp_path / 'plain.log'
+    log_file.write_text("Index;Length;Width;Height;DIM State 1;DIM State 2;DIM State 3;Weight\n"
+                        "1;4;4.0;4.0;1;;1;2.5\n"
+                        "2;4.1;4.0;4.0;1;1;0;2.5\n")
+    meas_df = read_log(str(log_file))
+    assert list(meas_df.columns) == ['Index', 'Length', 'Width', 'Height', 'DIM State 1', 'DIM State 2', 'DIM State 3']
+    assert meas_df['Index'].dtype == 'int64'
+    assert meas_df['Length'].dtype == 'float64'
+    assert (meas_df[['DIM State 1', 'DIM State 2', 'DIM State 3']].dtypes == 'Int16').all()
@@ -0,0 +1,31 @@
+import os
+from registry import ModelRegistry
+from training import load_training_data, build_model, extend_model
+
+def test_register_only_activates_when_asked(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    training_df = load_training_data()
+    version = registry.register(build_model(training_df), {'source': 'full'}, training_df=training_df)
+    assert registry.active_version is None
+
+    registry.activate(version)
+    assert registry.active_version == version
+    assert len(registry.training_data()) == len(training_df)
+
+def test_extend_model_uses_the_stored_rows(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    training_df = load_training_data()
+    version = registry.register(build_model(training_df), {'source': 'full'}, activate=True, training_df=training_df)
+
+    new_rows = training_df.head(10).assign(Box='test')
+    model, extended_df = extend_model(registry.load(version), registry.training_data(version), new_rows, n_neighbors=1)
+    assert len(extended_df) == len(training_df) + 10
+    assert model.n_neighbors == 1
+    assert model.predict(new_rows[['Length', 'Width', 'Height']].head(1))[0] in model.classes_
+
+    _, compacted_df = extend_model(registry.load(version), training_df, training_df, drop_repeats=True)
+    assert len(compacted_df) == len(training_df.drop_duplicates())
+
+def test_default_folder_is_per_user():
+    from settings import DATA_DIR
+    assert ModelRegistry().folder == os.path.join(DATA_DIR, 'models')
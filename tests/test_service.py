@@ -0,0 +1,86 @@
+import os
+import json
+import asyncio
+import pytest
+from service import AnalysisService, HTTPError
+
+@pytest.fixture
+def service(box_df, tmp_path):
+    defaults = {'tolerances': {'length': 0.2, 'width': 0.2, 'height': 0.2}, 'selected_boxes': list(box_df['Box']),
+                'chunked': False, 'chunksize': 1000, 'format': None, 'sweep': None, 'sweep_grids': None}
+    os.makedirs(tmp_path / 'data')
+    service = AnalysisService(None, box_df, defaults, str(tmp_path / 'jobs'), workers=1, data_root=str(tmp_path / 'data'))
+    yield service
+    service.executor.shutdown()
+
+def submit(service, raw):
+    """Submit a JSON request body the way the HTTP handler does."""
+    body = json.dumps(raw).encode()
+
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(body)
+        reader.feed_eof()
+        return await service.submit({}, {'content-length': str(len(body)), 'content-type': 'application/json'}, reader)
+    return asyncio.run(run())
+
+def test_options_fill_in_defaults(service):
+    options = service.options({'length': '0.3', 'boxes': '4x4x4,5x5x5', 'sweep': '0:1:0.5', 'chunked': 'yes'})
+    assert options['tolerances'] == {'length': 0.3, 'width': 0.2, 'height': 0.2}
+    assert options['selected_boxes'] == ['4x4x4', '5x5x5']
+    assert options['sweep_grids']['Length'] == [0.0, 0.5, 1.0]
+    assert options['chunked'] is True
+
+def test_json_options_keep_their_types(service):
+    options = service.options({'width': 0, 'boxes': ['6x6x6'], 'chunked': False})
+    assert options['tolerances']['width'] == 0.0
+    assert options['selected_boxes'] == ['6x6x6']
+    assert options['chunked'] is False
+
+@pytest.mark.parametrize('raw', [
+    {'sweep': 5}, {'sweep': [0.1]}, {'sweep': '1:0:-1'}, {'length': [1]}, {'format': 'doc'},
+    # Tolerances that would run but report nonsense
+    {'length': 'nan'}, {'width': 'inf'}, {'height': -0.1}, {'length': True},
+    # Options of the wrong type or unknown values
+    {'chunked': [1]}, {'chunked': 1}, {'chunked': 'maybe'},
+    {'boxes': ['nope']}, {'boxes': 'nope'}, {'boxes': {'4x4x4': True}}, {'boxes': [4]},
+    # A sweep grid too large to hold in memory
+    {'sweep': '0:1000:0.001'},
+])
+def test_invalid_options_are_bad_requests(service, raw):
+    with pytest.raises(HTTPError) as error:
+        service.options(raw)
+    assert error.value.status == 400
+
+def test_logs_by_path_stay_inside_the_data_root(service, tmp_path):
+    with open(tmp_path / 'data' / 'station.log', 'w') as f:
+        f.write("Index;Length;Width;Height\n")
+    with open(tmp_path / 'outside.log', 'w') as f:
+        f.write("Index;Length;Width;Height\n")
+    os.symlink(tmp_path / 'outside.log', tmp_path / 'data' / 'link.log')
+
+    assert service.resolve_path('station.log') == os.path.realpath(tmp_path / 'data' / 'station.log')
+    assert service.resolve_path(str(tmp_path / 'data' / 'station.log')) == os.path.realpath(tmp_path / 'data' / 'station.log')
+    for path in ['/etc/passwd', '../outside.log', str(tmp_path / 'outside.log'), 'link.log', 'missing.log']:
+        with pytest.raises(HTTPError) as error:
+            service.resolve_path(path)
+        assert error.value.status == 400
+
+@pytest.mark.parametrize('raw', [
+    {'path': '/etc/passwd'}, {'path': '../outside.log'}, {'path': 5}, {},
+    {'path': 'station.log', 'length': 'nan'}, {'path': 'station.log', 'chunked': [1]},
+    {'path': 'station.log', 'boxes': ['nope']}, {'path': 'station.log', 'sweep': '0:1000:0.001'},
+])
+def test_bad_requests_are_refused_before_queueing(service, tmp_path, raw):
+    with open(tmp_path / 'data' / 'station.log', 'w') as f:
+        f.write("Index;Length;Width;Height\n")
+    with pytest.raises(HTTPError) as error:
+        submit(service, raw)
+    assert error.value.status == 400
+    assert not service.jobs
+
+def test_paths_are_refused_without_a_data_root(service, tmp_path):
+    service.data_root = None
+    with pytest.raises(HTTPError) as error:
+        service.resolve_path(str(tmp_path / 'data' / 'station.log'))
+    assert error.value.status == 400
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from conftest import write_log
+from classifier import ReferenceClassifier
+from pipeline import analyze_log
+from sweep import ToleranceSweep, parse_grid, tolerance_grids, MAX_GRID_POINTS
+
+BOXES = ['4x4x4', '6x6x6', '10x10x10']
+
+@pytest.fixture
+def log_file(tmp_path):
+    # Measurements of three boxes, off by up to 0.5 on each axis
+    rng = np.random.default_rng(0)
+    rows = []
+    for size in [4, 6, 10]:
+        for offsets in rng.uniform(-0.5, 0.5, size=(40, 3)).round(2):
+            rows.append(tuple(size + offsets))
+    return write_log(tmp_path / 'sweep.log', rows)
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_sweep_matches_separate_runs(box_df, log_file, tmp_path, chunked):
+    knn = ReferenceClassifier(box_df)
+    grids = tolerance_grids("0:0.5:0.1", height="0.2,0.4")
+    summary = analyze_log(log_file, {'length': 0.2, 'width': 0.2, 'height': 0.2}, BOXES, knn, box_df, chunked=chunked,
+                          chunksize=25, results_file=str(tmp_path / 'results.csv'), sweep_grids=grids).summary
+    table = summary.sweep.table()
+
+    for length, width, height in [(0.0, 0.0, 0.2), (0.1, 0.3, 0.2), (0.2, 0.2, 0.2), (0.4, 0.1, 0.4), (0.5, 0.5, 0.4)]:
+        tolerances = {'length': length, 'width': width, 'height': height}
+        separate = analyze_log(log_file, tolerances, BOXES, knn, box_df).summary
+        at_point = table[np.isclose(table['Length Tol'], length) & np.isclose(table['Width Tol'], width)
+                         & np.isclose(table['Height Tol'], height)].set_index('Box')
+
+        assert at_point.loc['All', 'Measured'] == separate.total_rows
+        assert at_point.loc['All', 'Failed'] == separate.total_bad
+        for box in BOXES:
+            failed = separate.failure_counts.get(box, 0)
+            assert at_point.loc[box, 'Failed'] == failed, (tolerances, box)
+
+def test_merged_sweeps_equal_one_pass(box_df, log_file):
+    knn = ReferenceClassifier(box_df)
+    grids = tolerance_grids()
+    whole = analyze_log(log_file, {'length': 0.2, 'width': 0.2, 'height': 0.2}, BOXES, knn, box_df, sweep_grids=grids)
+
+    merged = ToleranceSweep(grids)
+    for part in np.array_split(np.arange(len(whole.results)), 4):
+        sweep = ToleranceSweep(grids)
+        sweep.add(whole.results.iloc[part])
+        merged.merge(sweep)
+    assert merged.counts.keys() == whole.summary.sweep.counts.keys()
+    for box, histogram in whole.summary.sweep.counts.items():
+        assert np.array_equal(merged.counts[box], histogram)
+
+@pytest.mark.parametrize('spec', ["0:2:0.01", "0:1000:0.001", "nan:1:0.1", "0,inf", ",".join(str(i / 10) for i in range(MAX_GRID_POINTS + 1))])
+def test_oversized_or_invalid_grids_are_refused(spec):
+    with pytest.raises(ValueError):
+        parse_grid(spec)
+
+def test_grid_at_the_limit_is_accepted():
+    assert len(parse_grid("0:1:0.02")) == MAX_GRID_POINTS
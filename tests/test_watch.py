@@ -0,0 +1,68 @@
+import io
+import os
+import logging
+import pytest
+from conftest import write_log, LOG_HEADER
+from classifier import ReferenceClassifier
+from watch import LogWatcher, check
+
+TOLERANCES = {'length': 0.2, 'width': 0.2, 'height': 0.2}
+BOXES = ['4x4x4', '6x5x2', '10x10x10']
+
+@pytest.fixture
+def watcher(tmp_path, box_df):
+    log_file = str(tmp_path / 'station.log')
+    return LogWatcher(log_file, TOLERANCES, BOXES, ReferenceClassifier(box_df), box_df)
+
+def append(log_file, text):
+    with open(log_file, 'a') as f:
+        f.write(text)
+
+def test_counts_only_the_appended_rows(watcher):
+    write_log(watcher.log_file, [(4.0, 4.0, 4.0), (6.0, 5.0, 2.0)])
+    assert len(watcher.poll()) == 2
+    assert watcher.poll() is None
+
+    # An unfinished line waits for the rest of it
+    append(watcher.log_file, "3;10.0;10.0;9.5")
+    assert watcher.poll() is None
+    append(watcher.log_file, "\n")
+    assert len(watcher.poll()) == 1
+    assert (watcher.summary.total_rows, watcher.summary.total_bad) == (3, 1)
+
+def test_rotated_log_is_read_from_the_top(watcher, tmp_path):
+    write_log(watcher.log_file, [(4.0, 4.0, 4.0)] * 2)
+    watcher.poll()
+
+    # Replaced by a new, larger file: the size alone does not show it
+    rotated = write_log(tmp_path / 'new.log', [(6.0, 5.0, 2.0)] * 5)
+    os.replace(rotated, watcher.log_file)
+    assert len(watcher.poll()) == 5
+    assert watcher.summary.total_rows == 5
+    assert dict(watcher.summary.box_counts) == {'6x5x2': 5}
+
+def test_truncated_log_is_read_from_the_top(watcher):
+    write_log(watcher.log_file, [(4.0, 4.0, 4.0)] * 3)
+    watcher.poll()
+    with open(watcher.log_file, 'w') as f:
+        print(LOG_HEADER, file=f)
+        print("1;6.0;5.0;2.0;1;1;1", file=f)
+    assert len(watcher.poll()) == 1
+    assert watcher.summary.total_rows == 1
+
+def test_errors_are_logged_and_the_watch_goes_on(watcher, caplog):
+    out = io.StringIO()
+    assert check(watcher, out) is False  # no log yet
+    write_log(watcher.log_file, [(4.0, 4.0, 4.0)])
+    check(watcher, out)
+
+    append(watcher.log_file, "2;not a number;4.0;4.0;1;1;1\n")
+    with caplog.at_level(logging.ERROR):
+        assert check(watcher, out) is False
+    assert watcher.log_file in caplog.text
+
+    # The bad row is skipped; the rows after it are counted
+    append(watcher.log_file, "3;6.0;5.0;2.0;1;1;1\n")
+    check(watcher, out)
+    assert watcher.summary.total_rows == 2
+    assert "0 out of 2 boxes failed" in out.getvalue()
@@ -1,37 +1,95 @@
 import os
-import joblib
-import datetime
+import sys
+import time
+import argparse
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.neighbors import KNeighborsClassifier
+from registry import ModelRegistry, DEFAULT_REGISTRY_DIR
+from settings import load_tolerances
+from training import (TRAINING_FILE, load_training_data, confirmed_rows, append_training_data, build_model, extend_model,
+                      compact, cross_validate, model_metadata)
 
-# Load the training dataset
-training = pd.read_csv('data/Xtrain.csv')
+def print_versions(registry):
+    active = registry.active_version
+    versions = registry.versions()
+    if not versions:
+        print(f"No models registered in {registry.folder}")
+        return
+    for entry in versions:
+        marker = '*' if entry['version'] == active else ' '
+        parent = f"  (refit from {entry['parent']})" if entry.get('parent') else ""
+        print(f"{marker} {entry['version']}  {entry['source']:<11} {entry['rows']:>7} rows  "
+              f"{entry['cv_accuracy'] * 100:6.2f}% ± {entry['cv_accuracy_std'] * 100:.2f}%  data {entry['data_sha256'][:12]}{parent}")
 
-# Assume the CSV file has columns: 'length', 'width', 'height', 'label'
-X = training[['Length', 'Width', 'Height']]
-y = training['Box']
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the KNN box classifier, cross-validate it and register it as a new model version.")
+    parser.add_argument('--data', default=TRAINING_FILE, help="Training CSV (Length, Width, Height, Box)")
+    parser.add_argument('--append', nargs='+', metavar='RESULTS', help="Results files from parse_log (xlsx/csv/parquet); rows that passed every tolerance are added to the training data")
+    parser.add_argument('--incremental', action='store_true', help="Refit the active model on its own training rows plus the appended rows, instead of the training CSV")
+    parser.add_argument('--compact', action='store_true', help="Drop repeated measurements before fitting")
+    parser.add_argument('--neighbors', type=int, help="Number of neighbours (default: 3, or the active model's with --incremental)")
+    parser.add_argument('--folds', type=int, default=5, help="Cross-validation folds (default: %(default)s)")
+    parser.add_argument('--activate', action='store_true', help="Make the new model the one parse_log uses")
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY_DIR, help="Model registry folder (default: %(default)s)")
+    parser.add_argument('--list', action='store_true', help="List the registered models (* = active) and exit")
+    parser.add_argument('--use', metavar='VERSION', help="Make a registered version the active one and exit")
+    args = parser.parse_args(argv)
 
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    registry = ModelRegistry(args.registry)
+    if args.list:
+        print_versions(registry)
+        return 0
+    if args.use:
+        registry.activate(args.use)
+        print(f"Active model: {args.use}")
+        return 0
 
-# Create and train a KNN model
-model = KNeighborsClassifier(n_neighbors=3)
-model.fit(X_train, y_train)
+    # Add the confirmed measurements of the given results to the training data
+    new_rows = pd.DataFrame(columns=['Length', 'Width', 'Height', 'Box'])
+    if args.append:
+        tolerances = load_tolerances()
+        new_rows = pd.concat([confirmed_rows(results_file, tolerances) for results_file in args.append], ignore_index=True)
+        print(f"Appended {append_training_data(new_rows, args.data)} confirmed measurement(s) to {args.data}")
 
-# Evaluate the model's accuracy
-accuracy = model.score(X_test, y_test)
-print(f'Model Accuracy: {accuracy*100:.2f}%')
+    if args.incremental and not registry.active_version:
+        print(f"No active model to refit, training from {args.data}")
 
-# Get the current date and time
-now = datetime.datetime.now()
-timestamp = now.strftime("%Y-%m-%d-%H%M")
+    start = time.perf_counter()
+    if args.incremental and registry.active_version:
+        parent = registry.active_version
+        try:
+            parent_df = registry.training_data(parent)
+        except FileNotFoundError as e:
+            print(f"{e}; train without --incremental first.")
+            return 1
+        model, training_df = extend_model(registry.load(parent), parent_df, new_rows, args.neighbors, drop_repeats=args.compact)
+        source = 'incremental'
+    else:
+        training_df = load_training_data(args.data)
+        if args.compact:
+            training_df = compact(training_df)
+        model = build_model(training_df, args.neighbors or 3)
+        source, parent = ('compact' if args.compact else 'full'), None
+    fit_seconds = time.perf_counter() - start
 
-# Create a directory to store HTML files
-output_dir = 'models'
-os.makedirs(output_dir, exist_ok=True)
+    # Evaluate the model's accuracy
+    evaluation = cross_validate(training_df, model.n_neighbors, args.folds)
+    print(f"Model Accuracy: {evaluation['accuracy'] * 100:.2f}% ± {evaluation['accuracy_std'] * 100:.2f}% "
+          f"({args.folds}-fold cross-validation on {len(training_df)} rows)")
+    weak = evaluation['per_class'][evaluation['per_class']['Recall'] < 1]
+    if len(weak):
+        print("\nBoxes not always recognised:")
+        print(weak.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
 
-# Output model with timestamp
-output_file = os.path.join(output_dir, f'model_{timestamp}.joblib')
-joblib.dump(model, output_file)
-os.startfile(output_dir)
\ No newline at end of file
+    version = registry.register(model, model_metadata(training_df, model, evaluation, fit_seconds, source, parent),
+                                activate=args.activate, training_df=training_df)
+
+    # Keep the evaluation next to the model
+    evaluation['confusion'].to_csv(os.path.join(registry.folder, f"model_{version}.confusion.csv"))
+    evaluation['per_class'].to_csv(os.path.join(registry.folder, f"model_{version}.classes.csv"), index=False)
+
+    state = "active" if registry.active_version == version else f"not active, use --use {version} to switch"
+    print(f"\nRegistered model {version} ({state}) in {registry.folder}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.neighbors import KNeighborsClassifier
+from cache import fingerprint
+from pipeline import DIMENSIONS, out_of_spec
+from settings import resource_path
+
+TRAINING_FILE = resource_path(os.path.join('data', 'Xtrain.csv'))
+TRAINING_COLUMNS = DIMENSIONS + ['Box']
+
+def load_training_data(training_file=TRAINING_FILE):
+    """Load the labelled measurements (Length, Width, Height, Box)."""
+    return pd.read_csv(training_file)[TRAINING_COLUMNS]
+
+def read_results(results_file):
+    """Read a per-measurement results file written by parse_log (xlsx, csv or parquet)."""
+    extension = os.path.splitext(results_file)[1].lower()
+    if extension == '.xlsx':
+        return pd.read_excel(results_file)
+    elif extension == '.parquet':
+        return pd.read_parquet(results_file)
+    return pd.read_csv(results_file)
+
+def confirmed_rows(results_file, tolerances):
+    """Return the measurements of a results file whose box is confirmed by passing the tolerance check on every axis."""
+    results_df = read_results(results_file)
+    off_length, off_width, off_height = out_of_spec(results_df, tolerances)
+    return results_df.loc[~(off_length | off_width | off_height), TRAINING_COLUMNS].reset_index(drop=True)
+
+def append_training_data(rows, training_file=TRAINING_FILE):
+    """Append labelled measurements to the training file and return how many were added."""
+    rows = rows[TRAINING_COLUMNS]
+    if len(rows):
+        rows.to_csv(training_file, mode='a', index=False, header=not os.path.exists(training_file))
+    return len(rows)
+
+def build_model(training_df, n_neighbors=3):
+    """Fit a KNN box classifier on the whole training set."""
+    model = KNeighborsClassifier(n_neighbors=n_neighbors)
+    model.fit(training_df[DIMENSIONS], training_df['Box'])
+    return model
+
+def extend_model(model, training_df, rows, n_neighbors=None, drop_repeats=False):
+    """Refit a KNN with the same settings (or n_neighbors) on the rows it was fitted on plus new rows.
+
+    With drop_repeats, the combined rows are compacted first. Returns the model and the rows it was fitted on.
+    """
+    training_df = pd.concat([training_df[TRAINING_COLUMNS], rows[TRAINING_COLUMNS]], ignore_index=True)
+    if drop_repeats:
+        training_df = compact(training_df)
+    params = model.get_params()
+    if n_neighbors is not None:
+        params['n_neighbors'] = n_neighbors
+    extended = KNeighborsClassifier(**params)
+    extended.fit(training_df[DIMENSIONS], training_df['Box'])
+    return extended, training_df
+
+def compact(training_df):
+    """Drop repeated measurements, so the index only keeps distinct (Length, Width, Height, Box) rows.
+
+    This changes the neighbour votes where duplicates used to outweigh other rows, so check the cross-validation.
+    """
+    return training_df.drop_duplicates(TRAINING_COLUMNS, ignore_index=True)
+
+def cross_validate(training_df, n_neighbors=3, folds=5, seed=42):
+    """Cross-validate a KNN on the training set and return accuracy, per-class scores and the confusion matrix.
+
+    Every row is predicted once by a model that did not see it (stratified folds), so the per-class scores
+    and the confusion matrix cover the whole training set.
+    """
+    X, y = training_df[DIMENSIONS], training_df['Box']
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        # Boxes with fewer rows than folds are still predicted, they just cannot appear in every fold
+        warnings.filterwarnings('ignore', message='The least populated class')
+        predicted = cross_val_predict(KNeighborsClassifier(n_neighbors=n_neighbors), X, y, cv=splitter)
+        fold_accuracy = [float((predicted[test] == y.iloc[test]).mean()) for _, test in splitter.split(X, y)]
+    seconds = time.perf_counter() - start
+
+    labels = np.unique(y)
+    precision, recall, f1, support = precision_recall_fscore_support(y, predicted, labels=labels, zero_division=0)
+    per_class = pd.DataFrame({'Box': labels, 'Precision': precision, 'Recall': recall, 'F1': f1, 'Rows': support})
+    confusion = pd.DataFrame(confusion_matrix(y, predicted, labels=labels), index=pd.Index(labels, name='Actual'), columns=labels)
+
+    return {
+        'accuracy': float((predicted == y).mean()),
+        'accuracy_std': float(np.std(fold_accuracy)),
+        'fold_accuracy': fold_accuracy,
+        'per_class': per_class,
+        'confusion': confusion,
+        'seconds': seconds
+    }
+
+def model_metadata(training_df, model, evaluation, fit_seconds, source, parent=None):
+    """Describe a model for the registry: data hash, size, settings, accuracy and timing (parent: version it was refit from)."""
+    import sklearn
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source': source,
+        'parent': parent,
+        'data_sha256': fingerprint(training_df.reset_index(drop=True)),
+        'rows': len(training_df),
+        'classes': len(model.classes_),
+        'n_neighbors': model.n_neighbors,
+        'cv_accuracy': round(evaluation['accuracy'], 6),
+        'cv_accuracy_std': round(evaluation['accuracy_std'], 6),
+        'cv_folds': len(evaluation['fold_accuracy']),
+        'fit_seconds': round(fit_seconds, 6),
+        'cv_seconds': round(evaluation['seconds'], 6),
+        'sklearn': sklearn.__version__
+    }
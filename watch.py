@@ -0,0 +1,165 @@
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+import pandas as pd
+from pipeline import (load_reference, load_classifier, status_column, filter_status, classify, align, SummaryAccumulator,
+                      read_log_csv, CLASSIFIERS)
+from boxes import BoxReference
+from settings import load_tolerances, load_selected_boxes, resource_path
+
+class LogWatcher:
+    """Follow a growing ';'-separated log and keep running pass/fail counters for the rows appended to it.
+
+    Each poll() reads only the bytes added since the last one, so the cost of an update depends on the
+    number of new rows, not on the size of the file. A log that is rotated (replaced by a new file, even a
+    larger one) or truncated is read again from the top.
+    """
+
+    def __init__(self, log_file, tolerances, selected_boxes, knn, box_df, max_bytes=16 * 1024 * 1024):
+        self.log_file = log_file
+        self.max_bytes = max_bytes  # read at most this much per poll, so catching up on a big file stays bounded
+        self.tolerances = tolerances
+        self.selected_boxes = selected_boxes
+        self.knn = knn
+        self.reference = BoxReference(box_df)
+        self.reset()
+
+    def reset(self):
+        """Start again from the top of the file (e.g. after it was truncated or replaced)."""
+        self.offset = 0
+        self.identity = None
+        self.header = None
+        self.partial = b''
+        self.status = None
+        self.summary = SummaryAccumulator(self.selected_boxes, self.tolerances, keep_failures=False)
+
+    def read_new_lines(self):
+        """Return the complete lines appended since the last call, keeping any unfinished last line for later."""
+        stat = os.stat(self.log_file)
+        identity = file_identity(stat)
+        if stat.st_size < self.offset or (self.identity is not None and identity != self.identity):
+            # The log was truncated or rotated; start over
+            self.reset()
+        self.identity = identity
+        size = stat.st_size
+        if size == self.offset:
+            return []
+
+        with open(self.log_file, 'rb') as f:
+            f.seek(self.offset)
+            new_data = f.read(min(size - self.offset, self.max_bytes))
+        self.offset += len(new_data)
+        data = self.partial + new_data
+
+        # Only complete lines are processed; the remainder waits for the next poll
+        lines = data.split(b'\n')
+        self.partial = lines.pop()
+        lines = [line.rstrip(b'\r') for line in lines if line.strip()]
+
+        if self.header is None and lines:
+            self.header = lines.pop(0).decode('utf-8', errors='replace')
+            self.status = status_column(self.header.split(';'))
+            self.summary.has_status = self.status is not None
+
+        return lines
+
+    def behind(self):
+        """Return True if the file has more bytes than have been read so far."""
+        return os.path.getsize(self.log_file) > self.offset
+
+    def poll(self):
+        """Process the rows appended since the last poll and return them aligned (with the Δ columns).
+
+        The rows are consumed before they are parsed, so rows that fail to parse raise once and are skipped.
+        """
+        lines = self.read_new_lines()
+        if not lines:
+            return None
+
+        # Parse only the new rows, with the header kept from the first read
+        text = self.header + '\n' + b'\n'.join(lines).decode('utf-8', errors='replace')
+        meas_df = read_log_csv(io.StringIO(text))
+
+        # Filter -> classify -> align -> tolerance check for the new rows only
+        merged_df = align(classify(filter_status(meas_df, self.status), self.knn, self.selected_boxes, self.reference), self.reference)
+        self.summary.add(merged_df)
+
+        return merged_df
+
+    def box_table(self):
+        """Return the running pass/fail counts and success rate of each box."""
+        rows = []
+        for box in sorted(self.summary.box_counts):
+            total = self.summary.box_counts[box]
+            failed = self.summary.failure_counts.get(box, 0)
+            rows.append({'Box': box, 'Measured': total, 'Passed': total - failed, 'Failed': failed,
+                         'Success Rate': (total - failed) / total * 100})
+        return pd.DataFrame(rows, columns=['Box', 'Measured', 'Passed', 'Failed', 'Success Rate'])
+
+def file_identity(stat):
+    """Return what identifies a log file across polls: its inode, and its creation time on Windows."""
+    # On Windows st_ctime is the creation time; elsewhere it changes on every write, so only the inode is used
+    return stat.st_dev, stat.st_ino, stat.st_ctime_ns if os.name == 'nt' else None
+
+def check(watcher, file=sys.stdout):
+    """Poll the log once and print the counters if there were new rows; returns True if more bytes are waiting.
+
+    A missing log is waited for, and any error reading or parsing it is logged without stopping the watch.
+    """
+    try:
+        if not os.path.exists(watcher.log_file):
+            return False
+        merged_df = watcher.poll()
+        if merged_df is not None:
+            print_status(watcher, len(merged_df), file)
+        return watcher.behind()
+    except Exception as e:
+        logging.error(f"{watcher.log_file}: {e}", exc_info=True)
+        return False
+
+def print_status(watcher, new_rows, file=sys.stdout):
+    summary = watcher.summary
+    print(f"\n[{time.strftime('%H:%M:%S')}] {new_rows} new measurement(s) | "
+          f"{summary.total_bad} out of {summary.total_rows} boxes failed: {summary.success_rate:.2f}% success rate", file=file)
+    if summary.total_rows:
+        print(watcher.box_table().to_string(index=False, float_format=lambda rate: f"{rate:.2f}%"), file=file)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Follow a growing dimensioner log and report running pass/fail counts.")
+    parser.add_argument('log', help="Log file to follow")
+    parser.add_argument('--interval', type=float, default=2.0, help="Seconds between checks for new rows")
+    parser.add_argument('--length', type=float, help="Length tolerance (default: last used value in tolerances.json)")
+    parser.add_argument('--width', type=float, help="Width tolerance (default: last used value in tolerances.json)")
+    parser.add_argument('--height', type=float, help="Height tolerance (default: last used value in tolerances.json)")
+    parser.add_argument('--boxes', nargs='+', help="Boxes being ran (default: last selection in the GUI, or every box)")
+    parser.add_argument('--classifier', choices=CLASSIFIERS, default='knn', help="Trained KNN model, or the nearest box in the reference table")
+    parser.add_argument('--model', help="KNN model file to use with --classifier knn (default: the active model in the registry, or model.joblib)")
+    parser.add_argument('--model-version', help="Registered model version to use instead of the active one (see train.py --list)")
+    parser.add_argument('--reference', default=resource_path('Xactual.csv'), help="CSV of the actual box dimensions")
+    args = parser.parse_args(argv)
+
+    tolerances = load_tolerances()
+    for axis in ['length', 'width', 'height']:
+        if getattr(args, axis) is not None:
+            tolerances[axis] = getattr(args, axis)
+
+    box_df = load_reference(args.reference)
+    knn = load_classifier(args.classifier, args.model, box_df, args.model_version)
+    selected_boxes = args.boxes or load_selected_boxes() or list(box_df['Box'].unique())
+
+    watcher = LogWatcher(args.log, tolerances, selected_boxes, knn, box_df)
+    print(f"Watching {args.log} (Ctrl+C to stop)...")
+    try:
+        while True:
+            # Keep reading without waiting while catching up on a large backlog
+            if not check(watcher):
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        print_status(watcher, 0)
+
+if __name__ == "__main__":
+    main()